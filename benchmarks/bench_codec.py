@@ -0,0 +1,84 @@
+"""Bytes per workflow transition and encode/decode time per order, before and after orders_common.codec.
+
+"before" replays the former path: post_order encoded the order twice
+(assemble_order, then start_sfn_exec), InitializeOrder returned it as an
+indented JSON string, and the workflow parsed it back with
+States.StringToJson. "after" encodes the order once, compactly, and every
+state passes structured JSON.
+
+    python benchmarks/bench_codec.py --orders 20000
+"""
+import argparse
+import decimal
+import json
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "layer", "python"))
+
+from orders_common import codec  # noqa: E402
+
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, decimal.Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+
+
+def make_order(n):
+    return {
+        "name": "pizza margherita",
+        "quantity": decimal.Decimal(n % 7 + 1),
+        "restaurantId": f"restaurant-{n % 13}",
+        "user_id": "demo_user",
+        "id": f"4f2c7a8e-{n:04d}-4d7e-9b43-1d2c3e4f5a6b",
+        "orderStatus": "PENDING",
+        "createdAt": "2022-10-01T12:00:00.000000",
+    }
+
+
+def before(order):
+    """Return the payloads of each transition on the former path."""
+    execution_input = json.dumps(json.dumps(order, cls=DecimalEncoder), cls=DecimalEncoder)
+    initialize_output = json.dumps({"statusCode": 200, "body": json.dumps(json.loads(json.loads(execution_input)), indent=4, cls=DecimalEncoder)})
+    state = json.dumps({"saveResults": json.loads(json.loads(initialize_output)["body"])})
+    return execution_input, initialize_output, state
+
+
+def after(order):
+    """Return the payloads of each transition with orders_common.codec."""
+    execution_input = codec.dumps(order)
+    initialize_output = codec.dumps({"statusCode": 200, "body": codec.loads(execution_input)})
+    state = codec.dumps({"saveResults": codec.loads(initialize_output)["body"]})
+    return execution_input, initialize_output, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=20000)
+    args = parser.parse_args()
+
+    orders = [make_order(n) for n in range(args.orders)]
+    labels = ("execution input", "InitializeOrder output", "state after ResultSelector")
+    backend = "orjson" if codec.orjson else "json"
+    print(f"codec backend: {backend}")
+    print(f"{'path':<8} {'transition':<28} {'bytes/order':>12}")
+    for name, path in (("before", before), ("after", after)):
+        sizes = [0, 0, 0]
+        for order in orders:
+            for index, payload in enumerate(path(order)):
+                sizes[index] += len(payload.encode())
+        for label, size in zip(labels, sizes):
+            print(f"{name:<8} {label:<28} {size / len(orders):>12.0f}")
+
+    print(f"\n{'path':<8} {'us/order (encode+decode, all transitions)':>44}")
+    for name, path in (("before", before), ("after", after)):
+        best = min(timeit.repeat(lambda: [path(order) for order in orders], number=1, repeat=3))
+        print(f"{name:<8} {best / len(orders) * 1e6:>44.2f}")
+
+
+if __name__ == "__main__":
+    main()
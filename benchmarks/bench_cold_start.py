@@ -0,0 +1,107 @@
+"""Cold-start cost of every handler: import time, first-client time and peak RSS.
+
+Each measurement runs in a fresh interpreter. "init" covers what a cold
+invocation pays before doing any work: importing the handler module and
+building the AWS clients it needs (at import time for eagerly initialized
+handlers, on first use for handlers on orders_common.clients).
+
+    python benchmarks/bench_cold_start.py --baseline HEAD~1
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import io
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# AWS services each handler talks to on its first invocation.
+HANDLER_SERVICES = {
+    "archive_orders": ["s3"],
+    "batch_get_orders": ["dynamodb"],
+    "cancel_failed_order": ["dynamodb"],
+    "complete_order": ["dynamodb"],
+    "delete_order": ["dynamodb"],
+    "delete_orders": ["dynamodb"],
+    "get_orders": ["dynamodb"],
+    "get_orders_by_restaurant": ["dynamodb"],
+    "get_orders_by_status": ["dynamodb"],
+    "get_single_order": ["dynamodb"],
+    "initialize_order": ["dynamodb"],
+    "notify_orders": ["sns"],
+    "post_order": ["stepfunctions"],
+    "process_payment": [],
+    "sendSQSMessage": ["sqs"],
+    "send_sqs_message_batch": ["sqs"],
+    "update_order": ["dynamodb"],
+}
+
+PROBE = """
+import importlib, json, resource, sys, time
+sys.path[:0] = [{lambdas!r}, {layer!r}]
+started = time.perf_counter()
+importlib.import_module({module!r})
+imported = time.perf_counter()
+if "orders_common.clients" in sys.modules:
+    from orders_common import clients
+    for service in {services!r}:
+        clients.client(service)
+ready = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "init_ms": (ready - started) * 1000,
+    "rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+def checkout(revision, directory):
+    archive = subprocess.run(["git", "archive", revision, "lambdas", "layer"],
+                             cwd=ROOT, capture_output=True)
+    if archive.returncode:
+        # Older revisions have no layer directory.
+        archive = subprocess.run(["git", "archive", revision, "lambdas"], cwd=ROOT,
+                                 capture_output=True, check=True)
+    tarfile.open(fileobj=io.BytesIO(archive.stdout)).extractall(directory)
+    return directory
+
+
+def measure(tree, module, services, repeat):
+    lambdas = os.path.join(tree, "lambdas")
+    if not os.path.exists(os.path.join(lambdas, f'{module}.py')):
+        return None
+    env = dict(os.environ, AWS_DEFAULT_REGION="us-east-1", AWS_ACCESS_KEY_ID="testing",
+               AWS_SECRET_ACCESS_KEY="testing", ORDER_TABLE="ORDER")
+    probe = PROBE.format(lambdas=lambdas, layer=os.path.join(tree, "layer", "python"),
+                         module=module, services=services)
+    runs = [json.loads(subprocess.run([sys.executable, "-c", probe], env=env, capture_output=True,
+                                      text=True, check=True).stdout) for _ in range(repeat)]
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", help="git revision to compare against, e.g. HEAD~1")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    trees = [("current", ROOT)]
+    with tempfile.TemporaryDirectory() as scratch:
+        if args.baseline:
+            trees.insert(0, (args.baseline, checkout(args.baseline, scratch)))
+
+        print(f"{'handler':<24} {'tree':<10} {'import ms':>10} {'init ms':>9} {'peak RSS MiB':>13}")
+        for module, services in HANDLER_SERVICES.items():
+            for label, tree in trees:
+                result = measure(tree, module, services, args.repeat)
+                if result:
+                    print(f"{module:<24} {label:<10} {result['import_ms']:>10.1f} "
+                          f"{result['init_ms']:>9.1f} {result['rss_mib']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
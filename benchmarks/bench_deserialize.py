@@ -0,0 +1,64 @@
+"""orders_common.deserialize vs. boto3's TypeDeserializer on pages of order items.
+
+    python benchmarks/bench_deserialize.py --pages 1000 10000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+from boto3.dynamodb.types import TypeDeserializer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "layer", "python"))
+
+from orders_common.deserialize import deserialize_columns, deserialize_items  # noqa: E402
+
+
+def make_page(size):
+    page = []
+    for n in range(size):
+        item = {
+            "user_id": {"S": "demo_user"},
+            "id": {"S": f"order-{n:08d}"},
+            "name": {"S": "pizza"},
+            "quantity": {"N": str(n % 7 + 1)},
+            "restaurantId": {"S": f"restaurant-{n % 13}"},
+            "orderStatus": {"S": "FAILED" if n % 5 == 0 else "SUCCESS"},
+            "createdAt": {"S": "2022-10-01T12:00:00"},
+            "updatedAt": {"S": "2022-10-01T12:00:05"},
+        }
+        if n % 5 == 0:
+            item["errorMessage"] = {"S": "payment method declined"}
+        page.append(item)
+    return page
+
+
+def boto3_page(items, deserializer=TypeDeserializer()):
+    return [{key: deserializer.deserialize(value) for key, value in item.items()} for item in items]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    candidates = [
+        ("TypeDeserializer", boto3_page),
+        ("deserialize_items", deserialize_items),
+        ("deserialize_columns", deserialize_columns),
+    ]
+    print(f"{'items':>7} {'implementation':<20} {'ms/page':>9} {'us/item':>8} {'vs boto3':>9}")
+    for size in args.pages:
+        page = make_page(size)
+        number = max(1, 20000 // size)
+        baseline = None
+        for name, convert in candidates:
+            best = min(timeit.repeat(lambda: convert(page), number=number, repeat=args.repeat)) / number
+            baseline = baseline or best
+            print(f"{size:>7} {name:<20} {best * 1e3:>9.2f} {best / size * 1e6:>8.2f} {baseline / best:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
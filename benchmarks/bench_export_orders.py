@@ -0,0 +1,188 @@
+"""Serial vs. parallel segmented scan export against a local DynamoDB stand-in.
+
+The baseline is the original serial path: the scan loop get_orders ran
+before it was paginated, which collected every order in one list that
+the Lambda runtime then serialized. It is compared with
+scripts/export_orders.py at each --segments count.
+
+By default the table lives in ``LocalDynamoDB``, a minimal in-process
+stand-in that implements segmented ``Scan`` pagination and sleeps for
+``--latency-ms`` per page to model the network round trip. The parallel
+speedup comes from overlapping those waits, so it depends entirely on
+that assumption; the latency used is printed with the results. Pass
+``--endpoint-url`` to run against DynamoDB Local instead (the table is
+created and filled there first).
+
+    python benchmarks/bench_export_orders.py --items 50000 --segments 1 4 8 16
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import zlib
+
+import boto3
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+sys.path.insert(0, os.path.join(ROOT, "layer", "python"))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+import export_orders  # noqa: E402
+
+TABLE_NAME = "ORDER"
+
+
+class LocalDynamoDB:
+    """In-process stand-in for the subset of the Scan API the exporter uses."""
+
+    def __init__(self, items, page_size, latency):
+        self.items = items
+        self.page_size = page_size
+        self.latency = latency
+        self.segments = {}
+
+    def client(self):
+        return self
+
+    def partition(self, total_segments):
+        # Like DynamoDB, segments are disjoint ranges of the partition key hash.
+        if total_segments not in self.segments:
+            buckets = [[] for _ in range(total_segments)]
+            for item in self.items:
+                buckets[zlib.crc32(item["user_id"]["S"].encode()) % total_segments].append(item)
+            self.segments[total_segments] = buckets
+        return self.segments[total_segments]
+
+    def scan(self, TableName, Segment=0, TotalSegments=1, ExclusiveStartKey=None):
+        time.sleep(self.latency)
+        segment = self.partition(TotalSegments)[Segment]
+        start = int(ExclusiveStartKey["offset"]["N"]) if ExclusiveStartKey else 0
+        end = start + self.page_size
+        # Fresh dicts per page, as a parsed response would be.
+        response = {"Items": [dict(item) for item in segment[start:end]]}
+        if end < len(segment):
+            response["LastEvaluatedKey"] = {"offset": {"N": str(end)}}
+        return response
+
+
+class NullSink:
+    """Counts bytes instead of storing them, so memory reflects the exporter."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+
+
+def make_items(count):
+    return [{
+        "user_id": {"S": f"user-{n % 500}"},
+        "id": {"S": f"order-{n:08d}"},
+        "name": {"S": "pizza"},
+        "quantity": {"N": str(n % 7 + 1)},
+        "restaurantId": {"S": f"restaurant-{n % 13}"},
+        "orderStatus": {"S": "SUCCESS"},
+        "createdAt": {"S": "2022-10-01T12:00:00"},
+    } for n in range(count)]
+
+
+def load_dynamodb_local(endpoint_url, items):
+    client = boto3.client("dynamodb", endpoint_url=endpoint_url)
+    client.create_table(
+        TableName=TABLE_NAME,
+        KeySchema=[{"AttributeName": "user_id", "KeyType": "HASH"},
+                   {"AttributeName": "id", "KeyType": "RANGE"}],
+        AttributeDefinitions=[{"AttributeName": "user_id", "AttributeType": "S"},
+                              {"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    for start in range(0, len(items), 25):
+        requests = [{"PutRequest": {"Item": item}} for item in items[start:start + 25]]
+        client.batch_write_item(RequestItems={TABLE_NAME: requests})
+
+
+def process_response(data):
+    # The original get_orders projection, without its per-item print.
+    data['quantity'] = data['quantity']['N']
+    data['name'] = data['name']['S']
+    data['restaurantId'] = data['restaurantId']['S']
+    return data
+
+
+def serial_export(table_name, out, client_factory):
+    """The original serial scan: every page on one thread into one list."""
+    client = client_factory()
+    results = []
+    last_evaluated_key = None
+    while True:
+        if last_evaluated_key:
+            response = client.scan(TableName=table_name, ExclusiveStartKey=last_evaluated_key)
+        else:
+            response = client.scan(TableName=table_name)
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        results.extend(map(process_response, response['Items']))
+        if not last_evaluated_key:
+            break
+    # The Lambda runtime serialized the returned list as one document.
+    out.write(json.dumps(results))
+    return len(results)
+
+
+def run(export, client_factory):
+    started = time.perf_counter()
+    count = export(NullSink(), client_factory)
+    elapsed = time.perf_counter() - started
+
+    # Peak memory comes from a second, traced run so tracing does not skew timings.
+    tracemalloc.start()
+    export(NullSink(), client_factory)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--segments", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--page-size", type=int, default=1000,
+                        help="items per Scan page for the in-process stand-in")
+    parser.add_argument("--latency-ms", type=float, default=25.0)
+    parser.add_argument("--endpoint-url", default=None)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    if args.endpoint_url:
+        load_dynamodb_local(args.endpoint_url, items)
+        del items
+
+        def client_factory():
+            return export_orders.default_client_factory(args.endpoint_url)
+        print(f"Scan latency: real round trips to DynamoDB Local at {args.endpoint_url}")
+    else:
+        client_factory = LocalDynamoDB(items, args.page_size, args.latency_ms / 1000.0).client
+        print(f"Scan latency: {args.latency_ms:g} ms per {args.page_size}-item page, simulated by the "
+              f"in-process stand-in; speedups come from overlapping it")
+
+    exports = [("serial (original)", lambda out, factory: serial_export(TABLE_NAME, out, factory))]
+    exports.extend((f"{segments} segments", lambda out, factory, segments=segments:
+        export_orders.export_orders(TABLE_NAME, out, segments, factory)) for segments in args.segments)
+
+    print(f"{'export':<18} {'items':>8} {'seconds':>8} {'items/s':>10} {'peak KiB':>9} {'speedup':>8}")
+    baseline = None
+    for name, export in exports:
+        count, elapsed, peak = run(export, client_factory)
+        baseline = baseline or elapsed
+        print(f"{name:<18} {count:>8} {elapsed:>8.2f} {count / elapsed:>10.0f} "
+              f"{peak / 1024:>9.0f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
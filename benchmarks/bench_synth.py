@@ -0,0 +1,80 @@
+"""Wall time of `cdk synth` and of the unit tests, cold and with a warm build cache.
+
+Every synth runs in a fresh interpreter against a scratch build directory:
+"cold" starts from an empty one, "warm" reuses what the cold run built, as
+a second `cdk synth` or a `cdk watch` cycle would. Within each process the
+stack is synthesized once per context, so later contexts show the cost of
+a synth once sources are cached.
+
+    python benchmarks/bench_synth.py --repeat 3 --tests
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONTEXTS = [{}, {"stateMachineType": "EXPRESS"}, {"workflowIntegration": "sdk"}]
+
+PROBE = """
+import json, sys, tempfile, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import aws_cdk as core
+from cdk_accelerate import packaging
+packaging.BUILD_DIR = {build!r}
+from cdk_accelerate.cdk_accelerate_stack import CdkAccelerateStack
+imported = time.perf_counter()
+synths = []
+for context in {contexts!r}:
+    begin = time.perf_counter()
+    with tempfile.TemporaryDirectory() as outdir:
+        app = core.App(context=context, outdir=outdir)
+        CdkAccelerateStack(app, "cdk-accelerate")
+        app.synth()
+    synths.append(time.perf_counter() - begin)
+print(json.dumps({{"import_s": imported - started, "synth_s": synths}}))
+"""
+
+
+def synth(build, contexts):
+    env = dict(os.environ, JSII_SILENCE_WARNING_DEPRECATED_NODE_VERSION="1")
+    probe = PROBE.format(root=ROOT, build=build, contexts=contexts)
+    result = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tests", action="store_true", help="also time `pytest tests/unit`")
+    args = parser.parse_args()
+
+    runs = {"cold": [], "warm": []}
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as build:
+            runs["cold"].append(synth(build, CONTEXTS))
+            runs["warm"].append(synth(build, CONTEXTS))
+
+    labels = ["default"] + [",".join(f"{key}={value}" for key, value in context.items()) for context in CONTEXTS[1:]]
+    print(f"{'build cache':<12} {'import s':>9} " + " ".join(f"{label:>30}" for label in labels))
+    for name, results in runs.items():
+        synths = [statistics.median(result["synth_s"][index] for result in results) for index in range(len(CONTEXTS))]
+        print(f"{name:<12} {statistics.median(result['import_s'] for result in results):>9.2f} "
+              + " ".join(f"{seconds:>30.2f}" for seconds in synths))
+
+    if args.tests:
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "pytest", "-q", "tests/unit"], cwd=ROOT, check=True,
+                       env=dict(os.environ, JSII_SILENCE_WARNING_DEPRECATED_NODE_VERSION="1"),
+                       stdout=subprocess.DEVNULL)
+        print(f"\npytest tests/unit: {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
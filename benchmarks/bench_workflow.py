@@ -0,0 +1,94 @@
+"""Per-state time and payload size of the order workflow, run locally.
+
+Executes the definition create_step_function deploys with the local ASL
+interpreter, against moto's in-process DynamoDB. Lambda tasks run the
+handlers from ``lambdas/``; with ``--integration sdk`` the DynamoDB tasks
+are served by boto3 clients instead. Payload sizes are the
+JSON documents each state receives and passes on; Step Functions caps
+them at 256 KiB.
+
+    python benchmarks/bench_workflow.py --executions 500 --integration lambda
+"""
+import argparse
+import os
+import statistics
+import sys
+
+import boto3
+from moto import mock_aws
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "lambdas"))
+sys.path.insert(0, os.path.join(ROOT, "layer", "python"))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+from step_function_workflow.definition import INTEGRATIONS, RETRY_POLICIES  # noqa: E402
+from step_function_workflow.local_interpreter import local_workflow  # noqa: E402
+
+TABLE_NAME = "ORDER"
+PAYLOAD_LIMIT = 256 * 1024
+
+
+def create_resources():
+    boto3.client("dynamodb").create_table(
+        TableName=TABLE_NAME,
+        KeySchema=[{"AttributeName": "user_id", "KeyType": "HASH"},
+                   {"AttributeName": "id", "KeyType": "RANGE"}],
+        AttributeDefinitions=[{"AttributeName": "user_id", "AttributeType": "S"},
+                              {"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    os.environ.update(ORDER_TABLE=TABLE_NAME)
+
+
+def make_order(n):
+    return {"name": "pizza margherita", "quantity": n % 7 + 1, "restaurantId": f"restaurant-{n % 13}",
+            "user_id": "demo_user", "id": f"order-{n:08d}", "orderStatus": "PENDING",
+            "createdAt": "2022-10-01T12:00:00.000000",
+            "statusCreatedAt": "PENDING#2022-10-01T12:00:00.000000"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--executions", type=int, default=200)
+    parser.add_argument("--integration", choices=INTEGRATIONS, default="lambda")
+    parser.add_argument("--state-machine-type", choices=sorted(RETRY_POLICIES), default="STANDARD")
+    args = parser.parse_args()
+
+    with mock_aws():
+        create_resources()
+        workflow = local_workflow(args.integration, args.state_machine_type, table_name=TABLE_NAME,
+                                  sdk_client=boto3.client)
+        # Handler output goes to a null sink so printing does not skew timings.
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                executions = [workflow.execute(make_order(n)) for n in range(args.executions)]
+            finally:
+                sys.stdout = stdout
+
+    failed = [execution for execution in executions if execution.status != "SUCCEEDED"]
+    durations = [execution.duration_ms for execution in executions]
+    print(f"{args.integration}/{args.state_machine_type}: {len(executions)} executions, {len(failed)} failed, "
+          f"mean {statistics.mean(durations):.2f} ms, max {max(durations):.2f} ms")
+
+    states = {}
+    for execution in executions:
+        for state in execution.states:
+            states.setdefault(state.name, []).append(state)
+    print(f"\n{'state':<22} {'runs':>6} {'mean ms':>8} {'max ms':>8} {'in bytes':>9} {'out bytes':>10} {'retries':>8}")
+    for name, runs in states.items():
+        largest = max(max(run.input_bytes, run.output_bytes) for run in runs)
+        flag = "  over 256 KiB" if largest > PAYLOAD_LIMIT else ""
+        print(f"{name:<22} {len(runs):>6} {statistics.mean(run.duration_ms for run in runs):>8.2f} "
+              f"{max(run.duration_ms for run in runs):>8.2f} {statistics.mean(run.input_bytes for run in runs):>9.0f} "
+              f"{statistics.mean(run.output_bytes for run in runs):>10.0f} "
+              f"{sum(run.attempts - 1 for run in runs):>8}{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""End-to-end load test of the order pipeline against moto's in-process AWS.
+
+Every order goes postOrder (sendSQSMessage) -> SQS -> post_order ->
+Step Functions StartExecution -> InitializeOrder -> ProcessPayment ->
+CompleteOrder or CancelFailedOrder, running the real handler modules.
+moto records executions without running them, so each execution is run
+by the local ASL interpreter (step_function_workflow.local_interpreter)
+on the deployed definition.
+
+Producers post orders while consumers poll the queue in batches, so both
+sides run at the requested concurrency. The report has end-to-end
+throughput and latency percentiles, per-handler durations and the number
+and latency of every AWS call the handlers made. Handler logs and EMF
+records are counted, not printed.
+
+    python benchmarks/load_test.py --orders 1000 --producers 8 --consumers 4 --batch-size 5
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from moto import mock_aws
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "lambdas"))
+sys.path.insert(0, os.path.join(ROOT, "layer", "python"))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+from orders_common.indexes import RESTAURANT_INDEX, STATUS_INDEX  # noqa: E402
+from step_function_workflow.local_interpreter import local_workflow  # noqa: E402
+
+TABLE_NAME = "ORDER"
+ARCHIVE_BUCKET = "order-archive"
+PLACEHOLDER_DEFINITION = '{"StartAt": "Done", "States": {"Done": {"Type": "Succeed"}}}'
+
+
+class Recorder:
+    """Thread-safe samples in milliseconds, keyed by name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, key, milliseconds):
+        with self._lock:
+            self.samples.setdefault(key, []).append(milliseconds)
+
+
+class OutputSink:
+    """Replaces stdout while handlers run: counts their log and EMF bytes."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.lines = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+        self.lines += data.count("\n")
+
+    def flush(self):
+        pass
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def create_resources():
+    dynamodb = boto3.client("dynamodb")
+    dynamodb.create_table(
+        TableName=TABLE_NAME,
+        KeySchema=[{"AttributeName": "user_id", "KeyType": "HASH"},
+                   {"AttributeName": "id", "KeyType": "RANGE"}],
+        AttributeDefinitions=[{"AttributeName": name, "AttributeType": "S"} for name in
+                              ("user_id", "id", "restaurantId", "statusCreatedAt")],
+        GlobalSecondaryIndexes=[
+            {"IndexName": index_name, "Projection": {"ProjectionType": "ALL"},
+             "KeySchema": [{"AttributeName": hash_key, "KeyType": "HASH"},
+                           {"AttributeName": range_key, "KeyType": "RANGE"}]}
+            for index_name, hash_key, range_key in ((STATUS_INDEX, "user_id", "statusCreatedAt"),
+                                                    (RESTAURANT_INDEX, "restaurantId", "statusCreatedAt"))],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    queue_url = boto3.client("sqs").create_queue(QueueName="sqs-queue")["QueueUrl"]
+    topic_arn = boto3.client("sns").create_topic(Name="orders")["TopicArn"]
+    boto3.client("s3").create_bucket(Bucket=ARCHIVE_BUCKET)
+    state_machine_arn = boto3.client("stepfunctions").create_state_machine(
+        name="simple-state-machine", definition=PLACEHOLDER_DEFINITION,
+        roleArn="arn:aws:iam::123456789012:role/step-function-role")["stateMachineArn"]
+    os.environ.update(ORDER_TABLE=TABLE_NAME, QueueUrl=queue_url, TOPIC_ARN=topic_arn,
+                      STATE_MACHINE_ARN=state_machine_arn, ARCHIVE_BUCKET=ARCHIVE_BUCKET)
+    return queue_url, state_machine_arn
+
+
+def count_aws_calls(recorder):
+    """Time every call made through orders_common.clients, by operation."""
+    from orders_common import clients
+
+    def start(context, **kwargs):
+        context["load_test_started"] = time.perf_counter()
+
+    def finish(model, context, **kwargs):
+        started = context.get("load_test_started")
+        if started is not None:
+            recorder.add((model.service_model.service_id, model.name), (time.perf_counter() - started) * 1000)
+
+    for service in ("dynamodb", "sns", "sqs", "stepfunctions"):
+        events = clients.client(service).meta.events
+        events.register("before-parameter-build", start)
+        events.register("after-call", finish)
+
+
+class Pipeline:
+
+    def __init__(self, queue_url, state_machine_arn, batch_size, handlers, workflow):
+        # Handlers read their environment at import, so they are imported
+        # by the caller once the resources exist.
+        self.queue_url = queue_url
+        self.execution_prefix = state_machine_arn.replace(":stateMachine:", ":execution:")
+        self.batch_size = batch_size
+        self.handlers = handlers
+        self.workflow = workflow
+        self.sqs = boto3.client("sqs")
+        self.sfn = boto3.client("stepfunctions")
+        self.durations = Recorder()
+        self.latencies = {}
+        self.posted = {}
+        self.outcomes = {"SUCCESS": 0, "FAILED": 0, "NOT_STARTED": 0, "EXECUTION_FAILED": 0}
+        self._lock = threading.Lock()
+
+    def invoke(self, name, event):
+        started = time.perf_counter()
+        result = self.handlers[name].handler(event, None)
+        self.durations.add(name, (time.perf_counter() - started) * 1000)
+        return result
+
+    def post_order(self, n):
+        order = {"name": f"order-{n}", "quantity": n % 7 + 1, "restaurantId": f"restaurant-{n % 13}"}
+        self.posted[order["name"]] = time.perf_counter()
+        self.invoke("sendSQSMessage", {"arguments": {"input": order}})
+
+    def run_workflow(self, execution_input, name):
+        execution = self.workflow.execute(execution_input, name)
+        for state in execution.states:
+            if state.type == "Task":
+                self.durations.add(f'state {state.name}', state.duration_ms)
+        if execution.status != "SUCCEEDED":
+            return "EXECUTION_FAILED"
+        return "SUCCESS" if execution.states[-1].name == "CompleteOrder" else "FAILED"
+
+    def finish(self, name, outcome):
+        with self._lock:
+            self.outcomes[outcome] += 1
+            self.latencies[name] = (time.perf_counter() - self.posted[name]) * 1000
+
+    def consume(self, expected, deadline):
+        from orders_common import codec
+        while sum(self.outcomes.values()) < expected and time.perf_counter() < deadline:
+            messages = self.sqs.receive_message(QueueUrl=self.queue_url,
+                MaxNumberOfMessages=self.batch_size).get("Messages", [])
+            if not messages:
+                time.sleep(0.005)
+                continue
+            records = [{"messageId": m["MessageId"], "receiptHandle": m["ReceiptHandle"], "body": m["Body"]}
+                for m in messages]
+            failed = {item["itemIdentifier"] for item in self.invoke("post_order", {"Records": records})["batchItemFailures"]}
+            for record in records:
+                name = codec.loads(record["body"])["input"]["name"]
+                if record["messageId"] in failed:
+                    self.finish(name, "NOT_STARTED")
+                    continue
+                execution = self.sfn.describe_execution(executionArn=f'{self.execution_prefix}:{record["messageId"]}')
+                self.finish(name, self.run_workflow(codec.loads(execution["input"]), record["messageId"]))
+            self.sqs.delete_message_batch(QueueUrl=self.queue_url, Entries=[
+                {"Id": str(index), "ReceiptHandle": record["receiptHandle"]} for index, record in enumerate(records)])
+
+
+def report(pipeline, aws_calls, orders, elapsed, output):
+    latencies = list(pipeline.latencies.values())
+    done = len(latencies)
+    print(f"orders: {done}/{orders} in {elapsed:.2f}s -> {done / elapsed:.1f} orders/s")
+    print("outcomes: " + ", ".join(f"{key} {value}" for key, value in pipeline.outcomes.items()))
+    if latencies:
+        print(f"end-to-end ms: p50 {percentile(latencies, 0.5):.1f}  p90 {percentile(latencies, 0.9):.1f}  "
+              f"p99 {percentile(latencies, 0.99):.1f}  max {max(latencies):.1f}")
+    print(f"handler output: {output.lines} lines, {output.bytes / max(done, 1):.0f} bytes/order")
+
+    print(f"\n{'handler':<28} {'calls':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, samples in sorted(pipeline.durations.samples.items()):
+        print(f"{name:<28} {len(samples):>7} {percentile(samples, 0.5):>8.2f} {percentile(samples, 0.99):>8.2f}")
+
+    print(f"\n{'AWS call':<32} {'calls':>7} {'per order':>10} {'mean ms':>8} {'p99 ms':>8}")
+    for (service, operation), samples in sorted(aws_calls.samples.items()):
+        print(f"{service + '.' + operation:<32} {len(samples):>7} {len(samples) / max(done, 1):>10.2f} "
+              f"{statistics.mean(samples):>8.2f} {percentile(samples, 0.99):>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--producers", type=int, default=8, help="concurrent postOrder callers")
+    parser.add_argument("--consumers", type=int, default=4, help="concurrent post_order pollers")
+    parser.add_argument("--batch-size", type=int, default=5, help="SQS messages per post_order invocation")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    with mock_aws():
+        queue_url, state_machine_arn = create_resources()
+        handlers = {name: __import__(name) for name in ("sendSQSMessage", "post_order")}
+        workflow = local_workflow()
+        aws_calls = Recorder()
+        count_aws_calls(aws_calls)
+        pipeline = Pipeline(queue_url, state_machine_arn, args.batch_size, handlers, workflow)
+
+        output = OutputSink()
+        started = time.perf_counter()
+        deadline = started + args.timeout
+        with contextlib.redirect_stdout(output), \
+                ThreadPoolExecutor(max_workers=args.producers + args.consumers) as executor:
+            consumers = [executor.submit(pipeline.consume, args.orders, deadline) for _ in range(args.consumers)]
+            list(executor.map(pipeline.post_order, range(args.orders)))
+            for consumer in consumers:
+                consumer.result()
+        elapsed = time.perf_counter() - started
+
+    report(pipeline, aws_calls, args.orders, elapsed, output)
+
+
+if __name__ == "__main__":
+    main()
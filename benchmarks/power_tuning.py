@@ -0,0 +1,339 @@
+"""Memory and architecture right-sizing of every handler from replayed events.
+
+Each handler runs in a fresh interpreter against moto's in-process AWS,
+replaying its recorded events (benchmarks/events/recorded_events.jsonl,
+one {"handler": ..., "event": ...} per line). The replay records the
+handler's CPU time per invocation, the number of AWS calls it made and
+the peak RSS of the process.
+
+Lambda gives a function CPU in proportion to its memory, one full vCPU at
+1769 MB, so the duration of every configuration is estimated as
+
+    handler CPU / vCPU share  +  AWS calls * --call-latency-ms
+
+CPU spent inside AWS calls (serialization, moto, parsing) is left out of
+the handler CPU and covered by the per-call latency instead. Only this
+host's architecture is measured; the other one's CPU time is scaled by
+--arm64-cpu-ratio, arm64 CPU time over x86_64 CPU time for the same
+replay. Without a measured ratio, ARM64_CPU_RATIO_BOUND is used: a
+pessimistic one, so arm64 is only recommended where it wins even that
+much slower. The "arm64 to" column is the ratio up to which it still
+would, to check against a measurement.
+
+With --deployed, both architectures are measured instead: the variants
+of a `cdk deploy -c powerTuning=true` stack are invoked with the recorded
+events (in a tuning deployment: they write to its table) and their
+Duration and Max Memory Used are read from the REPORT log line.
+
+The recommendation for a function is the fastest configuration that fits
+its memory footprint with --headroom and costs within --cost-tolerance of
+the cheapest one. A bigger configuration must also save at least
+--min-gain-ms per invocation: Lambda bills whole milliseconds, so
+sub-millisecond differences are noise in the estimate, not savings.
+
+--write merges the recommendations into lambdas_data_source/profiles.json,
+which the stack reads, keeping the entries of functions without recorded
+events, and records the inputs used under "_inputs".
+
+    python benchmarks/power_tuning.py --repeat 50 --write
+    python benchmarks/power_tuning.py --deployed --repeat 10 --write
+"""
+import argparse
+import base64
+import contextlib
+import copy
+import datetime
+import json
+import math
+import os
+import platform
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVENTS = os.path.join(ROOT, "benchmarks", "events", "recorded_events.jsonl")
+
+FULL_VCPU_MB = 1769
+# us-east-1 on-demand prices.
+GB_SECOND_PRICE = {"x86_64": 0.0000166667, "arm64": 0.0000133334}
+REQUEST_PRICE = 0.0000002
+SEEDED_ORDERS = 100
+# arm64 CPU time over x86_64 assumed without a measurement: pessimistic, as
+# Graviton2 is not reported slower than that on single-threaded Python.
+ARM64_CPU_RATIO_BOUND = 1.5
+REPORT_PATTERN = re.compile(r"\bDuration: ([\d.]+) ms.*Max Memory Used: (\d+) MB")
+
+
+def load_events(path):
+    events = {}
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                events.setdefault(record["handler"], []).append(record["event"])
+    return events
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def replay(module_name, events, repeat):
+    """Run in the child: replay `events` against `module_name` and print the samples."""
+    sys.path[:0] = [os.path.join(ROOT, "benchmarks"), os.path.join(ROOT, "lambdas"),
+                    os.path.join(ROOT, "layer", "python")]
+    for name, value in (("AWS_DEFAULT_REGION", "us-east-1"), ("AWS_ACCESS_KEY_ID", "testing"),
+                        ("AWS_SECRET_ACCESS_KEY", "testing")):
+        os.environ.setdefault(name, value)
+
+    import boto3  # noqa: F401
+    # What a deployed handler also loads: the interpreter and the SDK.
+    sdk_rss = peak_rss_mb()
+
+    from moto import mock_aws
+    from load_test import create_resources, TABLE_NAME
+    from orders_common import clients
+
+    calls = {"count": 0, "cpu": 0.0}
+
+    def start(context, **kwargs):
+        context["power_tuning_started"] = time.thread_time()
+
+    def finish(context, **kwargs):
+        started = context.pop("power_tuning_started", None)
+        if started is not None:
+            calls["count"] += 1
+            calls["cpu"] += time.thread_time() - started
+
+    with mock_aws():
+        create_resources()
+        dynamodb = boto3.client("dynamodb")
+        for n in range(SEEDED_ORDERS):
+            dynamodb.put_item(TableName=TABLE_NAME, Item={
+                "user_id": {"S": "demo_user"}, "id": {"S": f"order-{n}"}, "name": {"S": f"order {n}"},
+                "quantity": {"N": str(n % 7 + 1)}, "restaurantId": {"S": f"restaurant-{n % 13}"},
+                "orderStatus": {"S": "PENDING"}, "createdAt": {"S": "2023-01-01T12:00:00"},
+                "statusCreatedAt": {"S": "PENDING#2023-01-01T12:00:00"}})
+        for service in ("dynamodb", "s3", "sns", "sqs", "stepfunctions"):
+            events_ = clients.client(service).meta.events
+            events_.register("before-parameter-build", start)
+            events_.register("after-call", finish)
+            events_.register("after-call-error", finish)
+        ready_rss = peak_rss_mb()
+
+        samples = []
+        errors = 0
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            handler = __import__(module_name).handler
+            for _ in range(repeat):
+                for event in events:
+                    event = copy.deepcopy(event)
+                    cpu, call_count, call_cpu = time.process_time(), calls["count"], calls["cpu"]
+                    try:
+                        handler(event, None)
+                    except Exception:
+                        errors += 1
+                    samples.append({
+                        "cpu_ms": (time.process_time() - cpu - (calls["cpu"] - call_cpu)) * 1000,
+                        "calls": calls["count"] - call_count,
+                    })
+
+    print(json.dumps({
+        "cpu_ms": statistics.median(sample["cpu_ms"] for sample in samples),
+        "calls": statistics.mean(sample["calls"] for sample in samples),
+        "errors": errors,
+        "peak_rss_mb": peak_rss_mb(),
+        # The in-process AWS stand-in is not part of a deployed footprint.
+        "footprint_mb": sdk_rss + max(0.0, peak_rss_mb() - ready_rss),
+    }))
+
+
+def measure(module_name, events_path, repeat):
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--replay", module_name,
+                             "--events", events_path, "--repeat", str(repeat)],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def measure_deployed(function_name, events, repeat, architectures, memory_sizes):
+    """Median Duration of every tuning variant of `function_name`, invoked with `events`."""
+    import boto3
+
+    lambda_client = boto3.client("lambda")
+    durations, max_memory_mb, errors = {}, 0, 0
+    for architecture in architectures:
+        for memory_size in memory_sizes:
+            variant = f'{function_name}-{architecture}-{memory_size}'
+            samples = []
+            # The first invocation initializes the variant: left out.
+            for n, event in enumerate([events[0]] + events * repeat):
+                response = lambda_client.invoke(FunctionName=variant, Payload=json.dumps(event).encode(),
+                                                LogType="Tail")
+                errors += n > 0 and "FunctionError" in response
+                report = REPORT_PATTERN.search(base64.b64decode(response["LogResult"]).decode())
+                if n > 0 and report:
+                    samples.append(float(report.group(1)))
+                    max_memory_mb = max(max_memory_mb, int(report.group(2)))
+            durations[(architecture, memory_size)] = statistics.median(samples)
+    return {"cpu_ms": None, "calls": None, "errors": errors, "peak_rss_mb": max_memory_mb,
+            "footprint_mb": max_memory_mb, "durations": durations}
+
+
+def host_architecture():
+    return "arm64" if platform.machine() in ("aarch64", "arm64") else "x86_64"
+
+
+def arm64_cpu_ratio(args):
+    return ARM64_CPU_RATIO_BOUND if args.arm64_cpu_ratio is None else args.arm64_cpu_ratio
+
+
+def estimate(measured, architecture, memory_size, args):
+    if "durations" in measured:
+        duration_ms = measured["durations"][(architecture, memory_size)]
+    else:
+        cpu_ms = measured["cpu_ms"]
+        if architecture != host_architecture():
+            ratio = arm64_cpu_ratio(args)
+            cpu_ms = cpu_ms * ratio if architecture == "arm64" else cpu_ms / ratio
+        duration_ms = cpu_ms / min(1.0, memory_size / FULL_VCPU_MB) + measured["calls"] * args.call_latency_ms
+    # Billed per started millisecond.
+    cost = math.ceil(duration_ms) / 1000 * memory_size / 1024 * GB_SECOND_PRICE[architecture] + REQUEST_PRICE
+    return {"architecture": architecture, "memory_size": memory_size,
+            "duration_ms": duration_ms, "cost_per_million": cost * 1_000_000}
+
+
+def recommend(measured, current, args):
+    floor_mb = measured["footprint_mb"] * args.headroom
+    options = [estimate(measured, architecture, memory_size, args)
+               for architecture in args.architectures for memory_size in args.memory_sizes]
+    fitting = [option for option in options if option["memory_size"] >= floor_mb] or \
+        [max(options, key=lambda option: option["memory_size"])]
+    cheapest = min(option["cost_per_million"] for option in fitting)
+    acceptable = [option for option in fitting
+                  if option["cost_per_million"] <= cheapest * (1 + args.cost_tolerance)]
+    fastest = min(option["duration_ms"] for option in acceptable)
+    # Anything within --min-gain-ms of the fastest is as good: take the smallest.
+    best = min((option for option in acceptable if option["duration_ms"] <= fastest + args.min_gain_ms),
+               key=lambda option: (option["memory_size"], option["cost_per_million"]))
+    current_estimate = None
+    # Deployed variants cover the tuning memory sizes only.
+    if current.architecture in args.architectures and (
+            "durations" not in measured or (current.architecture, current.memory_size) in measured["durations"]):
+        current_estimate = estimate(measured, current.architecture, current.memory_size, args)
+    return best, current_estimate, options
+
+
+def arm64_break_even(measured, current, args, limit=3.0, step=0.05):
+    """The largest arm64 CPU ratio, up to `limit`, at which arm64 is still recommended, or None."""
+    ratio = None
+    for n in range(int(round(limit / step))):
+        trial = argparse.Namespace(**dict(vars(args), arm64_cpu_ratio=(n + 1) * step))
+        if recommend(measured, current, trial)[0]["architecture"] == "arm64":
+            ratio = trial.arm64_cpu_ratio
+        elif ratio is not None:
+            break
+    return ratio
+
+
+def merge_profiles(existing, recommendations, inputs):
+    """`existing` profiles updated with `recommendations`, and the inputs that produced them."""
+    profiles = {key: value for key, value in existing.items() if not key.startswith("_")}
+    profiles.update(recommendations)
+    profiles["_inputs"] = inputs
+    return profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", default=EVENTS, help="recorded events, JSON lines")
+    parser.add_argument("--repeat", type=int, default=20, help="replays of each handler's events")
+    parser.add_argument("--memory-sizes", type=lambda value: [int(size) for size in value.split(",")],
+                        default=[128, 256, 512, 1024, 1769, 3008])
+    parser.add_argument("--architectures", type=lambda value: value.split(","), default=["x86_64", "arm64"])
+    parser.add_argument("--arm64-cpu-ratio", type=float, default=None,
+                        help=f"measured arm64 CPU time relative to x86_64, default {ARM64_CPU_RATIO_BOUND} (a bound)")
+    parser.add_argument("--deployed", action="store_true",
+                        help="measure the variants of a powerTuning=true deployment instead of estimating")
+    parser.add_argument("--call-latency-ms", type=float, default=5.0, help="in-region round-trip per AWS call")
+    parser.add_argument("--headroom", type=float, default=1.5, help="memory over the measured footprint")
+    parser.add_argument("--cost-tolerance", type=float, default=0.05,
+                        help="extra cost accepted over the cheapest configuration for speed, as a fraction")
+    parser.add_argument("--min-gain-ms", type=float, default=1.0,
+                        help="time per invocation a bigger configuration must save to be chosen")
+    parser.add_argument("--write", action="store_true", help="write the recommendations to profiles.json")
+    parser.add_argument("--verbose", action="store_true", help="print every configuration")
+    parser.add_argument("--replay", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    events = load_events(args.events)
+    if args.replay:
+        replay(args.replay, events[args.replay], args.repeat)
+        return
+
+    sys.path.insert(0, ROOT)
+    from lambdas_data_source import functions
+
+    print(f"{'function':<30} {'cpu ms':>7} {'calls':>6} {'rss MB':>7} {'footprint':>9}  "
+          f"{'current':<14} {'ms':>7} {'$/1M':>7}  {'recommended':<14} {'ms':>7} {'$/1M':>7}  {'arm64 to':>8}")
+    recommendations = {}
+    for construct_id, spec in functions.FUNCTIONS.items():
+        module_name = os.path.splitext(os.path.basename(spec.handler_path))[0]
+        if module_name not in events:
+            print(f"{construct_id:<30} no recorded events for {module_name}")
+            continue
+        if args.deployed:
+            measured = measure_deployed(spec.function_name, events[module_name], args.repeat,
+                                        args.architectures, args.memory_sizes)
+            cpu_cells, break_even = f"{'-':>7} {'-':>6}", f"{'-':>8}"
+        else:
+            measured = measure(module_name, args.events, args.repeat)
+            cpu_cells = f"{measured['cpu_ms']:>7.2f} {measured['calls']:>6.1f}"
+            break_even = arm64_break_even(measured, spec.profile, args) if "arm64" in args.architectures else None
+            break_even = f"{break_even:>8.2f}" if break_even else f"{'-':>8}"
+        best, current, options = recommend(measured, spec.profile, args)
+        # The current profile can't be estimated when its architecture isn't evaluated.
+        current_cells = (f"{current['duration_ms']:>7.1f} {current['cost_per_million']:>7.2f}" if current
+                         else f"{'-':>7} {'-':>7}")
+        print(f"{construct_id:<30} {cpu_cells} "
+              f"{measured['peak_rss_mb']:>7.1f} {measured['footprint_mb']:>9.1f}  "
+              f"{spec.profile.architecture + '/' + str(spec.profile.memory_size):<14} "
+              f"{current_cells}  "
+              f"{best['architecture'] + '/' + str(best['memory_size']):<14} "
+              f"{best['duration_ms']:>7.1f} {best['cost_per_million']:>7.2f}  {break_even}")
+        if measured["errors"]:
+            print(f"{'':<30} {measured['errors']} replayed invocations raised")
+        if args.verbose:
+            for option in options:
+                print(f"{'':<30} {option['architecture'] + '/' + str(option['memory_size']):<14} "
+                      f"{option['duration_ms']:>7.1f} {option['cost_per_million']:>7.2f}")
+        recommendations[construct_id] = {"architecture": best["architecture"], "memory_size": best["memory_size"]}
+
+    if args.write:
+        inputs = {
+            "date": datetime.date.today().isoformat(),
+            "host": platform.machine(),
+            "events": os.path.relpath(args.events, ROOT),
+            "repeat": args.repeat,
+            "architectures": args.architectures,
+            # Measured durations, a measured arm64 CPU ratio or the bound.
+            "arm64": "deployed" if args.deployed else "measured ratio" if args.arm64_cpu_ratio else "bound",
+            "arm64_cpu_ratio": None if args.deployed else arm64_cpu_ratio(args),
+            "call_latency_ms": args.call_latency_ms,
+            "headroom": args.headroom,
+            "cost_tolerance": args.cost_tolerance,
+            "min_gain_ms": args.min_gain_ms,
+        }
+        profiles = merge_profiles(functions.load_profiles(), recommendations, inputs)
+        with open(functions.PROFILES_PATH, "w") as file:
+            json.dump(profiles, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"\nwrote {len(recommendations)} of {len(profiles) - 1} profiles to "
+              f"{os.path.relpath(functions.PROFILES_PATH, ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from aws_cdk import (
     aws_sqs as sqs,
     aws_sns as sns,
     aws_sns_subscriptions as subs,
+    aws_cognito as cognito,
 )
 import aws_cdk.aws_appsync as appsync
 from aws_cdk import aws_lambda as lambda_
@@ -19,15 +20,23 @@ import aws_cdk.aws_logs as logs
 import aws_cdk.aws_stepfunctions as stepfunctions
 from aws_cdk import aws_stepfunctions_tasks as tasks
 import json
+from cdk_accelerate.packaging import read_text
+from cdk_accelerate.environment import retention_variables
 from lambdas_data_source.post import create_data_source as create_post_ds
-from lambdas_data_source.delete import create_data_source as create_delete_ds
-from lambdas_data_source.update import create_data_source as create_update_ds
-from lambdas_data_source.getById import create_data_source as create_getById_ds
-from lambdas_data_source.getAll import create_data_source as create_getAll_ds
-from lambdas_data_source.send_sqs_message import create_data_source as create_sqsSendMessage_ds
+from lambdas_data_source.send_sqs_http import create_data_source as create_sqsSendMessageHttp_ds
+from lambdas_data_source.common_layer import create_common_layer
+from lambdas_data_source.functions import create_resolver_functions
+from lambdas_data_source.api_cache import create_api_cache
+from lambdas_data_source.archive import create_archive
+from lambdas_data_source.notify import create_notifier
 from step_function_workflow.step_function import create_step_function
 
 dirname = path.dirname(__file__)
+
+QUEUE_TYPES = ("standard", "fifo")
+# The Cognito group allowed to list a restaurant's orders, as in schema.graphql.
+RESTAURANT_STAFF_GROUP = "restaurant-staff"
+
 class CdkAccelerateStack(Stack):
 
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
@@ -71,6 +80,10 @@ class CdkAccelerateStack(Stack):
 
         # DynamoDB
 
+        # Archive expired orders to S3 from the table's stream, e.g.
+        # `cdk synth -c orderArchive=true`
+        order_archive = str(self.node.try_get_context("orderArchive") or "false").lower() in ("true", "1")
+
         cfn_table = dynamodb.CfnTable(self, "Table",
             key_schema=[dynamodb.CfnTable.KeySchemaProperty(
                 attribute_name="user_id",
@@ -89,24 +102,85 @@ class CdkAccelerateStack(Stack):
             dynamodb.CfnTable.AttributeDefinitionProperty(
                 attribute_name="id",
                 attribute_type="S"
-            )]
+            ),
+            dynamodb.CfnTable.AttributeDefinitionProperty(
+                attribute_name="restaurantId",
+                attribute_type="S"
+            ),
+            dynamodb.CfnTable.AttributeDefinitionProperty(
+                attribute_name="statusCreatedAt",
+                attribute_type="S"
+            )],
+            # Index names and keys match orders_common.indexes. The status
+            # index is partitioned by user: it has no hot status key.
+            global_secondary_indexes=[dynamodb.CfnTable.GlobalSecondaryIndexProperty(
+                index_name="user_id-statusCreatedAt-index",
+                key_schema=[dynamodb.CfnTable.KeySchemaProperty(
+                    attribute_name="user_id",
+                    key_type="HASH"
+                ),
+                dynamodb.CfnTable.KeySchemaProperty(
+                    attribute_name="statusCreatedAt",
+                    key_type="RANGE"
+                )],
+                projection=dynamodb.CfnTable.ProjectionProperty(projection_type="ALL")
+            ),
+            dynamodb.CfnTable.GlobalSecondaryIndexProperty(
+                index_name="restaurantId-statusCreatedAt-index",
+                key_schema=[dynamodb.CfnTable.KeySchemaProperty(
+                    attribute_name="restaurantId",
+                    key_type="HASH"
+                ),
+                dynamodb.CfnTable.KeySchemaProperty(
+                    attribute_name="statusCreatedAt",
+                    key_type="RANGE"
+                )],
+                projection=dynamodb.CfnTable.ProjectionProperty(projection_type="ALL")
+            )],
+            # Set on finished orders only, see orders_common.retention.
+            time_to_live_specification=dynamodb.CfnTable.TimeToLiveSpecificationProperty(
+                attribute_name="expiresAt",
+                enabled=True
+            ),
+            # Read by the order notifier and, when enabled, the archive.
+            stream_specification=dynamodb.CfnTable.StreamSpecificationProperty(
+                stream_view_type="NEW_AND_OLD_IMAGES"
+            )
         )
 
         # SQS
-        queue = sqs.CfnQueue(
-            self, "CdkAccelerateQueue",
-            visibility_timeout=300,
-            queue_name="sqs-queue"
-        )
+        # standard (default) or fifo, e.g. `cdk synth -c queueType=fifo` for a
+        # high-throughput FIFO queue keeping each user's orders in order.
+        queue_type = str(self.node.try_get_context("queueType") or "standard").lower()
+        if queue_type not in QUEUE_TYPES:
+            raise ValueError(f'unsupported queue type {queue_type}')
+        fifo = queue_type == "fifo"
+        # Receives before a message that keeps failing moves to the
+        # dead-letter queue, e.g. `cdk synth -c maxReceiveCount=5`.
+        max_receive_count = int(self.node.try_get_context("maxReceiveCount") or 3)
 
         deadLetterQueue = sqs.Queue(
             self, "CdkAccelerateDLQueue",
             visibility_timeout=Duration.minutes(10),
-            queue_name="dead-letter-queue"
+            retention_period=Duration.days(14),
+            fifo=True if fifo else None,
+            queue_name="dead-letter-queue.fifo" if fifo else "dead-letter-queue"
         )
-        
 
-        sqs.DeadLetterQueue(max_receive_count=1, queue=deadLetterQueue)
+        queue = sqs.CfnQueue(
+            self, "CdkAccelerateQueue",
+            visibility_timeout=300,
+            queue_name="sqs-queue.fifo" if fifo else "sqs-queue",
+            fifo_queue=True if fifo else None,
+            # High throughput: deduplication and throughput limits apply per
+            # message group, i.e. per user, instead of per queue.
+            deduplication_scope="messageGroup" if fifo else None,
+            fifo_throughput_limit="perMessageGroupId" if fifo else None,
+            redrive_policy={
+                "deadLetterTargetArn": deadLetterQueue.queue_arn,
+                "maxReceiveCount": max_receive_count
+            }
+        )
 
         # SNS
         cfn_topic = sns.CfnTopic(self, "MyCfnTopic",
@@ -130,6 +204,26 @@ class CdkAccelerateStack(Stack):
             topics=[cfn_topic.attr_topic_arn]
         )
 
+        # COGNITO
+
+        # Restaurant staff sign in here: ordersByRestaurant reads every
+        # user's orders, so only RESTAURANT_STAFF_GROUP may resolve it.
+        user_pool = cognito.CfnUserPool(self, "OrdersUserPool",
+            user_pool_name="orders-users"
+        )
+
+        cognito.CfnUserPoolGroup(self, "RestaurantStaffGroup",
+            user_pool_id=user_pool.ref,
+            group_name=RESTAURANT_STAFF_GROUP,
+            description="Restaurant staff, allowed to list their restaurant's orders"
+        )
+
+        cognito.CfnUserPoolClient(self, "OrdersUserPoolClient",
+            user_pool_id=user_pool.ref,
+            client_name="restaurant-dashboard",
+            generate_secret=False
+        )
+
         # APPSYNC
 
         log_config= appsync.CfnGraphQLApi.LogConfigProperty(
@@ -141,6 +235,13 @@ class CdkAccelerateStack(Stack):
         api = appsync.CfnGraphQLApi(self, "Api", 
         name="demo",
         authentication_type="API_KEY",
+        additional_authentication_providers=[appsync.CfnGraphQLApi.AdditionalAuthenticationProviderProperty(
+            authentication_type="AMAZON_COGNITO_USER_POOLS",
+            user_pool_config=appsync.CfnGraphQLApi.CognitoUserPoolConfigProperty(
+                user_pool_id=user_pool.ref,
+                aws_region=self.region
+            )
+        )],
         xray_enabled=True,
         log_config=log_config
         )
@@ -148,23 +249,78 @@ class CdkAccelerateStack(Stack):
         api.add_dependency(queue)
 
         # Setting GraphQl schema
-        data_schema = ''
-        with open(os.path.join(dirname, "../schema.graphql"), 'r') as file:
-            data_schema = file.read().replace('\n', '')
+        data_schema = read_text(os.path.join(dirname, "../schema.graphql")).replace('\n', '')
 
         schema = appsync.CfnGraphQLSchema(scope=self, id="schema", api_id=api.attr_api_id, definition=data_schema)
 
 
-        workflow = create_step_function(self, lambda_step_function_role, cfn_topic)
+        common_layer = create_common_layer(self)
+
+        # Variable groups functions ask for in the registry, see lambdas_data_source.functions.
+        environment = {
+            "table": {"ORDER_TABLE": cfn_table.table_name},
+            "retention": retention_variables(self),
+            "queue": {"QueueUrl": queue.attr_queue_url},
+            "topic": {"TOPIC_ARN": cfn_topic.attr_topic_arn},
+        }
+        roles = {
+            "db": db_role,
+            "sqs-send": sqs_sendMessage_role,
+            "sqs-receive": sqs_receiveMessage_role,
+            "step-function": lambda_step_function_role,
+        }
+
+        # STANDARD (default) or EXPRESS, e.g. `cdk synth -c stateMachineType=EXPRESS`.
+        # EXPRESS orders are run synchronously by the SQS consumer.
+        state_machine_type = str(self.node.try_get_context("stateMachineType") or "STANDARD").upper()
+
+        # lambda (default) or sdk, e.g. `cdk synth -c workflowIntegration=sdk`
+        workflow_integration = str(self.node.try_get_context("workflowIntegration") or "lambda").lower()
+
+        workflow = create_step_function(self, lambda_step_function_role, common_layer, environment, state_machine_type,
+            integration=workflow_integration, table_name=cfn_table.table_name)
+
+        if workflow_integration == "sdk":
+            # The state machine writes the order itself.
+            lambda_execution_role.add_to_policy(iam.PolicyStatement(
+                actions=["dynamodb:PutItem", "dynamodb:UpdateItem"],
+                resources=[cfn_table.attr_arn]))
 
         simple_state_machine = stepfunctions.CfnStateMachine(self, "SimpleStateMachine",
                 definition=json.loads(workflow),
-                role_arn=lambda_execution_role.role_arn
+                role_arn=lambda_execution_role.role_arn,
+                state_machine_type=state_machine_type
             )
 
-        create_delete_ds(self, api, schema, db_role, lambda_execution_role)
-        create_update_ds(self, api, schema, db_role, lambda_execution_role)
-        create_getById_ds(self, api, schema, db_role, lambda_execution_role)
-        create_getAll_ds(self, api, schema, db_role, lambda_execution_role)
-        create_sqsSendMessage_ds(self, api, schema, sqs_sendMessage_role, lambda_execution_role, queue)
-        create_post_ds(self, simple_state_machine, sqs_receiveMessage_role, queue)
\ No newline at end of file
+        # lambda (default) or http, e.g. `cdk synth -c postOrderResolver=http`
+        # to send postOrder straight from AppSync to SQS.
+        if str(self.node.try_get_context("postOrderResolver") or "lambda").lower() == "http":
+            create_sqsSendMessageHttp_ds(self, api, schema, queue)
+            excluded = ("send-sqs-event",)
+        else:
+            excluded = ()
+        # Seconds a cached order read lives, 0 for no API cache, and the cache
+        # instance type, e.g. `cdk synth -c orderCacheTtl=30 -c orderCacheType=MEDIUM`
+        order_cache_ttl = self.node.try_get_context("orderCacheTtl")
+        order_cache_ttl = 5 if order_cache_ttl is None else int(order_cache_ttl)
+        api_cache = None
+        if order_cache_ttl:
+            api_cache = create_api_cache(self, api, ttl=order_cache_ttl,
+                cache_type=str(self.node.try_get_context("orderCacheType") or "SMALL").upper())
+        # One Lambda, data source and resolver per registered resolver function.
+        create_resolver_functions(self, api, schema, roles, lambda_execution_role, common_layer, environment,
+            exclude=excluded, api_cache=api_cache)
+        # SQS consumer tuning, e.g. `cdk synth -c sqsBatchSize=10 -c sqsMaxBatchingWindow=1`
+        sqs_batch_size = int(self.node.try_get_context("sqsBatchSize") or 5)
+        sqs_max_batching_window = int(self.node.try_get_context("sqsMaxBatchingWindow") or 0)
+        if fifo and (sqs_batch_size > 10 or sqs_max_batching_window):
+            raise ValueError('FIFO queues take batches of at most 10 messages and no batching window')
+        if sqs_batch_size > 10 and not sqs_max_batching_window:
+            raise ValueError('SQS batches of more than 10 messages need a batching window, e.g. -c sqsMaxBatchingWindow=1')
+        create_post_ds(self, simple_state_machine, sqs_receiveMessage_role, queue, common_layer, environment,
+            batch_size=sqs_batch_size, max_batching_window=sqs_max_batching_window,
+            sync_execution=state_machine_type == "EXPRESS")
+        # Notifications are published from the table's stream, off the workflow.
+        create_notifier(self, cfn_table, cfn_topic, common_layer, environment)
+        if order_archive:
+            create_archive(self, cfn_table, common_layer)
\ No newline at end of file
@@ -0,0 +1,18 @@
+"""Environment variables shared by every function of the stack."""
+
+
+def logging_variables(stack):
+    """LOG_LEVEL and LOG_SAMPLE_RATE for orders_common.log, from the stack context.
+
+    e.g. `cdk synth -c logLevel=DEBUG -c logSampleRate=0.1`
+    """
+    return {
+        "LOG_LEVEL": str(stack.node.try_get_context("logLevel") or "INFO").upper(),
+        "LOG_SAMPLE_RATE": str(stack.node.try_get_context("logSampleRate") or "0.01"),
+    }
+
+
+def retention_variables(stack):
+    """ORDER_RETENTION_DAYS for orders_common.retention, e.g. `cdk synth -c orderRetentionDays=90`."""
+    return {"ORDER_RETENTION_DAYS": str(stack.node.try_get_context("orderRetentionDays") or 30)}
+
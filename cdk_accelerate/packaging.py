@@ -0,0 +1,186 @@
+"""Build the Lambda function bundles and the orders-common layer at synth time.
+
+Every bundle is copied into ``build/``, stripped of docstrings, comments and
+caches, optionally byte-compiled, and published as a CDK asset. Function
+code is no longer inlined, so it is not capped at 4 KB and the layer can
+carry third-party dependencies from ``layer/requirements.txt``.
+
+Each bundle is stamped with a hash of its inputs; a bundle whose inputs did
+not change since the last build is reused as is, so repeated synths (and
+``cdk watch``) only re-process what changed.
+"""
+import ast
+import functools
+import hashlib
+import importlib.util
+import os
+import py_compile
+import shutil
+import subprocess
+import sys
+
+from aws_cdk import aws_lambda as lambda_
+from aws_cdk import aws_s3_assets as s3_assets
+
+BUILD_DIR = "build"
+LAYER_SOURCE = "layer"
+DEFAULT_RUNTIME = "python3.9"
+DEFAULT_ARCHITECTURE = "x86_64"
+# Wheels pip may install for each Lambda architecture.
+PIP_PLATFORMS = {
+    "x86_64": "manylinux2014_x86_64",
+    "arm64": "manylinux2014_aarch64",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _read(path, mtime_ns):
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def read_bytes(path):
+    """Contents of `path`, read from disk once per process until it changes."""
+    return _read(os.path.abspath(path), os.stat(path).st_mtime_ns)
+
+
+def read_text(path):
+    return read_bytes(path).decode()
+
+
+def _fingerprint(paths, runtime, architecture=""):
+    """Hash of `paths` and everything else a bundle's content depends on."""
+    digest = hashlib.sha256()
+    # Bytecode depends on the local interpreter, stripping on this module,
+    # installed wheels on the architecture.
+    digest.update(f'{runtime} {architecture} {sys.version_info[:2]}'.encode())
+    digest.update(read_bytes(__file__))
+    for path in paths:
+        digest.update(path.replace(os.sep, "/").encode())
+        digest.update(read_bytes(path))
+    return digest.hexdigest()
+
+
+def _is_current(target, fingerprint):
+    stamp = f'{target}.sha256'
+    if os.path.isdir(target) and os.path.exists(stamp):
+        with open(stamp, 'r') as file:
+            return file.read() == fingerprint
+    return False
+
+
+def _stamp(target, fingerprint):
+    with open(f'{target}.sha256', 'w') as file:
+        file.write(fingerprint)
+
+
+class _DocstringStripper(ast.NodeTransformer):
+
+    def _strip(self, node):
+        self.generic_visit(node)
+        body = node.body
+        if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+                and isinstance(body[0].value.value, str):
+            node.body = body[1:] or [ast.Pass()]
+        return node
+
+    visit_Module = visit_ClassDef = visit_FunctionDef = visit_AsyncFunctionDef = _strip
+
+
+def strip_source(source):
+    """Return `source` without docstrings and comments."""
+    tree = _DocstringStripper().visit(ast.parse(source))
+    return ast.unparse(ast.fix_missing_locations(tree)) + "\n"
+
+
+def _runtime_matches(runtime):
+    return runtime == f'python{sys.version_info.major}.{sys.version_info.minor}'
+
+
+def _finalize(directory, runtime, strip_sources=True):
+    """Strip every module under `directory` and byte-compile it when possible.
+
+    Third-party packages are finalized with strip_sources=False: only their
+    caches are dropped, their sources are shipped as installed.
+
+    Bytecode is only valid for the interpreter version that wrote it, so it
+    is produced only when synth runs on the function runtime's version. The
+    .pyc files use unchecked hashes: zip timestamps cannot invalidate them.
+    """
+    compile_bytecode = _runtime_matches(runtime)
+    for root, dirs, files in os.walk(directory):
+        for name in [d for d in dirs if d == "__pycache__" or (strip_sources and d == "tests")]:
+            shutil.rmtree(os.path.join(root, name))
+            dirs.remove(name)
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith((".pyc", ".pyi")):
+                os.remove(path)
+            elif name.endswith(".py"):
+                if strip_sources:
+                    with open(path, 'r') as file:
+                        source = file.read()
+                    with open(path, 'w') as file:
+                        file.write(strip_source(source))
+                if compile_bytecode:
+                    py_compile.compile(path, cfile=importlib.util.cache_from_source(path), doraise=True,
+                        invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+
+
+def build_function(name, handler_path, runtime=DEFAULT_RUNTIME):
+    """Package a single handler module as index.py under build/functions/<name>."""
+    target = os.path.join(BUILD_DIR, "functions", name)
+    fingerprint = _fingerprint([handler_path], runtime)
+    if _is_current(target, fingerprint):
+        return target
+    shutil.rmtree(target, ignore_errors=True)
+    os.makedirs(target)
+    shutil.copyfile(handler_path, os.path.join(target, "index.py"))
+    _finalize(target, runtime)
+    _stamp(target, fingerprint)
+    return target
+
+
+def build_layer(runtime=DEFAULT_RUNTIME, architecture=DEFAULT_ARCHITECTURE):
+    """Package layer/python, plus layer/requirements.txt if present, under build/layer/<architecture>.
+
+    Compiled dependencies are only importable on the architecture their
+    wheels were built for, so every architecture gets its own bundle.
+    """
+    if architecture not in PIP_PLATFORMS:
+        raise ValueError(f'unsupported architecture {architecture}')
+    target = os.path.join(BUILD_DIR, "layer", architecture)
+    requirements = os.path.join(LAYER_SOURCE, "requirements.txt")
+    sources = sorted(os.path.join(root, name) for root, dirs, files in os.walk(os.path.join(LAYER_SOURCE, "python"))
+        if "__pycache__" not in root for name in files if not name.endswith(".pyc"))
+    fingerprint = _fingerprint(sources + ([requirements] if os.path.exists(requirements) else []), runtime,
+        architecture)
+    if _is_current(target, fingerprint):
+        return target
+    shutil.rmtree(target, ignore_errors=True)
+    shutil.copytree(os.path.join(LAYER_SOURCE, "python"), os.path.join(target, "python"),
+        ignore=shutil.ignore_patterns("__pycache__"))
+    _finalize(target, runtime)
+
+    if os.path.exists(requirements):
+        subprocess.run([sys.executable, "-m", "pip", "install", "--quiet", "--requirement", requirements,
+            "--target", os.path.join(target, "python"), "--only-binary=:all:",
+            "--platform", PIP_PLATFORMS[architecture], "--implementation", "cp",
+            "--python-version", runtime.replace("python", "")], check=True)
+        _finalize(target, runtime, strip_sources=False)
+    _stamp(target, fingerprint)
+    return target
+
+
+def function_asset(stack, name, handler_path, runtime=DEFAULT_RUNTIME):
+    """The S3 asset holding the bundle of the handler at `handler_path`."""
+    return s3_assets.Asset(stack, f'{name}-code', path=build_function(name, handler_path, runtime))
+
+
+def function_code(stack, name, handler_path, runtime=DEFAULT_RUNTIME, asset=None):
+    """Asset-backed CfnFunction code for the handler at `handler_path`."""
+    asset = asset or function_asset(stack, name, handler_path, runtime)
+    return lambda_.CfnFunction.CodeProperty(
+        s3_bucket=asset.s3_bucket_name,
+        s3_key=asset.s3_object_key
+    )
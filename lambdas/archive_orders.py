@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+import gzip
+import os
+from orders_common import clients
+from orders_common import codec
+from orders_common import log
+from orders_common import metrics
+from orders_common.deserialize import deserialize_item
+
+ARCHIVE_BUCKET = os.environ.get("ARCHIVE_BUCKET")
+ARCHIVE_PREFIX = os.environ.get("ARCHIVE_PREFIX", "expired-orders/")
+
+logger = log.get_logger(__name__)
+
+def is_expiry(record):
+    # Deletions made by DynamoDB's time to live, not by the API.
+    identity = record.get("userIdentity") or {}
+    return record["eventName"] == "REMOVE" and identity.get("type") == "Service" \
+        and identity.get("principalId") == "dynamodb.amazonaws.com"
+
+def archive_key(records):
+    '''
+    Object key of a batch: its day and its first and last sequence numbers,
+    so a retried batch overwrites its own object instead of adding another.
+    '''
+    first, last = records[0]["dynamodb"], records[-1]["dynamodb"]
+    day = datetime.fromtimestamp(first["ApproximateCreationDateTime"], timezone.utc)
+    return f'{ARCHIVE_PREFIX}{day:%Y/%m/%d}/{first["SequenceNumber"]}-{last["SequenceNumber"]}.ndjson.gz'
+
+def to_archive(orders):
+    """Gzip-compressed newline-delimited JSON; mtime=0 keeps retries byte-identical."""
+    return gzip.compress("".join(codec.dumps(order) + "\n" for order in orders).encode(), mtime=0)
+
+@metrics.instrument
+@log.log_invocation
+def handler(event, context):
+    records = [record for record in event["Records"] if is_expiry(record)]
+    if not records:
+        return {"archived": 0}
+    orders = [deserialize_item(record["dynamodb"]["OldImage"]) for record in records]
+    key = archive_key(records)
+    body = to_archive(orders)
+    clients.client("s3").put_object(Bucket=ARCHIVE_BUCKET, Key=key, Body=body,
+        ContentType="application/gzip")
+    metrics.put_metric("ArchivedOrders", len(orders))
+    logger.info("expired orders archived", orders=len(orders), key=key, object_bytes=len(body))
+    return {"archived": len(orders)}
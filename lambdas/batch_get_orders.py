@@ -0,0 +1,68 @@
+import os
+from orders_common import clients
+from orders_common import identity
+from orders_common import log
+from orders_common import metrics
+from orders_common.deserialize import ORDER_TYPE_FIELDS, deserialize_items, projection
+from orders_common.retry import MAX_ATTEMPTS, backoff
+
+TABLE_NAME = os.environ.get("ORDER_TABLE")
+BATCH_GET_LIMIT = 100
+
+PROJECTION_EXPRESSION, PROJECTION_NAMES = projection(ORDER_TYPE_FIELDS)
+
+def batch_get(dynamo_client, table_name, keys):
+    '''
+    Fetch `keys` with BatchGetItem, retrying UnprocessedKeys with backoff.
+
+    Keys are sent in chunks of 100, the BatchGetItem limit. Returns the
+    low-level items in no particular order.
+    '''
+    items = []
+    for start in range(0, len(keys), BATCH_GET_LIMIT):
+        request = {table_name: {
+            "Keys": keys[start:start + BATCH_GET_LIMIT],
+            "ProjectionExpression": PROJECTION_EXPRESSION,
+            "ExpressionAttributeNames": PROJECTION_NAMES
+        }}
+        attempt = 0
+        while request:
+            response = dynamo_client.batch_get_item(RequestItems=request)
+            items.extend(response['Responses'].get(table_name, []))
+            request = response.get('UnprocessedKeys')
+            if request:
+                attempt += 1
+                if attempt >= MAX_ATTEMPTS:
+                    raise RuntimeError(f'batch_get gave up on {len(request[table_name]["Keys"])} unprocessed keys')
+                backoff(attempt)
+    return items
+
+def get_orders_by_ids(dynamo_client, table_name, user_id, id_lists):
+    '''
+    Resolve several lists of order ids with one set of BatchGetItem calls.
+
+    Each result list follows the order of its requested ids, with None for
+    ids that do not exist.
+    '''
+    unique_ids = list(dict.fromkeys(order_id for ids in id_lists for order_id in ids))
+    keys = [{"user_id": {"S": user_id}, "id": {"S": order_id}} for order_id in unique_ids]
+    orders = {order["id"]: order for order in deserialize_items(batch_get(dynamo_client, table_name, keys))}
+    return [[orders.get(order_id) for order_id in ids] for ids in id_lists]
+
+
+@metrics.instrument
+@log.log_invocation
+def handler(event, context):
+    # With the BatchInvoke operation AppSync sends a list of resolver
+    # contexts and expects one result per context, in the same order.
+    events = event if isinstance(event, list) else [event]
+    # A batch can hold the contexts of several callers: each user's ids are
+    # read from their own partition.
+    users = [identity.user_id(e) for e in events]
+    results = [None] * len(events)
+    for user_id in dict.fromkeys(users):
+        positions = [position for position, user in enumerate(users) if user == user_id]
+        id_lists = [events[position]['arguments']['ids'] for position in positions]
+        for position, result in zip(positions, get_orders_by_ids(clients.client("dynamodb"), TABLE_NAME, user_id, id_lists)):
+            results[position] = result
+    return results if isinstance(event, list) else results[0]
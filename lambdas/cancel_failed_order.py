@@ -1,59 +1,45 @@
-from datetime import datetime
-import boto3
-import uuid
 import os
-import json
-import decimal
+from orders_common import clients
+from orders_common import log
+from orders_common import metrics
+from orders_common import retention
+from orders_common.indexes import status_created_at
 
 TABLE_NAME = os.environ.get("ORDER_TABLE")
-TOPIC_ARN = os.environ.get("TOPIC_ARN")
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(TABLE_NAME)
-sns = boto3.client("sns")
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, decimal.Decimal):
-            return str(o)
-        return super(DecimalEncoder, self).default(o)
+logger = log.get_logger(__name__)
 
 def update_order(order_status, error_message, event):
-    response = table.update_item(
+    response = clients.client("dynamodb").update_item(
+        TableName=TABLE_NAME,
         Key={
-            "user_id": event["saveResults"]["user_id"],
-            "id": event["saveResults"]["id"]
+            "user_id": {"S": event["saveResults"]["user_id"]},
+            "id": {"S": event["saveResults"]["id"]}
             },
-        UpdateExpression="set orderStatus = :s, errorMessage = :m",
+        UpdateExpression="set orderStatus = :s, statusCreatedAt = :k, errorMessage = :m, expiresAt = :e",
         ExpressionAttributeValues={
-            ":s": order_status,
-            ":m": error_message
+            ":s": {"S": order_status},
+            ":k": {"S": status_created_at(order_status, event["saveResults"]["createdAt"])},
+            ":e": {"N": str(retention.expires_at())},
+            ":m": {"S": error_message}
             },
         ReturnValues="UPDATED_NEW"
     )
-    
-    message = {"order_status": order_status, "order_id": event["saveResults"]["id"], "cancel_reason": error_message}
-    send_order_notification(message)
-    print(f'Order canceled sent {message}')
+
+    # Subscribers are notified from the table's stream, see notify_orders.
+    logger.info("order canceled", order_id=event["saveResults"]["id"], cancel_reason=error_message)
     
     return {
         "statusCode": 200,
-        "body": "Order canceled and notification sent"
+        "body": "Order canceled"
     }
 
-def send_order_notification(message):
-    topic_arn = TOPIC_ARN
-    response = sns.publish(
-        TopicArn=topic_arn,
-        Message=json.dumps(message),
-        Subject='Orders-App: order notification'
-    ) 
-
+@metrics.instrument
+@log.log_invocation
 def handler(event, context):
-    print(f'event: {event}')
     order_status = "FAILED"
     error_message = event["paymentResult"]["error_message"]
     response = update_order(order_status, error_message, event)
-    print(f'update_order.response: {response}')
     return response
 
 
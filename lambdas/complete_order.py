@@ -1,62 +1,40 @@
-import boto3
 import os
-import decimal
-import json
+from orders_common import clients
+from orders_common import log
+from orders_common import metrics
+from orders_common import retention
+from orders_common.indexes import status_created_at
 
 TABLE_NAME = os.environ.get("ORDER_TABLE")
-TOPIC_ARN = os.environ.get("TOPIC_ARN")
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(TABLE_NAME)
-sns = boto3.client("sns")
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, decimal.Decimal):
-            return str(o)
-        return super(DecimalEncoder, self).default(o)
+logger = log.get_logger(__name__)
 
 def update_order(order_status, event):
 
-    response = table.update_item(
+    response = clients.client("dynamodb").update_item(
+        TableName=TABLE_NAME,
         Key={
-            "user_id": event["saveResults"]["user_id"],
-            "id": event["saveResults"]["id"]
+            "user_id": {"S": event["saveResults"]["user_id"]},
+            "id": {"S": event["saveResults"]["id"]}
             },
-        UpdateExpression="set orderStatus = :s",
+        UpdateExpression="set orderStatus = :s, statusCreatedAt = :k, expiresAt = :e",
         ExpressionAttributeValues={
-            ":s": order_status
+            ":s": {"S": order_status},
+            ":k": {"S": status_created_at(order_status, event["saveResults"]["createdAt"])},
+            ":e": {"N": str(retention.expires_at())}
             },
         ReturnValues="UPDATED_NEW"
     )
-    message = {"order_status": order_status, "order_id": event["saveResults"]["id"]}
-    send_order_notification(message)
-    print(f'Order success sent {message}')
+    # Subscribers are notified from the table's stream, see notify_orders.
+    logger.info("order completed", order_id=event["saveResults"]["id"])
     return {
         "statusCode": 200,
-        "body": "Order created and notification sent"
+        "body": "Order completed"
     }
 
-def send_order_notification(message):
-    '''
-    Expects message (type dict) with order_status and order_id values from
-    the invoking event.
-
-    {"order_status": SUCCESS, "order_id": b4d27a00-1a73-4089-94f8-87e273b57067}
-
-    Make sns.publish() call using the 'sns' client defined globally.  SNS Topic
-    retrieved from Lambda Environment Variable TOPIC_ARN
-    '''
-    topic_arn = TOPIC_ARN
-    response = sns.publish(
-        TopicArn=topic_arn,
-        Message=json.dumps(message),
-        Subject=f'Orders-App: Update for order {message["order_id"]}'
-        # Subject='Orders-App: SAM Accelerate for the win!'
-    )
-
+@metrics.instrument
+@log.log_invocation
 def handler(event, context):
-    print(f'event: {event}')
     order_status = "SUCCESS"
     response = update_order(order_status, event)
-    print(f'update_order response: {response}')
     return response
\ No newline at end of file
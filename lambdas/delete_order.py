@@ -1,30 +1,28 @@
-import boto3
 import os
-import json
-import decimal
-from typing import Dict, Any
+from orders_common import clients
+from orders_common import identity
+from orders_common import log
+from orders_common import metrics
 
 TABLE_NAME = os.environ.get("ORDER_TABLE")
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(TABLE_NAME)
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, decimal.Decimal):
-            return str(o)
-        return super(DecimalEncoder, self).default(o)
+logger = log.get_logger(__name__)
 
 def delete_order(event):
     order_id = event['arguments']['id']
-    response = table.delete_item(
+    user_id = identity.user_id(event)
+    response = clients.client("dynamodb").delete_item(
+        TableName=TABLE_NAME,
         Key={
-            'id': order_id,
-            'user_id': 'demo_user'
+            'id': {'S': order_id},
+            'user_id': {'S': user_id}
         }
     )
-    print(f'delete_order {order_id} response: {response}')
+    logger.info("order deleted", order_id=order_id)
     return response
 
+@metrics.instrument
+@log.log_invocation
 def handler(event, context):
     """Handler function integrated with 
     Parameters
@@ -0,0 +1,41 @@
+import os
+from orders_common import clients
+from orders_common import identity
+from orders_common import log
+from orders_common import metrics
+from orders_common.retry import MAX_ATTEMPTS, backoff
+
+TABLE_NAME = os.environ.get("ORDER_TABLE")
+BATCH_WRITE_LIMIT = 25
+
+logger = log.get_logger(__name__)
+
+def batch_delete(dynamo_client, table_name, keys):
+    '''
+    Delete `keys` with BatchWriteItem, retrying UnprocessedItems with backoff.
+
+    Keys are sent in chunks of 25, the BatchWriteItem limit. Deleting a key
+    that does not exist succeeds, as with DeleteItem.
+    '''
+    for start in range(0, len(keys), BATCH_WRITE_LIMIT):
+        request = {table_name: [{"DeleteRequest": {"Key": key}} for key in keys[start:start + BATCH_WRITE_LIMIT]]}
+        attempt = 0
+        while request:
+            response = dynamo_client.batch_write_item(RequestItems=request)
+            request = response.get('UnprocessedItems')
+            if request:
+                attempt += 1
+                if attempt >= MAX_ATTEMPTS:
+                    raise RuntimeError(f'batch_delete gave up on {len(request[table_name])} unprocessed items')
+                backoff(attempt)
+
+@metrics.instrument
+@log.log_invocation
+def handler(event, context):
+    # A batch must not name the same key twice.
+    order_ids = list(dict.fromkeys(event['arguments']['ids']))
+    user_id = identity.user_id(event)
+    batch_delete(clients.client("dynamodb"), TABLE_NAME,
+        [{'user_id': {'S': user_id}, 'id': {'S': order_id}} for order_id in order_ids])
+    logger.info("orders deleted", orders=len(order_ids))
+    return order_ids
@@ -1,46 +1,36 @@
-import boto3
 import os
-import json
-from typing import Dict, Any
+from orders_common import clients
+from orders_common import identity
+from orders_common import log
+from orders_common import metrics
+from orders_common.deserialize import ORDER_TYPE_FIELDS, projection
+from orders_common.pagination import DEFAULT_PAGE_SIZE, query_page
 
-ddb_client = boto3.client("dynamodb")
 TABLE_NAME = os.environ.get("ORDER_TABLE")
 
-def process_response(data):
+# Only the attributes exposed by the Order GraphQL type are read back.
+PROJECTION_EXPRESSION, PROJECTION_NAMES = projection(ORDER_TYPE_FIELDS)
 
-    print(data)
-    data['quantity'] = data['quantity']['N']
-    data['name'] = data['name']['S']
-    data['restaurantId'] = data['restaurantId']['S']
+def fetch_orders_page(dynamo_client, table_name, user_id, limit=DEFAULT_PAGE_SIZE, next_token=None):
+    '''
+    Query a single page of orders on the user_id partition key.
 
-    return data
-
-def fetch_all_orders(dynamo_client, table_name):
-    results = []
-    last_evaluated_key = None
-    while True:
-        if last_evaluated_key:
-            response = ddb_client.scan(
-                TableName=table_name,
-                ExclusiveStartKey=last_evaluated_key
-            )
-        else:
-            response = dynamo_client.scan(TableName=table_name)
-            
-        last_evaluated_key = response.get('LastEvaluatedKey')
-        response = map(process_response, response['Items'])
-        response = list(response)
-        results.extend(response)
-
-        if not last_evaluated_key:
-            break
-    print(f'fetch_all_orders returned {results}')
-    return results
+    Returns a connection dict {"items": [...], "nextToken": str | None}; the
+    token is an opaque, url-safe encoding of DynamoDB's LastEvaluatedKey.
+    '''
+    return query_page(dynamo_client, {
+        "TableName": table_name,
+        "KeyConditionExpression": "user_id = :u",
+        "ExpressionAttributeValues": {":u": {"S": user_id}},
+        "ExpressionAttributeNames": PROJECTION_NAMES,
+        "ProjectionExpression": PROJECTION_EXPRESSION
+    }, limit=limit, next_token=next_token)
 
 
+@metrics.instrument
+@log.log_invocation
 def handler(event, context):
-    items = fetch_all_orders(ddb_client, TABLE_NAME)
-    return items
-
-
-
+    arguments = event.get('arguments') or {}
+    user_id = identity.user_id(event)
+    return fetch_orders_page(clients.client("dynamodb"), TABLE_NAME, user_id,
+        limit=arguments.get('limit'), next_token=arguments.get('nextToken'))
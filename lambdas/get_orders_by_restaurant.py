@@ -0,0 +1,46 @@
+import os
+from orders_common import clients
+from orders_common import log
+from orders_common import metrics
+from orders_common.deserialize import ORDER_TYPE_FIELDS, projection
+from orders_common.indexes import RESTAURANT_INDEX, status_created_at
+from orders_common.pagination import DEFAULT_PAGE_SIZE, query_page
+
+TABLE_NAME = os.environ.get("ORDER_TABLE")
+
+PROJECTION_EXPRESSION, PROJECTION_NAMES = projection(ORDER_TYPE_FIELDS)
+
+def fetch_orders_by_restaurant(dynamo_client, table_name, restaurant_id, order_status=None,
+        limit=DEFAULT_PAGE_SIZE, next_token=None):
+    '''
+    Query one page of a restaurant's orders, of every user, on the
+    restaurantId index. AppSync only lets restaurant staff resolve
+    ordersByRestaurant, see schema.graphql.
+
+    With `order_status` only that status is read, oldest first: a
+    begins_with range of the statusCreatedAt sort key, not a filter.
+    '''
+    key_condition = "#restaurantId = :r"
+    values = {":r": {"S": restaurant_id}}
+    names = dict(PROJECTION_NAMES)
+    if order_status:
+        key_condition += " AND begins_with(#statusCreatedAt, :p)"
+        values[":p"] = {"S": status_created_at(order_status, "")}
+        names["#statusCreatedAt"] = "statusCreatedAt"
+    return query_page(dynamo_client, {
+        "TableName": table_name,
+        "IndexName": RESTAURANT_INDEX,
+        "KeyConditionExpression": key_condition,
+        "ExpressionAttributeValues": values,
+        "ExpressionAttributeNames": names,
+        "ProjectionExpression": PROJECTION_EXPRESSION
+    }, limit=limit, next_token=next_token)
+
+
+@metrics.instrument
+@log.log_invocation
+def handler(event, context):
+    arguments = event['arguments']
+    return fetch_orders_by_restaurant(clients.client("dynamodb"), TABLE_NAME, arguments['restaurantId'],
+        order_status=arguments.get('orderStatus'), limit=arguments.get('limit'),
+        next_token=arguments.get('nextToken'))
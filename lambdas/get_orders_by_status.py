@@ -0,0 +1,36 @@
+import os
+from orders_common import clients
+from orders_common import identity
+from orders_common import log
+from orders_common import metrics
+from orders_common.deserialize import ORDER_TYPE_FIELDS, projection
+from orders_common.indexes import STATUS_INDEX, status_created_at
+from orders_common.pagination import DEFAULT_PAGE_SIZE, query_page
+
+TABLE_NAME = os.environ.get("ORDER_TABLE")
+
+PROJECTION_EXPRESSION, PROJECTION_NAMES = projection(ORDER_TYPE_FIELDS)
+
+def fetch_orders_by_status(dynamo_client, table_name, user_id, order_status, limit=DEFAULT_PAGE_SIZE,
+        next_token=None):
+    '''
+    Query one page of `user_id`'s orders in `order_status`, oldest first:
+    a begins_with range of the statusCreatedAt sort key of the user_id index.
+    '''
+    return query_page(dynamo_client, {
+        "TableName": table_name,
+        "IndexName": STATUS_INDEX,
+        "KeyConditionExpression": "user_id = :u AND begins_with(#statusCreatedAt, :p)",
+        "ExpressionAttributeValues": {":u": {"S": user_id}, ":p": {"S": status_created_at(order_status, "")}},
+        "ExpressionAttributeNames": dict(PROJECTION_NAMES, **{"#statusCreatedAt": "statusCreatedAt"}),
+        "ProjectionExpression": PROJECTION_EXPRESSION
+    }, limit=limit, next_token=next_token)
+
+
+@metrics.instrument
+@log.log_invocation
+def handler(event, context):
+    arguments = event['arguments']
+    return fetch_orders_by_status(clients.client("dynamodb"), TABLE_NAME, identity.user_id(event),
+        arguments['orderStatus'],
+        limit=arguments.get('limit'), next_token=arguments.get('nextToken'))
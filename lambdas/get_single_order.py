@@ -1,32 +1,30 @@
-import boto3
 import os
-import json
-import decimal
-from typing import Dict, Any
+from orders_common import clients
+from orders_common import identity
+from orders_common import log
+from orders_common import metrics
+from orders_common.deserialize import deserialize_item
 
 TABLE_NAME = os.environ.get("ORDER_TABLE")
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(TABLE_NAME)
-
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, decimal.Decimal):
-            return str(o)
-        return super(DecimalEncoder, self).default(o)
 
 def get_order_by_id(event):
     order_id = event['arguments']['id']
-    item = table.get_item(
+    user_id = identity.user_id(event)
+    response = clients.client("dynamodb").get_item(
+        TableName=TABLE_NAME,
         Key={
-            'id': order_id,
-            'user_id': "demo_user"
+            'id': {'S': order_id},
+            'user_id': {'S': user_id}
         }
     )
 
-    return item
+    # AppSync resolves the Order fields from the item itself, not the response.
+    item = response.get('Item')
+    return deserialize_item(item) if item else None
 
+@metrics.instrument
+@log.log_invocation
 def handler(event, context):
-    print("event context : ", event)
     item = get_order_by_id(event)
     return item
     
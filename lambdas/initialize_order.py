@@ -1,34 +1,24 @@
-from datetime import datetime
-import boto3
-import uuid
 import os
-import json
-import decimal
+from orders_common import clients
+from orders_common import log
+from orders_common import metrics
+from orders_common.serialize import serialize_item
 
 TABLE_NAME = os.environ.get("ORDER_TABLE")
-TOPIC_ARN = os.environ.get("TOPIC_ARN")
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(TABLE_NAME)
-sns = boto3.client("sns")
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, decimal.Decimal):
-            return str(o)
-        return super(DecimalEncoder, self).default(o)
+logger = log.get_logger(__name__)
 
 def persist_order(order_item):
-    print(f'persist_order item {order_item} to table {TABLE_NAME}')
-    response = table.put_item(Item=order_item)
-    message = {"order_status": order_item["orderStatus"], "order_id": order_item["id"]}
-    print(f'new order pending payment {message}')
+    response = clients.client("dynamodb").put_item(TableName=TABLE_NAME, Item=serialize_item(order_item))
+    logger.info("new order pending payment", order_id=order_item["id"], order_status=order_item["orderStatus"],
+        item_bytes=log.payload_size(order_item))
     return {
         "statusCode": 200,
-        "body": json.dumps(order_item, indent=4, cls=DecimalEncoder)
+        "body": order_item
     }
 
+@metrics.instrument
+@log.log_invocation
 def handler(event, context):
-    print(f'event contents: {event}')
     create_order_response = persist_order(event)
-    print(f'persist_order response: {create_order_response}')
     return create_order_response
\ No newline at end of file
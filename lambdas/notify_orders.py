@@ -0,0 +1,73 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from orders_common import clients
+from orders_common import codec
+from orders_common import log
+from orders_common import metrics
+from orders_common.deserialize import deserialize_item
+
+TOPIC_ARN = os.environ.get("TOPIC_ARN")
+MAX_CONCURRENCY = int(os.environ.get("MAX_CONCURRENCY", "10"))
+PUBLISH_BATCH_LIMIT = 10
+FINAL_STATUSES = ("SUCCESS", "FAILED")
+
+logger = log.get_logger(__name__)
+
+def notification(record):
+    '''
+    The SNS entry announcing the order of a stream record, or None unless
+    its orderStatus just changed to SUCCESS or FAILED.
+
+    Messages and subjects are the ones the workflow used to publish:
+
+    {"order_status": "SUCCESS", "order_id": "b4d27a00-1a73-4089-94f8-87e273b57067"}
+    '''
+    images = record["dynamodb"]
+    new_status = images.get("NewImage", {}).get("orderStatus", {}).get("S")
+    old_status = images.get("OldImage", {}).get("orderStatus", {}).get("S")
+    if new_status not in FINAL_STATUSES or new_status == old_status:
+        return None
+    order = deserialize_item(images["NewImage"])
+    if new_status == "SUCCESS":
+        return {"Message": codec.dumps({"order_status": new_status, "order_id": order["id"]}),
+            "Subject": f'Orders-App: Update for order {order["id"]}'}
+    return {"Message": codec.dumps({"order_status": new_status, "order_id": order["id"],
+            "cancel_reason": order.get("errorMessage")}),
+        "Subject": 'Orders-App: order notification'}
+
+def publish_chunk(chunk):
+    '''
+    Publish up to 10 (sequence number, entry) pairs with one PublishBatch
+    call and return the sequence numbers that failed.
+    '''
+    entries = [dict(entry, Id=str(position)) for position, (_, entry) in enumerate(chunk)]
+    try:
+        response = clients.client("sns").publish_batch(TopicArn=TOPIC_ARN, PublishBatchRequestEntries=entries)
+    except Exception as error:
+        logger.error("publish_batch failed", entries=len(entries), error=str(error))
+        return [sequence_number for sequence_number, _ in chunk]
+    for failure in response.get("Failed", []):
+        logger.error("notification failed", code=failure["Code"], error=failure.get("Message"))
+    return [chunk[int(failure["Id"])][0] for failure in response.get("Failed", [])]
+
+@metrics.instrument
+@log.log_invocation
+def handler(event, context):
+    notifications = []
+    for record in event["Records"]:
+        entry = notification(record)
+        if entry is not None:
+            notifications.append((record["dynamodb"]["SequenceNumber"], entry))
+    chunks = [notifications[start:start + PUBLISH_BATCH_LIMIT]
+        for start in range(0, len(notifications), PUBLISH_BATCH_LIMIT)]
+    failed = []
+    if chunks:
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_CONCURRENCY, len(chunks)))) as executor:
+            failed = [sequence_number for chunk in executor.map(publish_chunk, chunks) for sequence_number in chunk]
+    metrics.put_metric("NotificationsPublished", len(notifications) - len(failed))
+    logger.info("notifications published", notifications=len(notifications), failures=len(failed))
+    # The stream resumes from the earliest failure and replays what follows
+    # it, so a notification can be published more than once.
+    if failed:
+        return {"batchItemFailures": [{"itemIdentifier": min(failed, key=int)}]}
+    return {"batchItemFailures": []}
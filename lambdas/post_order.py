@@ -1,57 +1,108 @@
 from datetime import datetime
-import boto3
-import uuid
 import os
-import json
-import decimal
+from concurrent.futures import ThreadPoolExecutor
+from orders_common import clients
+from orders_common import codec
+from orders_common import identity
+from orders_common.indexes import status_created_at
+from orders_common import log
+from orders_common import metrics
 
 #TABLE_NAME = os.environ.get('ORDER_TABLE')
 DEFAULT_ORDER_STATUS = "PENDING"
 STATE_MACHINE_ARN = os.environ.get("STATE_MACHINE_ARN")
-sfn = boto3.client("stepfunctions")
+MAX_CONCURRENCY = int(os.environ.get("MAX_CONCURRENCY", "10"))
+SYNC_EXECUTION = os.environ.get("SYNC_EXECUTION", "false") == "true"
 # dynamodb = boto3.resource('dynamodb')
 # table = dynamodb.Table(TABLE_NAME)
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, decimal.Decimal):
-            return str(o)
-        return super(DecimalEncoder, self).default(o)
+logger = log.get_logger(__name__)
 
-def assemble_order(message_id, order_data):
+def assemble_order(message_id, order_data, user_id=identity.DEFAULT_USER_ID):
     now = datetime.now()
-    order_data["user_id"] = "demo_user"
+    order_data["user_id"] = user_id
     order_data["id"] = message_id
     order_data["orderStatus"] = DEFAULT_ORDER_STATUS
     order_data["createdAt"] = now.isoformat()
-    return json.dumps(order_data,cls=DecimalEncoder)
+    order_data["statusCreatedAt"] = status_created_at(DEFAULT_ORDER_STATUS, order_data["createdAt"])
+    return order_data
 
 def start_sfn_exec(sfn_input, sfn_exec_id):
-    response = sfn.start_execution(
+    response = clients.client("stepfunctions").start_execution(
         stateMachineArn=STATE_MACHINE_ARN,
         name=sfn_exec_id,
-        input=json.dumps(sfn_input,cls=DecimalEncoder)
+        input=codec.dumps(sfn_input)
     )
-    print(f'post_orders start sfn_exec_id {sfn_exec_id} and input {sfn_input}')
+    logger.debug("execution started", execution_name=sfn_exec_id)
     return response
 
-def handler(event, context):
-    new_order_list = []
-    print("event ", event)
-    for record in event["Records"]:
-        message_id = record["messageId"]
-        request_body = json.loads(record["body"])
-        order_data = request_body["input"]
-        print(f'post_orders reqeust_body {order_data} type: {type(order_data)}')
-        sfn_input = assemble_order(message_id, order_data)
-        response = start_sfn_exec(sfn_input, message_id)
-        print(f'start sfn execution: {response}')
-        new_order_list.append(response["executionArn"])
-    return {  
-        "statusCode": 200,
-        "body": json.dumps(new_order_list, indent=4)
-    }
+def start_sfn_sync_exec(sfn_input, sfn_exec_id):
+    # Express workflows only: runs the whole order and returns its outcome.
+    response = clients.client("stepfunctions").start_sync_execution(
+        stateMachineArn=STATE_MACHINE_ARN,
+        name=sfn_exec_id,
+        input=codec.dumps(sfn_input)
+    )
+    latency_ms = (response["stopDate"] - response["startDate"]).total_seconds() * 1000
+    logger.info("sync execution finished", execution_name=sfn_exec_id, status=response["status"],
+        order_latency_ms=round(latency_ms))
+    if response["status"] != "SUCCEEDED":
+        raise RuntimeError(f'execution {sfn_exec_id} {response["status"]}: {response.get("error")} {response.get("cause")}')
+    return response
 
+def process_record(record):
+    message_id = record["messageId"]
+    request_body = codec.loads(record["body"])
+    order_data = request_body["input"]
+    logger.debug("order received", message_id=message_id, body_bytes=len(record["body"]))
+    # Messages sent before userId was added belong to the default user.
+    sfn_input = assemble_order(message_id, order_data, request_body.get("userId") or identity.DEFAULT_USER_ID)
+    if SYNC_EXECUTION:
+        response = start_sfn_sync_exec(sfn_input, message_id)
+        return response["executionArn"]
+    try:
+        response = start_sfn_exec(sfn_input, message_id)
+    except clients.client("stepfunctions").exceptions.ExecutionAlreadyExists:
+        # Redelivered message whose execution was already started.
+        logger.info("execution already started", execution_name=message_id)
+        return None
+    return response["executionArn"]
 
+def message_group(record):
+    # FIFO records carry their group (the user); standard ones are independent.
+    return record.get("attributes", {}).get("MessageGroupId") or record["messageId"]
 
+def process_group(records):
+    '''
+    Start the orders of one message group in order and return the message
+    ids that were not started. Once one fails the rest of its group is
+    failed with it, so a FIFO queue redelivers them in their order.
+    '''
+    failed = []
+    for record in records:
+        if failed:
+            failed.append(record["messageId"])
+            continue
+        try:
+            process_record(record)
+        except Exception as error:
+            logger.error("failed to start execution", message_id=record["messageId"], error=str(error))
+            failed.append(record["messageId"])
+    return failed
 
+@metrics.instrument
+@log.log_invocation
+def handler(event, context):
+    records = event["Records"]
+    metrics.put_metric("BatchSize", len(records))
+    groups = {}
+    for record in records:
+        groups.setdefault(message_group(record), []).append(record)
+    # start_execution is I/O bound, so the groups of a batch are started
+    # concurrently instead of paying one round-trip after another.
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_CONCURRENCY, len(groups)))) as executor:
+        failed = {message_id for group in executor.map(process_group, groups.values()) for message_id in group}
+    batch_item_failures = [{"itemIdentifier": record["messageId"]} for record in records if record["messageId"] in failed]
+    logger.info("batch processed", records=len(records), groups=len(groups), failures=len(batch_item_failures))
+    # Only the failed records return to the queue (ReportBatchItemFailures).
+    return {"batchItemFailures": batch_item_failures}
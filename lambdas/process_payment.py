@@ -1,9 +1,12 @@
-import boto3
-import json
-import os
 import math
 import secrets
+from orders_common import log
+from orders_common import metrics
 
+logger = log.get_logger(__name__)
+
+@metrics.instrument
+@log.log_invocation
 def handler(event, context):
     payment_result = {}
     payment_state = ['ok', 'error']
@@ -16,5 +19,5 @@ def handler(event, context):
 
     payment_result['status'] = payment_state[payment_random]
 
-    print(f'payment_result: {payment_result}')
+    logger.info("payment processed", **payment_result)
     return payment_result
@@ -1,13 +1,16 @@
-import boto3
 import os
-import logging
-import json
+import uuid
+from orders_common import clients
+from orders_common import codec
+from orders_common import fifo
+from orders_common import identity
+from orders_common import log
+from orders_common import metrics
 
-logging.Logger("sqs")
-queue = boto3.client("sqs")
+logger = log.get_logger(__name__)
 QueueUrl = os.environ.get("QueueUrl")
 
-def send_message(message_body, message_attributes=None):
+def send_message(message_body, message_attributes=None, deduplication_id=None):
     """
     Send a message to an Amazon SQS queue.
 
@@ -15,30 +18,35 @@ def send_message(message_body, message_attributes=None):
     :param message_body: The body text of the message.
     :param message_attributes: Custom attributes of the message. These are key-value
                                pairs that can be whatever you want.
+    :param deduplication_id: FIFO queues only, the same for every retry of a send.
     :return: The response from SQS that contains the assigned message ID.
     """
     if not message_attributes:
         message_attributes = {}
 
     try:
-        response = queue.send_message(
-            MessageBody=json.dumps(message_body) ,
+        response = clients.client("sqs").send_message(
+            MessageBody=codec.dumps(message_body),
             MessageAttributes=message_attributes,
-            QueueUrl=QueueUrl
+            QueueUrl=QueueUrl,
+            **fifo.message_parameters(QueueUrl, message_body.get("userId", identity.DEFAULT_USER_ID),
+                deduplication_id or uuid.uuid4().hex)
         )
     except Exception as error:
-        print("Send message failed: %s", error)
-        logging.exception("Send message failed: %s", message_body)
+        logger.exception("send message failed", message_bytes=log.payload_size(message_body))
         raise error
     else:
         return response
 
 
+@metrics.instrument
+@log.log_invocation
 def handler(event, context):
 
-    message_body = event['arguments']
+    # The consumer creates the order in the caller's partition.
+    message_body = dict(event['arguments'], userId=identity.user_id(event))
     try:
-        send_message(message_body)
+        send_message(message_body, deduplication_id=getattr(context, "aws_request_id", None))
     except Exception:
         return None
     else:
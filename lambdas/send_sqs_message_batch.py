@@ -0,0 +1,61 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from orders_common import clients
+from orders_common import codec
+from orders_common import fifo
+from orders_common import identity
+from orders_common import log
+from orders_common import metrics
+
+QueueUrl = os.environ.get("QueueUrl")
+MAX_CONCURRENCY = int(os.environ.get("MAX_CONCURRENCY", "10"))
+SEND_MESSAGE_BATCH_LIMIT = 10
+
+logger = log.get_logger(__name__)
+
+def send_chunk(start, inputs, user_id, request_id=None):
+    '''
+    Send up to 10 order inputs with one SendMessageBatch call.
+
+    Entry ids are the positions of the inputs in the mutation arguments, so
+    every success or failure maps back to the input it belongs to.
+    '''
+    entries = [
+        {"Id": str(start + offset), "MessageBody": codec.dumps({"input": order_input, "userId": user_id}),
+            **fifo.message_parameters(QueueUrl, user_id, f'{request_id}-{start + offset}')}
+        for offset, order_input in enumerate(inputs)
+    ]
+    try:
+        response = clients.client("sqs").send_message_batch(QueueUrl=QueueUrl, Entries=entries)
+    except Exception as error:
+        logger.error("send_message_batch failed", first_index=start, last_index=start + len(entries) - 1, error=str(error))
+        code = getattr(error, "response", {}).get("Error", {}).get("Code", type(error).__name__)
+        return [{"index": int(entry["Id"]), "messageId": None, "errorCode": code, "errorMessage": str(error)}
+            for entry in entries]
+
+    results = [{"index": int(entry["Id"]), "messageId": entry["MessageId"], "errorCode": None, "errorMessage": None}
+        for entry in response.get("Successful", [])]
+    results.extend({"index": int(entry["Id"]), "messageId": None, "errorCode": entry["Code"], "errorMessage": entry.get("Message")}
+        for entry in response.get("Failed", []))
+    return results
+
+def send_messages(inputs, user_id=identity.DEFAULT_USER_ID, request_id=None):
+    request_id = request_id or uuid.uuid4().hex
+    chunks = [(start, inputs[start:start + SEND_MESSAGE_BATCH_LIMIT])
+        for start in range(0, len(inputs), SEND_MESSAGE_BATCH_LIMIT)]
+    if not chunks:
+        return []
+    # Every input is in the caller's message group, so a FIFO queue only
+    # keeps them in order if the chunks are sent one after another.
+    concurrency = 1 if fifo.is_fifo(QueueUrl) else MAX_CONCURRENCY
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as executor:
+        results = [result for chunk in executor.map(lambda chunk: send_chunk(*chunk, user_id, request_id), chunks)
+            for result in chunk]
+    return sorted(results, key=lambda result: result["index"])
+
+
+@metrics.instrument
+@log.log_invocation
+def handler(event, context):
+    return send_messages(event['arguments']['inputs'], identity.user_id(event), getattr(context, "aws_request_id", None))
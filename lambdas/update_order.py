@@ -1,60 +1,64 @@
 from datetime import datetime
-import boto3
-import uuid
 import os
-import json
-import decimal
+from orders_common import clients
+from orders_common import identity
+from orders_common import log
+from orders_common import metrics
+from orders_common.deserialize import deserialize_item
+from orders_common.serialize import serialize_value
 
 TABLE_NAME = os.environ.get("ORDER_TABLE")
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(TABLE_NAME)
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, decimal.Decimal):
-            return str(o)
-        return super(DecimalEncoder, self).default(o)
+logger = log.get_logger(__name__)
 
-def update_order(order_id, request_payload):
-    now = datetime.now()
+# Fields of UpdateOrderInput that can be changed; absent ones are left as is.
+UPDATABLE_FIELDS = ("name", "quantity", "restaurantId")
+
+def build_update_expression(request_payload, updated_at):
+    names = {"#updatedAt": "updatedAt"}
+    values = {":updatedAt": serialize_value(updated_at)}
+    assignments = ["#updatedAt = :updatedAt"]
+    for field in UPDATABLE_FIELDS:
+        if request_payload.get(field) is not None:
+            names[f'#{field}'] = field
+            values[f':{field}'] = serialize_value(request_payload[field])
+            assignments.append(f'#{field} = :{field}')
+    return "set " + ", ".join(assignments), names, values
 
-    get_item_response = table.get_item(
-        Key={
-            'id': order_id,
-            'user_id': 'demo_user'
-        }
-    )
+def update_order(order_id, request_payload, user_id=identity.DEFAULT_USER_ID):
+    now = datetime.now()
+    update_expression, names, values = build_update_expression(request_payload, now.isoformat())
 
-    if 'Item' in get_item_response:
-        print(f'update_order ddb get_item: {order_id} returned: {get_item_response}')
-        response = table.update_item(
+    # A single conditional write: the condition replaces the former get_item
+    # existence check and closes the race between the read and the update.
+    dynamodb = clients.client("dynamodb")
+    try:
+        response = dynamodb.update_item(
+            TableName=TABLE_NAME,
             Key={
-                'id': order_id,
-                'user_id': 'demo_user'
+                'id': {'S': order_id},
+                'user_id': {'S': user_id}
             },
-            ExpressionAttributeNames={
-                "#nm": "name"
-            },
-            ExpressionAttributeValues={
-                ":n": request_payload["name"],
-                ":q": request_payload["quantity"],
-                ":r": request_payload["restaurantId"],
-                ":u": now.isoformat()
-            },
-            UpdateExpression="set quantity = :q, #nm = :n, restaurantId = :r, updatedAt = :u",
+            ConditionExpression="attribute_exists(id)",
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            UpdateExpression=update_expression,
             ReturnValues="UPDATED_NEW"
         )
-        print(f'update_order ddb update_item response {response}') 
-        update_order_response = {'message': 'update success', 'id': order_id, 'updated_values': response['Attributes']}
-        return update_order_response
-    else:
+    except dynamodb.exceptions.ConditionalCheckFailedException:
+        logger.info("order not found", order_id=order_id)
         return {'message': f'order {order_id} not found'}
 
+    logger.info("order updated", order_id=order_id, fields=sorted(names.values()))
+    update_order_response = {'message': 'update success', 'id': order_id, 'updated_values': deserialize_item(response['Attributes'])}
+    return update_order_response
+
 
+@metrics.instrument
+@log.log_invocation
 def handler(event, context):
     order = event['arguments']['input']
-    response = update_order(order['id'], order)
-    print(f'update_order_response: {response}')
+    update_order(order['id'], order, identity.user_id(event))
     return order
 
 
@@ -0,0 +1,26 @@
+import aws_cdk.aws_appsync as appsync
+
+# AppSync cache instance types, smallest first.
+CACHE_TYPES = ("SMALL", "MEDIUM", "LARGE", "XLARGE", "LARGE_2X", "LARGE_4X", "LARGE_8X", "LARGE_12X")
+
+
+
+def create_api_cache(stack, api, ttl=5, cache_type="SMALL"):
+
+    ## Per-resolver API cache: only resolvers with caching keys are cached,
+    ## see lambdas_data_source.functions. AppSync mutations evict what they
+    ## write; the workflow writes order statuses outside AppSync, so `ttl`
+    ## bounds how long a read can miss a status change. The instance type
+    ## bounds the entries, least recently used first out. AppSync reports
+    ## the CacheHit and CacheMiss metrics of the API.
+    if cache_type not in CACHE_TYPES:
+        raise ValueError(f'unknown API cache type {cache_type}, expected one of {", ".join(CACHE_TYPES)}')
+    api_cache = appsync.CfnApiCache(stack, "ApiCache",
+        api_id=api.attr_api_id,
+        api_caching_behavior="PER_RESOLVER_CACHING",
+        ttl=ttl,
+        type=cache_type,
+        at_rest_encryption_enabled=True,
+        transit_encryption_enabled=True
+    )
+    return api_cache
@@ -0,0 +1,71 @@
+from aws_cdk import aws_iam as iam
+from aws_cdk import aws_lambda as lambda_
+from aws_cdk import aws_s3 as s3
+from aws_cdk import aws_sqs as sqs
+from lambdas_data_source.functions import FUNCTIONS, create_function
+
+
+
+def create_archive(stack, cfn_table, common_layer, batch_size=1000, max_batching_window=60,
+        max_retry_attempts=5, max_record_age=6 * 3600):
+
+    ## Archive of the orders DynamoDB's time to live deletes, as gzipped NDJSON
+    archive_bucket = s3.CfnBucket(stack, "OrderArchiveBucket",
+        bucket_encryption=s3.CfnBucket.BucketEncryptionProperty(
+            server_side_encryption_configuration=[s3.CfnBucket.ServerSideEncryptionRuleProperty(
+                server_side_encryption_by_default=s3.CfnBucket.ServerSideEncryptionByDefaultProperty(
+                    sse_algorithm="AES256"
+                )
+            )]
+        ),
+        public_access_block_configuration=s3.CfnBucket.PublicAccessBlockConfigurationProperty(
+            block_public_acls=True,
+            block_public_policy=True,
+            ignore_public_acls=True,
+            restrict_public_buckets=True
+        )
+    )
+
+    # Where batches that still fail after the retries are recorded: their
+    # shard and sequence numbers, to replay from the stream within 24 h.
+    failure_queue = sqs.CfnQueue(stack, "OrderArchiveFailureQueue",
+        queue_name="order-archive-failures",
+        message_retention_period=14 * 24 * 3600
+    )
+
+    archive_role = iam.Role(stack, "OrderArchiveRole",
+        assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"),
+        managed_policies=[iam.ManagedPolicy.from_aws_managed_policy_name('service-role/AWSLambdaDynamoDBExecutionRole')])
+    archive_role.add_to_policy(iam.PolicyStatement(
+        actions=["s3:PutObject"],
+        resources=[f'{archive_bucket.attr_arn}/*']))
+    archive_role.add_to_policy(iam.PolicyStatement(
+        actions=["sqs:SendMessage"],
+        resources=[failure_queue.attr_arn]))
+
+    spec = FUNCTIONS["archive-orders-function"]
+    function = create_function(stack, spec, archive_role, common_layer, {"archive": {
+        "ARCHIVE_BUCKET": archive_bucket.ref
+    }})
+
+    # Only TTL deletions reach the function; larger, less frequent batches
+    # make fewer and bigger archive objects. A record that keeps failing is
+    # bisected down, retried a bounded number of times and then skipped,
+    # instead of holding up its shard until it ages out of the stream.
+    lambda_.CfnEventSourceMapping(stack, "OrderArchiveEventSourceMapping",
+        function_name=function.invoke_arn,
+        event_source_arn=cfn_table.attr_stream_arn,
+        starting_position="TRIM_HORIZON",
+        batch_size=batch_size,
+        maximum_batching_window_in_seconds=max_batching_window,
+        bisect_batch_on_function_error=True,
+        maximum_retry_attempts=max_retry_attempts,
+        maximum_record_age_in_seconds=max_record_age,
+        destination_config=lambda_.CfnEventSourceMapping.DestinationConfigProperty(
+            on_failure=lambda_.CfnEventSourceMapping.OnFailureProperty(destination=failure_queue.attr_arn)
+        ),
+        filter_criteria=lambda_.CfnEventSourceMapping.FilterCriteriaProperty(filters=[
+            lambda_.CfnEventSourceMapping.FilterProperty(pattern='{"eventName": ["REMOVE"], '
+                '"userIdentity": {"type": ["Service"], "principalId": ["dynamodb.amazonaws.com"]}}')
+        ]))
+    return archive_bucket
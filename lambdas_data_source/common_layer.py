@@ -0,0 +1,32 @@
+from aws_cdk import aws_lambda as lambda_
+from aws_cdk import aws_s3_assets as s3_assets
+from cdk_accelerate.packaging import build_layer
+from lambdas_data_source.functions import ARCHITECTURES, FUNCTIONS
+
+
+
+def create_common_layer(stack):
+
+    ## Shared orders_common package, importable by every handler. One layer
+    ## per architecture: third-party wheels are built for a single one.
+    ## Compatible with every runtime a registered function runs on.
+    runtimes = sorted({spec.profile.runtime for spec in FUNCTIONS.values()})
+    common_layer = {}
+    for architecture in ARCHITECTURES:
+        layer_asset = s3_assets.Asset(stack, f'orders-common-layer-asset-{architecture}',
+            path=build_layer(architecture=architecture))
+
+        common_layer[architecture] = lambda_.CfnLayerVersion(stack, f'orders-common-layer-{architecture}',
+            content=lambda_.CfnLayerVersion.ContentProperty(
+                s3_bucket=layer_asset.s3_bucket_name,
+                s3_key=layer_asset.s3_object_key
+            ),
+
+            # the properties below are optional
+            compatible_architectures=[architecture],
+            compatible_runtimes=runtimes,
+            description="orders_common shared handler code",
+            layer_name=f'orders-common-{architecture}'
+        )
+
+    return common_layer
@@ -0,0 +1,401 @@
+"""Registry of the stack's Lambda functions and their performance profiles.
+
+Every function is declared once in FUNCTIONS: its construct id, deployed
+name, handler module, execution role, environment, the AppSync field it
+resolves (if any) and a Profile with memory, architecture, runtime,
+timeout, reserved and provisioned concurrency and SnapStart.
+
+Reads of single orders are cached by AppSync (see api_cache): a Resolver
+lists the caching keys of its field, and the mutations that write an
+order evict its entry from their response template, so a read after an
+AppSync write sees the new value.
+
+Environments are named groups of variables (ENVIRONMENT_GROUPS) that the
+stack resolves from its resources, plus fixed values. The stack creates
+every resolver function, its data source and its resolver by looping over
+the registry, so a new resolver is one entry here; the workflow, queue
+and stream builders create theirs from their entries.
+
+Memory and architecture come from profiles.json when it has an entry for
+the function: the recommendations benchmarks/power_tuning.py writes. With
+`-c powerTuning=true` every function is also deployed once per
+architecture and memory size, so the recommendations can be checked
+against real invocations.
+"""
+import dataclasses
+import hashlib
+import json
+import os
+from typing import Mapping, Optional, Tuple
+
+from aws_cdk import aws_lambda as lambda_
+import aws_cdk.aws_appsync as appsync
+from cdk_accelerate.environment import logging_variables
+from cdk_accelerate.packaging import function_asset, function_code
+
+ARCHITECTURES = ("x86_64", "arm64")
+# Lambda SnapStart supports Python from 3.12 on.
+SNAP_START_RUNTIMES = ("python3.12", "python3.13")
+ALIAS_NAME = "live"
+PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles.json")
+TUNING_MEMORY_SIZES = "128,256,512,1024,1769,3008"
+
+
+@dataclasses.dataclass(frozen=True)
+class Profile:
+    memory_size: int = 128
+    architecture: str = "x86_64"
+    runtime: str = "python3.9"
+    timeout: int = 123
+    reserved_concurrency: Optional[int] = None
+    provisioned_concurrency: Optional[int] = None
+    snap_start: bool = False
+
+    def __post_init__(self):
+        if self.architecture not in ARCHITECTURES:
+            raise ValueError(f'unsupported architecture {self.architecture}')
+        if not 128 <= self.memory_size <= 10240:
+            raise ValueError(f'memory size {self.memory_size} is outside 128-10240 MB')
+        if self.snap_start and self.runtime not in SNAP_START_RUNTIMES:
+            raise ValueError(f'SnapStart is not available for {self.runtime}')
+        if self.snap_start and self.provisioned_concurrency:
+            raise ValueError('SnapStart cannot be combined with provisioned concurrency')
+
+    @property
+    def publishes_version(self):
+        # Provisioned concurrency and SnapStart only apply to published versions.
+        return bool(self.provisioned_concurrency or self.snap_start)
+
+
+# Every value orders_common.identity.user_id reads: cached entries are per user.
+IDENTITY_CACHING_KEYS = ("$context.identity.sub", "$context.identity.cognitoIdentityId", "$context.identity.userArn")
+
+
+@dataclasses.dataclass(frozen=True)
+class Eviction:
+    """The cache entry of a cached field that a mutation evicts.
+
+    `arguments` maps each argument caching key of the field to the VTL
+    expression of its value in the mutation; the identity keys are the
+    caller's. With `each`, one entry is evicted per item of that list,
+    bound to $item.
+    """
+    type_name: str
+    field_name: str
+    arguments: Mapping[str, str]
+    each: Optional[str] = None
+
+    @property
+    def keys(self):
+        return {**{key[1:]: key for key in IDENTITY_CACHING_KEYS}, **self.arguments}
+
+
+@dataclasses.dataclass(frozen=True)
+class Resolver:
+    type_name: str
+    field_name: str
+    resolver_id: str
+    data_source_id: str
+    data_source_name: str
+    max_batch_size: Optional[int] = None
+    request_mapping_template: Optional[str] = None
+    response_mapping_template: Optional[str] = None
+    # Cached by the API cache on these keys, when the stack has one.
+    caching_keys: Tuple[str, ...] = ()
+    evicts: Tuple[Eviction, ...] = ()
+
+
+# Environment variable groups a function can ask for:
+#   table      ORDER_TABLE
+#   retention  ORDER_RETENTION_DAYS, see environment.retention_variables
+#   queue      QueueUrl of the order queue
+#   topic      TOPIC_ARN of the notification topic
+#   workflow   STATE_MACHINE_ARN, SYNC_EXECUTION and MAX_CONCURRENCY, from the SQS consumer
+#   archive    ARCHIVE_BUCKET, from the archive builder
+ENVIRONMENT_GROUPS = ("table", "retention", "queue", "topic", "workflow", "archive")
+
+
+@dataclasses.dataclass(frozen=True)
+class FunctionSpec:
+    construct_id: str
+    function_name: str
+    handler_path: str
+    profile: Profile = Profile()
+    resolver: Optional[Resolver] = None
+    # Role name in the stack's roles; builders with their own role ignore it.
+    role: str = "db"
+    environment: Tuple[str, ...] = ()
+    variables: Mapping[str, str] = dataclasses.field(default_factory=dict)
+
+    def __post_init__(self):
+        for group in self.environment:
+            if group not in ENVIRONMENT_GROUPS:
+                raise ValueError(f'{self.construct_id}: unknown environment group {group}')
+
+
+@dataclasses.dataclass(frozen=True)
+class Function:
+    """A created function and the ARN callers should invoke (its alias, if any)."""
+    resource: lambda_.CfnFunction
+    invoke_arn: str
+
+
+BATCH_INVOKE_REQUEST_TEMPLATE = '''{
+    "version": "2018-05-29",
+    "operation": "BatchInvoke",
+    "payload": {
+        "arguments": $util.toJson($context.arguments),
+        "identity": $util.toJson($context.identity)
+    }
+}'''
+
+BATCH_INVOKE_RESPONSE_TEMPLATE = '$util.toJson($context.result)'
+
+# What a direct Lambda resolver passes the handlers, for resolvers that
+# need a response template.
+INVOKE_REQUEST_TEMPLATE = '''{
+    "version": "2018-05-29",
+    "operation": "Invoke",
+    "payload": {
+        "arguments": $util.toJson($context.arguments),
+        "identity": $util.toJson($context.identity)
+    }
+}'''
+
+
+def evicting_response_template(evictions):
+    """Response template returning the result after evicting `evictions`, on success only."""
+    lines = ["#if($context.error)", "    $util.error($context.error.message, $context.error.type)", "#end"]
+    for eviction in evictions:
+        keys = ", ".join(f'"{key}": {value}' for key, value in eviction.keys.items())
+        call = f'$extensions.evictFromApiCache("{eviction.type_name}", "{eviction.field_name}", {{{keys}}})'
+        if eviction.each:
+            lines += [f"#foreach($item in {eviction.each})", f"    {call}", "#end"]
+        else:
+            lines.append(call)
+    lines.append("$util.toJson($context.result)")
+    return "\n".join(lines)
+
+
+ORDER_CACHING_KEYS = IDENTITY_CACHING_KEYS + ("$context.arguments.id",)
+
+
+FUNCTIONS = {spec.construct_id: spec for spec in (
+    FunctionSpec("delete", "delete-order-function", "lambdas/delete_order.py", environment=("table",),
+        resolver=Resolver("Mutation", "deleteOrder", "delete-order", "lambda-delete-order-ds", "lambda_delete_order_ds",
+            evicts=(Eviction("Query", "order", {"context.arguments.id": "$context.arguments.id"}),))),
+    # BatchWriteItem in chunks of 25.
+    FunctionSpec("delete-batch", "delete-orders-function", "lambdas/delete_orders.py", environment=("table",),
+        resolver=Resolver("Mutation", "deleteOrders", "delete-orders", "lambda-delete-orders-ds", "lambda_delete_orders_ds",
+            evicts=(Eviction("Query", "order", {"context.arguments.id": "$item"}, each="$context.arguments.ids"),))),
+    FunctionSpec("update", "update-order-function", "lambdas/update_order.py", environment=("table",),
+        resolver=Resolver("Mutation", "updateOrder", "update-order", "lambda-update-order-ds", "lambda_update_order_ds",
+            evicts=(Eviction("Query", "order", {"context.arguments.id": "$context.arguments.input.id"}),))),
+    FunctionSpec("get", "get-order-function", "lambdas/get_single_order.py", environment=("table",),
+        resolver=Resolver("Query", "order", "get-order", "lambda-get-order-ds", "lambda_get_order_ds",
+            caching_keys=ORDER_CACHING_KEYS)),
+    # Not cached: a page can't be evicted when an order on it changes.
+    FunctionSpec("gets", "get-orders-function", "lambdas/get_orders.py", environment=("table",),
+        resolver=Resolver("Query", "orders", "list-orders", "lambda-getAll-order-ds", "lambda_getAll_order_ds")),
+    # Batching concurrent resolutions into one invocation.
+    FunctionSpec("get-by-ids", "get-orders-by-ids-function", "lambdas/batch_get_orders.py", environment=("table",),
+        resolver=Resolver("Query", "ordersByIds", "get-orders-by-ids", "lambda-get-orders-by-ids-ds",
+            "lambda_get_orders_by_ids_ds", max_batch_size=50,
+            request_mapping_template=BATCH_INVOKE_REQUEST_TEMPLATE,
+            response_mapping_template=BATCH_INVOKE_RESPONSE_TEMPLATE)),
+    FunctionSpec("get-by-status", "get-orders-by-status-function", "lambdas/get_orders_by_status.py",
+        environment=("table",),
+        resolver=Resolver("Query", "ordersByStatus", "get-orders-by-status", "lambda-get-orders-by-status-ds",
+            "lambda_get_orders_by_status_ds")),
+    FunctionSpec("get-by-restaurant", "get-orders-by-restaurant-function", "lambdas/get_orders_by_restaurant.py",
+        environment=("table",),
+        resolver=Resolver("Query", "ordersByRestaurant", "get-orders-by-restaurant", "lambda-get-orders-by-restaurant-ds",
+            "lambda_get_orders_by_restaurant_ds")),
+    # Replaced by a direct SQS resolver with `-c postOrderResolver=http`.
+    FunctionSpec("send-sqs-event", "send-sqs-function", "lambdas/sendSQSMessage.py", role="sqs-send",
+        environment=("queue",),
+        resolver=Resolver("Mutation", "postOrder", "post-order", "lambda-post-order-ds", "lambda_post_order_ds")),
+    # Up to 10 orders per SendMessageBatch.
+    FunctionSpec("send-sqs-batch-event", "send-sqs-batch-function", "lambdas/send_sqs_message_batch.py", role="sqs-send",
+        environment=("queue",), variables={"MAX_CONCURRENCY": "10"},
+        resolver=Resolver("Mutation", "postOrders", "post-orders", "lambda-post-orders-ds", "lambda_post_orders_ds")),
+    FunctionSpec("post", "post-order-function", "lambdas/post_order.py", role="sqs-receive",
+        environment=("table", "workflow")),
+    FunctionSpec("process-payment-function", "process-payment-function", "lambdas/process_payment.py",
+        role="step-function", environment=("table", "retention")),
+    FunctionSpec("cancel-failed-order-function", "cancel-failed-order-function", "lambdas/cancel_failed_order.py",
+        role="step-function", environment=("table", "retention")),
+    FunctionSpec("complete-order-function", "complete-order-function", "lambdas/complete_order.py",
+        role="step-function", environment=("table", "retention")),
+    FunctionSpec("initialize-order-function", "initialize-order-function", "lambdas/initialize_order.py",
+        role="step-function", environment=("table", "retention")),
+    FunctionSpec("archive-orders-function", "archive-orders-function", "lambdas/archive_orders.py",
+        role="archive", environment=("archive",)),
+    FunctionSpec("notify-orders-function", "notify-orders-function", "lambdas/notify_orders.py",
+        role="notify", environment=("topic",)),
+)}
+
+
+def load_profiles(path=PROFILES_PATH):
+    """Profile overrides by construct id, e.g. {"get": {"memory_size": 256, "architecture": "arm64"}}.
+
+    Keys starting with "_" hold how the file was produced and are skipped.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return {key: value for key, value in json.load(file).items() if not key.startswith("_")}
+
+
+def apply_profiles(functions, overrides):
+    """`functions` with each overridden spec's Profile fields replaced."""
+    functions = dict(functions)
+    for construct_id, fields in overrides.items():
+        if construct_id not in functions:
+            raise ValueError(f'profile for unknown function {construct_id}')
+        spec = functions[construct_id]
+        functions[construct_id] = dataclasses.replace(spec, profile=dataclasses.replace(spec.profile, **fields))
+    return functions
+
+
+FUNCTIONS = apply_profiles(FUNCTIONS, load_profiles())
+
+
+def tuning_variants(stack):
+    """(architecture, memory size) pairs to deploy every function with, from the stack context.
+
+    e.g. `cdk deploy -c powerTuning=true -c tuningMemorySizes=128,512,1024`
+    """
+    if str(stack.node.try_get_context("powerTuning") or "false").lower() not in ("true", "1"):
+        return []
+    memory_sizes = str(stack.node.try_get_context("tuningMemorySizes") or TUNING_MEMORY_SIZES)
+    return [(architecture, int(memory_size))
+        for architecture in ARCHITECTURES for memory_size in memory_sizes.split(",")]
+
+
+def _cfn_function(stack, construct_id, function_name, profile, code, role, common_layer, variables,
+        description="lambda-ds"):
+    return lambda_.CfnFunction(stack, construct_id,
+        code=code,
+        role=role.role_arn,
+
+        # the properties below are optional
+        architectures=[profile.architecture],
+        description=description,
+        environment=lambda_.CfnFunction.EnvironmentProperty(
+            variables={
+                **logging_variables(stack),
+                **variables
+            }
+        ),
+        function_name=function_name,
+        handler="index.handler",
+        layers=[common_layer[profile.architecture].ref],
+        memory_size=profile.memory_size,
+        package_type="Zip",
+        reserved_concurrent_executions=profile.reserved_concurrency,
+        runtime=profile.runtime,
+        snap_start=lambda_.CfnFunction.SnapStartProperty(apply_on="PublishedVersions") if profile.snap_start else None,
+        timeout=profile.timeout,
+        tracing_config=lambda_.CfnFunction.TracingConfigProperty(
+            mode="Active"
+        )
+    )
+
+
+def environment_variables(spec, environment):
+    """The variables of `spec`: its groups, resolved from `environment`, then its fixed values."""
+    variables = {}
+    for group in spec.environment:
+        if group not in environment:
+            raise ValueError(f'{spec.construct_id} needs the {group} environment')
+        variables.update(environment[group])
+    variables.update(spec.variables)
+    return variables
+
+
+def create_function(stack, spec, role, common_layer, environment):
+    """CfnFunction for `spec`, plus a version and alias when its profile needs one.
+
+    `common_layer` maps each architecture to its orders-common layer and
+    `environment` each group name to its variables.
+    """
+    variables = environment_variables(spec, environment)
+    profile = spec.profile
+    asset = function_asset(stack, spec.construct_id, spec.handler_path, profile.runtime)
+    code = function_code(stack, spec.construct_id, spec.handler_path, profile.runtime, asset=asset)
+    function = _cfn_function(stack, spec.construct_id, spec.function_name, profile, code,
+        role, common_layer, variables)
+
+    # Tuning variants share the code asset and are only invoked directly:
+    # no resolver, event source, reserved capacity or published version.
+    for architecture, memory_size in tuning_variants(stack):
+        variant = Profile(memory_size=memory_size, architecture=architecture,
+            runtime=profile.runtime, timeout=profile.timeout)
+        _cfn_function(stack, f'{spec.construct_id}-{architecture}-{memory_size}',
+            f'{spec.function_name}-{architecture}-{memory_size}', variant, code,
+            role, common_layer, variables, description="power-tuning variant")
+
+    if not profile.publishes_version:
+        return Function(function, function.attr_arn)
+
+    # Versions are immutable: a new logical id publishes a new one whenever
+    # the code or the profile changes.
+    revision = hashlib.sha256(f'{asset.asset_hash} {profile}'.encode()).hexdigest()[:8]
+    version = lambda_.CfnVersion(stack, f'{spec.construct_id}-version-{revision}', function_name=function.ref)
+    alias = lambda_.CfnAlias(stack, f'{spec.construct_id}-{ALIAS_NAME}',
+        function_name=function.ref,
+        function_version=version.attr_version,
+        name=ALIAS_NAME,
+        provisioned_concurrency_config=lambda_.CfnAlias.ProvisionedConcurrencyConfigurationProperty(
+            provisioned_concurrent_executions=profile.provisioned_concurrency
+        ) if profile.provisioned_concurrency else None
+    )
+    return Function(function, alias.ref)
+
+
+def create_lambda_resolver(stack, api, schema, spec, function, lambda_execution_role, api_cache=None):
+    """AppSync Lambda data source and resolver for the field `spec` resolves.
+
+    With an `api_cache`, the resolver caches on its caching keys and evicts
+    what its mutation writes.
+    """
+    resolver = spec.resolver
+    request_mapping_template = resolver.request_mapping_template
+    response_mapping_template = resolver.response_mapping_template
+    caching_config = None
+    if api_cache is not None and resolver.caching_keys:
+        caching_config = appsync.CfnResolver.CachingConfigProperty(ttl=api_cache.ttl,
+            caching_keys=list(resolver.caching_keys))
+    if api_cache is not None and resolver.evicts:
+        request_mapping_template = request_mapping_template or INVOKE_REQUEST_TEMPLATE
+        response_mapping_template = evicting_response_template(resolver.evicts)
+    data_source = appsync.CfnDataSource(scope=stack, id=resolver.data_source_id, api_id=api.attr_api_id,
+        name=resolver.data_source_name, type="AWS_LAMBDA",
+        lambda_config=appsync.CfnDataSource.LambdaConfigProperty(lambda_function_arn=function.invoke_arn),
+        service_role_arn=lambda_execution_role.role_arn)
+
+    cfn_resolver = appsync.CfnResolver(stack, resolver.resolver_id,
+        api_id=api.attr_api_id,
+        field_name=resolver.field_name,
+        type_name=resolver.type_name,
+        data_source_name=data_source.name,
+        max_batch_size=resolver.max_batch_size,
+        caching_config=caching_config,
+        request_mapping_template=request_mapping_template,
+        response_mapping_template=response_mapping_template)
+    cfn_resolver.add_dependency(schema)
+    cfn_resolver.add_dependency(data_source)
+    if api_cache is not None and (resolver.caching_keys or resolver.evicts):
+        cfn_resolver.add_dependency(api_cache)
+    return data_source, cfn_resolver
+
+
+def create_resolver_functions(stack, api, schema, roles, lambda_execution_role, common_layer, environment,
+        exclude=(), api_cache=None):
+    """Every registered function that resolves an AppSync field, with its data source and resolver."""
+    for spec in FUNCTIONS.values():
+        if spec.resolver is None or spec.construct_id in exclude:
+            continue
+        function = create_function(stack, spec, roles[spec.role], common_layer, environment)
+        create_lambda_resolver(stack, api, schema, spec, function, lambda_execution_role, api_cache)
@@ -0,0 +1,49 @@
+from aws_cdk import aws_iam as iam
+from aws_cdk import aws_lambda as lambda_
+from aws_cdk import aws_sqs as sqs
+from lambdas_data_source.functions import FUNCTIONS, create_function
+
+
+
+def create_notifier(stack, cfn_table, cfn_topic, common_layer, environment, batch_size=100, max_batching_window=1,
+        max_retry_attempts=5, max_record_age=3600):
+
+    ## Order notifications, published from the table's stream in batches of 10
+    # Where notifications that still fail after the retries are recorded.
+    failure_queue = sqs.CfnQueue(stack, "OrderNotifyFailureQueue",
+        queue_name="order-notify-failures",
+        message_retention_period=14 * 24 * 3600
+    )
+
+    notify_role = iam.Role(stack, "OrderNotifyRole",
+        assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"),
+        managed_policies=[iam.ManagedPolicy.from_aws_managed_policy_name('service-role/AWSLambdaDynamoDBExecutionRole')])
+    notify_role.add_to_policy(iam.PolicyStatement(
+        actions=["sns:Publish"],
+        resources=[cfn_topic.attr_topic_arn]))
+    notify_role.add_to_policy(iam.PolicyStatement(
+        actions=["sqs:SendMessage"],
+        resources=[failure_queue.attr_arn]))
+
+    spec = FUNCTIONS["notify-orders-function"]
+    function = create_function(stack, spec, notify_role, common_layer, environment)
+
+    # Only orders entering a final status reach the function. Failures are
+    # retried a bounded number of times, so one record cannot hold up the
+    # shard until it ages out of the stream.
+    lambda_.CfnEventSourceMapping(stack, "OrderNotifyEventSourceMapping",
+        function_name=function.invoke_arn,
+        event_source_arn=cfn_table.attr_stream_arn,
+        starting_position="LATEST",
+        batch_size=batch_size,
+        maximum_batching_window_in_seconds=max_batching_window,
+        function_response_types=["ReportBatchItemFailures"],
+        maximum_retry_attempts=max_retry_attempts,
+        maximum_record_age_in_seconds=max_record_age,
+        destination_config=lambda_.CfnEventSourceMapping.DestinationConfigProperty(
+            on_failure=lambda_.CfnEventSourceMapping.OnFailureProperty(destination=failure_queue.attr_arn)
+        ),
+        filter_criteria=lambda_.CfnEventSourceMapping.FilterCriteriaProperty(filters=[
+            lambda_.CfnEventSourceMapping.FilterProperty(pattern='{"eventName": ["MODIFY"], '
+                '"dynamodb": {"NewImage": {"orderStatus": {"S": ["SUCCESS", "FAILED"]}}}}')
+        ]))
@@ -1,41 +1,26 @@
+from aws_cdk import Duration
 from aws_cdk import aws_lambda as lambda_
-import aws_cdk.aws_appsync as appsync
+from lambdas_data_source.functions import FUNCTIONS, create_function
 
 
 
-def create_data_source(stack, simple_state_machine, sqs_receiveMessage_role, queue):
+def create_data_source(stack, simple_state_machine, sqs_receiveMessage_role, queue, common_layer, environment, batch_size=5, max_batching_window=0, sync_execution=False):
 
-    post_function = ''
-    with open("lambdas/post_order.py", 'r') as file:
-        post_function = file.read()
-
-    post_function = lambda_.CfnFunction(stack, "post",
-        code=lambda_.CfnFunction.CodeProperty(
-            zip_file=post_function
-        ),
-        role=sqs_receiveMessage_role.role_arn,
-
-        # the properties below are optional
-        architectures=["x86_64"],
-        description="lambda-ds",
-        environment=lambda_.CfnFunction.EnvironmentProperty(
-            variables={
-                "ORDER_TABLE": "ORDER",
-                "STATE_MACHINE_ARN": simple_state_machine.attr_arn
-            }
-        ),
-        function_name="post-order-function",
-        handler="index.handler",
-        package_type="Zip",
-        runtime="python3.9",
-        timeout=123,
-        tracing_config=lambda_.CfnFunction.TracingConfigProperty(
-            mode="Active"
-        )
-    )
+    spec = FUNCTIONS["post"]
+    function = create_function(stack, spec, sqs_receiveMessage_role, common_layer, {**environment, "workflow": {
+        "STATE_MACHINE_ARN": simple_state_machine.attr_arn,
+        "MAX_CONCURRENCY": str(min(batch_size, 10)),
+        "SYNC_EXECUTION": "true" if sync_execution else "false"
+    }})
+    post_function = function.resource
+    if spec.profile.publishes_version:
+        # Poll into the alias, where provisioned concurrency and SnapStart apply.
+        post_function = lambda_.Function.from_function_arn(stack, "post-alias", function.invoke_arn)
 
     event_source_mapping = lambda_.EventSourceMapping(scope=stack, id="MyEventSourceMapping",
         target=post_function,
-        batch_size=5,
+        batch_size=batch_size,
+        max_batching_window=Duration.seconds(max_batching_window) if max_batching_window else None,
+        report_batch_item_failures=True,
         enabled=True,
         event_source_arn=queue.attr_arn)
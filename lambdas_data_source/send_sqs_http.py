@@ -0,0 +1,49 @@
+from aws_cdk import Fn
+from aws_cdk import aws_iam as iam
+import aws_cdk.aws_appsync as appsync
+from cdk_accelerate.packaging import read_text
+
+
+
+def create_data_source(stack, api, schema, queue):
+
+    ## AppSync signs the SQS SendMessage call itself, no Lambda in between
+    appsync_sqs_role = iam.Role(stack, "AppSyncSQSSendMessageRole",
+        assumed_by=iam.ServicePrincipal("appsync.amazonaws.com"))
+    appsync_sqs_role.add_to_policy(iam.PolicyStatement(
+        actions=["sqs:SendMessage"],
+        resources=[queue.attr_arn]))
+
+    http_config_property = appsync.CfnDataSource.HttpConfigProperty(
+        endpoint=f'https://sqs.{stack.region}.amazonaws.com',
+        authorization_config=appsync.CfnDataSource.AuthorizationConfigProperty(
+            authorization_type="AWS_IAM",
+            aws_iam_config=appsync.CfnDataSource.AwsIamConfigProperty(
+                signing_region=stack.region,
+                signing_service_name="sqs"
+            )
+        )
+    )
+
+    httpSendSQSMessageDs = appsync.CfnDataSource(scope=stack, id="http-post-order-ds", api_id=api.attr_api_id, name="http_post_order_ds", type="HTTP",
+    http_config=http_config_property, service_role_arn=appsync_sqs_role.role_arn)
+    httpSendSQSMessageDs.add_dependency(queue)
+
+    # The templates keep ${QueueUrl}, ${QueueName} and ${AWS::AccountId}
+    # placeholders, filled in by Fn::Sub at deploy time.
+    request_mapping_template = read_text("requestMappingTemplate.vtl")
+    response_mapping_template = read_text("responseMappingTemplate.vtl")
+
+    ##  post order resolvers
+    post_order = appsync.CfnResolver(stack, "post-order",
+    api_id=api.attr_api_id,
+    field_name="postOrder",
+    type_name="Mutation",
+    data_source_name=httpSendSQSMessageDs.name,
+    request_mapping_template=Fn.sub(request_mapping_template, {
+        "QueueUrl": queue.attr_queue_url,
+        "QueueName": queue.attr_queue_name
+    }),
+    response_mapping_template=response_mapping_template)
+    post_order.add_dependency(schema)
+    post_order.add_dependency(httpSendSQSMessageDs)
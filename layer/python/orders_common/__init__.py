@@ -0,0 +1 @@
+"""Code shared by the order handlers, deployed as the orders-common Lambda layer."""
@@ -0,0 +1,38 @@
+"""Lazily built, per-process AWS clients shared by the handlers.
+
+Clients are created on first use instead of at import time and then reused
+for the lifetime of the execution environment. Low-level clients are used
+throughout: a boto3 resource costs noticeably more to build and to call.
+Every client is instrumented by orders_common.metrics.
+"""
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+from orders_common import metrics
+
+CLIENT_CONFIG = Config(
+    connect_timeout=float(os.environ.get("AWS_CONNECT_TIMEOUT", "2")),
+    read_timeout=float(os.environ.get("AWS_READ_TIMEOUT", "10")),
+    max_pool_connections=int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "25")),
+    tcp_keepalive=True,
+    retries={"mode": "standard", "max_attempts": 3},
+)
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def client(service_name):
+    """Return the memoized client for `service_name`, building it on first use."""
+    try:
+        return _clients[service_name]
+    except KeyError:
+        pass
+    # boto3's default session is not safe to build clients from concurrently.
+    with _lock:
+        if service_name not in _clients:
+            _clients[service_name] = metrics.register(boto3.client(service_name, config=CLIENT_CONFIG))
+        return _clients[service_name]
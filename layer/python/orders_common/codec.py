@@ -0,0 +1,38 @@
+"""Compact JSON encoding shared by the handlers.
+
+Decimals, as returned by DynamoDB and boto3, are written as plain JSON
+numbers. orjson is used when the layer ships it, the standard library
+otherwise; both produce the same compact output.
+"""
+import decimal
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, decimal.Decimal):
+        return int(o) if o == o.to_integral_value() else float(o)
+    if isinstance(o, set):
+        return sorted(o)
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+_encoder = json.JSONEncoder(separators=(",", ":"), default=_default)
+
+
+def dumps(obj):
+    """Serialize `obj` to a compact JSON string."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default).decode()
+    return _encoder.encode(obj)
+
+
+def loads(data):
+    """Parse a JSON string or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
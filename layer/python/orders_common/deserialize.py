@@ -0,0 +1,116 @@
+"""Fast conversion of low-level DynamoDB items into plain Python values.
+
+boto3's TypeDeserializer dispatches on the type tag of every attribute and
+turns every number into a decimal.Decimal. Order items have a fixed shape,
+so the converters here are chosen once per field name and numbers become
+int or float directly.
+"""
+
+# Every attribute an order item can carry, with its DynamoDB type.
+ORDER_FIELDS = {
+    "user_id": "S",
+    "id": "S",
+    "name": "S",
+    "quantity": "N",
+    "restaurantId": "S",
+    "orderStatus": "S",
+    "createdAt": "S",
+    "updatedAt": "S",
+    "errorMessage": "S",
+    "statusCreatedAt": "S",
+    "expiresAt": "N",
+}
+
+# The attributes exposed by the Order GraphQL type; the partition and index
+# keys and the TTL stay internal.
+ORDER_TYPE_FIELDS = [name for name in ORDER_FIELDS if name not in ("user_id", "statusCreatedAt", "expiresAt")]
+
+
+def projection(fields):
+    """ProjectionExpression and ExpressionAttributeNames reading only `fields`."""
+    names = {f'#{name}': name for name in fields}
+    return ", ".join(names), names
+
+
+def to_number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def deserialize_value(value):
+    """Convert any low-level attribute value; used for unknown fields."""
+    (tag, raw), = value.items()
+    if tag == "S":
+        return raw
+    if tag == "N":
+        return to_number(raw)
+    if tag == "BOOL":
+        return raw
+    if tag == "NULL":
+        return None
+    if tag == "M":
+        return {key: deserialize_value(item) for key, item in raw.items()}
+    if tag == "L":
+        return [deserialize_value(item) for item in raw]
+    if tag == "SS":
+        return set(raw)
+    if tag == "NS":
+        return {to_number(item) for item in raw}
+    if tag == "B":
+        return raw
+    if tag == "BS":
+        return set(raw)
+    raise TypeError(f'unsupported DynamoDB type {tag}')
+
+
+def _string(value):
+    raw = value.get("S")
+    return deserialize_value(value) if raw is None else raw
+
+
+def _number(value):
+    raw = value.get("N")
+    return deserialize_value(value) if raw is None else to_number(raw)
+
+
+_CONVERTERS = {"S": _string, "N": _number}
+
+
+def compile_fields(fields):
+    """Build the field name -> converter table for a {name: type} mapping."""
+    return {name: _CONVERTERS.get(kind, deserialize_value) for name, kind in fields.items()}
+
+
+ORDER_CONVERTERS = compile_fields(ORDER_FIELDS)
+
+
+def deserialize_item(item, converters=ORDER_CONVERTERS):
+    get = converters.get
+    return {name: get(name, deserialize_value)(value) for name, value in item.items()}
+
+
+def deserialize_items(items, converters=ORDER_CONVERTERS):
+    """Convert a page of low-level items into a list of plain dicts."""
+    get = converters.get
+    return [
+        {name: get(name, deserialize_value)(value) for name, value in item.items()}
+        for item in items
+    ]
+
+
+def deserialize_columns(items, fields=ORDER_FIELDS):
+    """
+    Convert a page of low-level items into {field: [values...]} columns.
+
+    Every column has one entry per item; attributes missing from an item
+    are filled with None.
+    """
+    converters = compile_fields(fields)
+    columns = {name: [] for name in fields}
+    for item in items:
+        for name, convert in converters.items():
+            value = item.get(name)
+            columns[name].append(None if value is None else convert(value))
+    return columns
@@ -0,0 +1,23 @@
+"""Send parameters for the order queue when it is a FIFO queue.
+
+The stack deploys either a standard queue or, with `-c queueType=fifo`, a
+high-throughput FIFO queue whose name ends in ".fifo". FIFO messages are
+grouped by user: each user's orders are delivered and started in order,
+and throughput scales with the number of users instead of being capped
+per queue.
+
+Every message gets an explicit deduplication id, so a retried send is
+dropped while two identical orders from the same user are both kept.
+"""
+FIFO_SUFFIX = ".fifo"
+
+
+def is_fifo(queue_url):
+    return bool(queue_url) and queue_url.endswith(FIFO_SUFFIX)
+
+
+def message_parameters(queue_url, user_id, deduplication_id):
+    """MessageGroupId and MessageDeduplicationId for a FIFO queue, nothing otherwise."""
+    if not is_fifo(queue_url):
+        return {}
+    return {"MessageGroupId": user_id, "MessageDeduplicationId": deduplication_id}
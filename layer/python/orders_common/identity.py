@@ -0,0 +1,26 @@
+"""The user an AppSync request is made for.
+
+Orders are partitioned by user_id, so every handler takes it from the
+caller's identity: the `sub` of Cognito user pool and OIDC callers, the
+Cognito identity id of IAM callers signed in through an identity pool,
+and the user ARN of other IAM callers. API-key requests carry no identity
+and fall back to DEFAULT_USER_ID; an identity naming none of these is
+rejected rather than sharing that user's orders.
+"""
+import os
+
+DEFAULT_USER_ID = os.environ.get("DEFAULT_USER_ID", "demo_user")
+
+# The identity fields a user id is read from, first found wins.
+USER_ID_FIELDS = ("sub", "cognitoIdentityId", "userArn")
+
+
+def user_id(event):
+    """The caller's user id from an AppSync resolver event."""
+    identity = event.get("identity")
+    if not identity:
+        return DEFAULT_USER_ID
+    for field in USER_ID_FIELDS:
+        if identity.get(field):
+            return identity[field]
+    raise ValueError(f'no user id in the request identity, expected one of {", ".join(USER_ID_FIELDS)}')
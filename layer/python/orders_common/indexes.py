@@ -0,0 +1,22 @@
+"""Global secondary indexes of the ORDER table.
+
+STATUS_INDEX lists a user's orders sorted by statusCreatedAt,
+"<orderStatus>#<createdAt>", so the orders in one status are a
+begins_with range of the index, oldest first. It is partitioned by user
+like the table: a query only reads the caller's orders, and the writes
+spread over as many partitions as there are users. (Keying an index on
+orderStatus alone gives it a handful of hash values, and every order in a
+status lands on one partition.)
+RESTAURANT_INDEX lists a restaurant's orders, of every user, for
+restaurant dashboards, sorted the same way. Only restaurant staff may
+query it, see ordersByRestaurant in schema.graphql.
+
+Every write that sets orderStatus sets statusCreatedAt with it.
+"""
+STATUS_INDEX = "user_id-statusCreatedAt-index"
+RESTAURANT_INDEX = "restaurantId-statusCreatedAt-index"
+
+
+def status_created_at(order_status, created_at):
+    """Sort key of an order in STATUS_INDEX and RESTAURANT_INDEX."""
+    return f'{order_status}#{created_at}'
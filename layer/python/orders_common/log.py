@@ -0,0 +1,139 @@
+"""Structured, sampled JSON logging for the handlers.
+
+Every record is one JSON line on stdout. The level comes from LOG_LEVEL;
+LOG_SAMPLE_RATE is the fraction of invocations that log at DEBUG instead,
+so a small share of traffic carries full detail without the cost of
+logging it for every request. Payloads are described by their approximate
+size, never by their repr.
+"""
+import decimal
+import functools
+import logging
+import os
+import random
+import sys
+import time
+
+from orders_common import codec
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0"))
+
+_root = logging.getLogger("orders")
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            "timestamp": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return codec.dumps(entry)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at emit time."""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+
+def _configure():
+    if not _root.handlers:
+        handler = _StdoutHandler()
+        handler.setFormatter(JsonFormatter())
+        _root.addHandler(handler)
+        _root.propagate = False
+        _root.setLevel(LOG_LEVEL)
+
+
+class Logger:
+    """Thin wrapper taking structured fields as keyword arguments.
+
+    Disabled levels return before any field is built into a record.
+    """
+
+    def __init__(self, name):
+        _configure()
+        self._logger = _root.getChild(name)
+
+    def is_enabled(self, level):
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level, message, fields, exc_info=False):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, message, extra={"fields": fields}, exc_info=exc_info)
+
+    def debug(self, message, **fields):
+        self._log(logging.DEBUG, message, fields)
+
+    def info(self, message, **fields):
+        self._log(logging.INFO, message, fields)
+
+    def warning(self, message, **fields):
+        self._log(logging.WARNING, message, fields)
+
+    def error(self, message, **fields):
+        self._log(logging.ERROR, message, fields)
+
+    def exception(self, message, **fields):
+        self._log(logging.ERROR, message, fields, exc_info=True)
+
+
+def get_logger(name):
+    return Logger(name)
+
+
+def payload_size(obj):
+    """Approximate JSON size of `obj` in characters, without serializing it."""
+    if isinstance(obj, str):
+        return len(obj) + 2
+    if obj is None or isinstance(obj, bool):
+        return 5
+    if isinstance(obj, (int, float, decimal.Decimal)):
+        return len(str(obj))
+    if isinstance(obj, dict):
+        return 1 + sum(len(str(key)) + 4 + payload_size(value) for key, value in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return 1 + sum(payload_size(item) + 1 for item in obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj) * 4 // 3
+    return 0
+
+
+def start_invocation():
+    """Pick this invocation's level: DEBUG when sampled, LOG_LEVEL otherwise."""
+    sampled = LOG_SAMPLE_RATE > 0 and random.random() < LOG_SAMPLE_RATE
+    _root.setLevel(logging.DEBUG if sampled else LOG_LEVEL)
+    return sampled
+
+
+def log_invocation(handler):
+    """Decorate a Lambda handler: sample the log level and log the outcome."""
+    logger = get_logger(handler.__module__)
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        sampled = start_invocation()
+        started = time.perf_counter()
+        logger.debug("invocation started", event_bytes=payload_size(event), sampled=sampled)
+        try:
+            result = handler(event, context)
+        except Exception:
+            logger.exception("invocation failed", duration_ms=round((time.perf_counter() - started) * 1000, 2))
+            raise
+        logger.debug("invocation finished", duration_ms=round((time.perf_counter() - started) * 1000, 2),
+            result_bytes=payload_size(result))
+        return result
+
+    return wrapper
@@ -0,0 +1,164 @@
+"""CloudWatch Embedded Metric Format (EMF) instrumentation for the handlers.
+
+`instrument` wraps a handler and, once it returns, writes EMF records to
+stdout: the handler's Duration, ColdStart and Errors with the Function
+dimension, and one record per AWS operation called with the latency and
+DynamoDB consumed capacity of every call. CloudWatch extracts them as
+metrics, so per-function p50/p99 need no log parsing.
+
+AWS calls are timed by botocore event hooks that `register` installs on
+every client built through orders_common.clients.
+"""
+import functools
+import os
+import sys
+import threading
+import time
+
+from orders_common import codec
+
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "OrdersApp")
+FUNCTION_NAME = os.environ.get("AWS_LAMBDA_FUNCTION_NAME")
+# EMF accepts at most 100 values per metric in a single record.
+MAX_VALUES = 100
+
+_cold_start = True
+_invocation = None
+
+
+class Invocation:
+    """Metrics collected during one handler invocation, from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metrics = {}
+        self.calls = {}
+
+    def put(self, name, value, unit):
+        with self._lock:
+            self.metrics.setdefault(name, (unit, []))[1].append(value)
+
+    def record_call(self, service, operation, latency_ms, capacity, error):
+        with self._lock:
+            call = self.calls.setdefault((service, operation), {"latency": [], "capacity": [], "errors": 0})
+            call["latency"].append(latency_ms)
+            if capacity is not None:
+                call["capacity"].append(capacity)
+            call["errors"] += error
+
+
+def put_metric(name, value, unit="Count"):
+    """Add `value` to the current invocation's record; a no-op outside a handler."""
+    invocation = _invocation
+    if invocation is not None:
+        invocation.put(name, value, unit)
+
+
+def _emit(dimensions, metrics, properties):
+    """Write one EMF record per MAX_VALUES values of the longest metric."""
+    longest = max(len(values) for _, values in metrics.values())
+    for start in range(0, longest, MAX_VALUES):
+        chunk = {name: (unit, values[start:start + MAX_VALUES]) for name, (unit, values) in metrics.items()}
+        chunk = {name: (unit, values) for name, (unit, values) in chunk.items() if values}
+        record = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": NAMESPACE,
+                    "Dimensions": [list(dimensions)],
+                    "Metrics": [{"Name": name, "Unit": unit} for name, (unit, _) in chunk.items()],
+                }],
+            },
+        }
+        record.update(dimensions)
+        record.update(properties)
+        record.update({name: values[0] if len(values) == 1 else values for name, (_, values) in chunk.items()})
+        sys.stdout.write(codec.dumps(record) + "\n")
+
+
+def flush(invocation, function, properties=None):
+    properties = properties or {}
+    _emit({"Function": function}, invocation.metrics, properties)
+    for (service, operation), call in invocation.calls.items():
+        metrics = {"AwsCallLatency": ("Milliseconds", call["latency"]),
+                   "AwsCallErrors": ("Count", [call["errors"]])}
+        if call["capacity"]:
+            metrics["ConsumedCapacity"] = ("Count", call["capacity"])
+        _emit({"Function": function, "Service": service, "Operation": operation}, metrics, properties)
+
+
+def instrument(handler):
+    """Decorate a Lambda handler to emit its EMF records after every invocation."""
+    function = FUNCTION_NAME or handler.__module__
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        global _cold_start, _invocation
+        cold_start, _cold_start = _cold_start, False
+        invocation = _invocation = Invocation()
+        started = time.perf_counter()
+        failed = False
+        try:
+            return handler(event, context)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            _invocation = None
+            invocation.put("Duration", (time.perf_counter() - started) * 1000, "Milliseconds")
+            invocation.put("ColdStart", int(cold_start), "Count")
+            invocation.put("Errors", int(failed), "Count")
+            request_id = getattr(context, "aws_request_id", None)
+            flush(invocation, function, {"requestId": request_id} if request_id else None)
+
+    return wrapper
+
+
+def consumed_capacity(value):
+    """Total CapacityUnits of a ConsumedCapacity entry or list of entries."""
+    if isinstance(value, dict):
+        value = [value]
+    return sum(entry.get("CapacityUnits", 0) for entry in value)
+
+
+def _request_consumed_capacity(params, model, **kwargs):
+    if "ReturnConsumedCapacity" in model.input_shape.members:
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+
+def _start_call(model, context, **kwargs):
+    # after-call-error carries no operation model, so the call is kept in its
+    # context. before-parameter-build is used rather than before-call, which
+    # stops at the first handler that returns a response (stubs, caches).
+    context["metrics_call"] = (str(model.service_model.service_id), model.name, time.perf_counter())
+
+
+def _record_call(context, parsed=None, failed=False):
+    call = context.get("metrics_call")
+    invocation = _invocation
+    if call is None or invocation is None:
+        return
+    service, operation, started = call
+    capacity = None
+    if isinstance(parsed, dict) and parsed.get("ConsumedCapacity"):
+        capacity = consumed_capacity(parsed["ConsumedCapacity"])
+    invocation.record_call(service, operation, (time.perf_counter() - started) * 1000, capacity, int(failed))
+
+
+def _after_call(http_response, parsed, context, **kwargs):
+    _record_call(context, parsed, failed=http_response.status_code >= 300)
+
+
+def _after_call_error(context, **kwargs):
+    _record_call(context, failed=True)
+
+
+def register(client):
+    """Time every call `client` makes and, for DynamoDB, ask for consumed capacity."""
+    events = client.meta.events
+    if client.meta.service_model.service_name == "dynamodb":
+        events.register_last("before-parameter-build.dynamodb", _request_consumed_capacity)
+    events.register("before-parameter-build", _start_call)
+    events.register("after-call", _after_call)
+    events.register("after-call-error", _after_call_error)
+    return client
@@ -0,0 +1,39 @@
+"""Single-page DynamoDB queries returned as GraphQL connections.
+
+A connection is {"items": [...], "nextToken": str | None}; the token is an
+opaque, url-safe encoding of DynamoDB's LastEvaluatedKey.
+"""
+import base64
+import json
+
+from orders_common.deserialize import deserialize_items
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_token(last_evaluated_key):
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_token(next_token):
+    try:
+        return json.loads(base64.urlsafe_b64decode(next_token.encode()))
+    except (ValueError, TypeError) as error:
+        raise ValueError(f'invalid nextToken: {next_token}') from error
+
+
+def query_page(dynamo_client, params, limit=DEFAULT_PAGE_SIZE, next_token=None):
+    """Run the Query `params` for one page of at most `limit` items."""
+    params = dict(params, Limit=max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)))
+    if next_token:
+        params["ExclusiveStartKey"] = decode_token(next_token)
+
+    response = dynamo_client.query(**params)
+    return {
+        "items": deserialize_items(response['Items']),
+        "nextToken": encode_token(response.get('LastEvaluatedKey'))
+    }
@@ -0,0 +1,17 @@
+"""How long finished orders stay in the ORDER table.
+
+Orders that reach SUCCESS or FAILED get an `expiresAt` epoch
+ORDER_RETENTION_DAYS after they finish; DynamoDB's time to live then
+deletes them in the background, so queries and scans only see recent
+orders. Pending orders never expire.
+"""
+import os
+import time
+
+TTL_ATTRIBUTE = "expiresAt"
+ORDER_RETENTION_DAYS = float(os.environ.get("ORDER_RETENTION_DAYS", "30"))
+
+
+def expires_at(now=None):
+    """The TTL epoch, in seconds, of an order finishing at `now`."""
+    return int((time.time() if now is None else now) + ORDER_RETENTION_DAYS * 86400)
@@ -0,0 +1,18 @@
+"""Backoff between retries of the unprocessed part of a DynamoDB batch call.
+
+BatchGetItem and BatchWriteItem return what they could not process under
+throttling instead of failing, and the caller retries it. Waits grow
+exponentially up to BACKOFF_CAP_SECONDS, and callers give up after
+MAX_ATTEMPTS calls.
+"""
+import random
+import time
+
+MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 0.05
+BACKOFF_CAP_SECONDS = 2.0
+
+
+def backoff(attempt):
+    # Full jitter: spread retries of throttled items instead of retrying in lockstep.
+    time.sleep(random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)))
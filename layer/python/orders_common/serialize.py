@@ -0,0 +1,28 @@
+"""Conversion of plain Python values into low-level DynamoDB attribute values.
+
+The inverse of orders_common.deserialize, for use with low-level clients.
+"""
+import decimal
+
+
+def serialize_value(value):
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, float, decimal.Decimal)):
+        return {"N": str(value)}
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, dict):
+        return {"M": {key: serialize_value(item) for key, item in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {"L": [serialize_value(item) for item in value]}
+    if isinstance(value, (bytes, bytearray)):
+        return {"B": bytes(value)}
+    raise TypeError(f'cannot serialize {type(value).__name__} to a DynamoDB value')
+
+
+def serialize_item(item):
+    """Convert a plain dict into a low-level item."""
+    return {key: serialize_value(value) for key, value in item.items()}
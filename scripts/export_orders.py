@@ -0,0 +1,92 @@
+"""Export every order as newline-delimited JSON with a parallel scan.
+
+An admin and reporting tool, not a deployed handler:
+
+    python scripts/export_orders.py --table ORDER --segments 8 --output orders.ndjson
+"""
+import argparse
+import boto3
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "layer", "python"))
+
+from orders_common import codec  # noqa: E402
+from orders_common.deserialize import deserialize_items  # noqa: E402
+
+TABLE_NAME = os.environ.get("ORDER_TABLE")
+DEFAULT_SEGMENTS = 8
+
+def to_json_lines(items):
+    return "".join(codec.dumps(item) + "\n" for item in deserialize_items(items))
+
+def default_client_factory(endpoint_url=None):
+    return boto3.session.Session().client("dynamodb", endpoint_url=endpoint_url)
+
+def scan_segment(table_name, segment, total_segments, out, lock, client_factory=default_client_factory):
+    '''
+    Scan one segment page by page and stream every page to `out`.
+
+    Each worker builds its own client: boto3 clients are thread safe, but a
+    dedicated one keeps the workers from sharing a single connection pool.
+    Only one page is held in memory at a time.
+    '''
+    client = client_factory()
+    params = {
+        "TableName": table_name,
+        "Segment": segment,
+        "TotalSegments": total_segments
+    }
+    count = 0
+    while True:
+        response = client.scan(**params)
+        lines = to_json_lines(response['Items'])
+        with lock:
+            out.write(lines)
+        count += len(response['Items'])
+
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            return count
+        params["ExclusiveStartKey"] = last_evaluated_key
+
+def export_orders(table_name, out, total_segments=DEFAULT_SEGMENTS, client_factory=default_client_factory):
+    '''
+    Export the whole table as newline-delimited JSON using a parallel scan.
+
+    Returns the number of exported items. Line order across segments is not
+    deterministic.
+    '''
+    lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=total_segments) as executor:
+        futures = [
+            executor.submit(scan_segment, table_name, segment, total_segments, out, lock, client_factory)
+            for segment in range(total_segments)
+        ]
+        return sum(future.result() for future in futures)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export all orders as newline-delimited JSON.")
+    parser.add_argument("--table", default=TABLE_NAME or "ORDER")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS)
+    parser.add_argument("--output", default="-", help="output file, '-' for stdout")
+    parser.add_argument("--endpoint-url", default=None)
+    args = parser.parse_args(argv)
+
+    def client_factory():
+        return default_client_factory(args.endpoint_url)
+
+    if args.output == "-":
+        count = export_orders(args.table, sys.stdout, args.segments, client_factory)
+    else:
+        with open(args.output, "w") as out:
+            count = export_orders(args.table, out, args.segments, client_factory)
+    print(f'exported {count} orders from {args.table}', file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
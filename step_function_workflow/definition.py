@@ -0,0 +1,54 @@
+"""Render the order workflow's Amazon States Language definition.
+
+Kept free of CDK imports so the local interpreter can render the same
+definition the stack deploys, with its own resource ARNs.
+"""
+import functools
+import os
+from string import Template
+
+WORKFLOW_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# Express executions run synchronously for the SQS consumer, so they retry
+# InitializeOrder on a shorter schedule than standard executions.
+RETRY_POLICIES = {
+    "STANDARD": {"RetryIntervalSeconds": 2, "RetryMaxAttempts": 6},
+    "EXPRESS": {"RetryIntervalSeconds": 1, "RetryMaxAttempts": 3},
+}
+
+
+# "lambda" runs every task in a Lambda function; "sdk" calls DynamoDB
+# straight from the workflow and keeps only ProcessPayment as a Lambda.
+INTEGRATIONS = ("lambda", "sdk")
+
+WORKFLOWS = {
+    "lambda": "workflow.json",
+    "sdk": "workflow_sdk.json",
+}
+
+
+def retention_seconds(days):
+    """The SDK workflow's RetentionSeconds, for ORDER_RETENTION_DAYS `days`."""
+    return round(float(days) * 86400)
+
+
+@functools.lru_cache(maxsize=None)
+def _template(name):
+    with open(os.path.join(WORKFLOW_DIR, name), 'r') as file:
+        return Template(file.read())
+
+
+def render_workflow(integration="lambda", state_machine_type="STANDARD", **substitutions):
+    """Return the definition for `integration`, with `substitutions` filled in.
+
+    workflow.json takes InitializeOrderArn, ProcessPaymentArn,
+    CompleteOrderArn and CancelFailedOrderArn; workflow_sdk.json takes
+    ProcessPaymentArn, TableName and RetentionSeconds.
+    """
+    if state_machine_type not in RETRY_POLICIES:
+        raise ValueError(f'unsupported state machine type {state_machine_type}')
+    if integration not in INTEGRATIONS:
+        raise ValueError(f'unsupported workflow integration {integration}')
+
+    return _template(WORKFLOWS[integration]).substitute(dollar="$", **RETRY_POLICIES[state_machine_type], **substitutions)
@@ -0,0 +1,562 @@
+"""In-process interpreter for the order workflow's Amazon States Language.
+
+Runs the definition rendered by `render_workflow` without deploying it.
+Task states are dispatched to local callables, by default the handler
+modules in ``lambdas/`` bound to placeholder ARNs, and every state records
+its duration and the size of the JSON it received and passed on.
+
+Only the subset of ASL the workflows use is supported: Task, Choice, Pass,
+Wait, Succeed and Fail states; InputPath, Parameters, ResultSelector,
+ResultPath and OutputPath; Retry and Catch; and the States.Format,
+States.JsonToString, States.StringToJson and States.Array intrinsics.
+Paths are plain dotted/indexed references such as ``$.saveResults.id``.
+Task states may set QueryLanguage to JSONata: their Arguments and Output
+take ``{% %}`` expressions made of ``$states`` paths, literals, the ``&``
+and arithmetic operators, and the $string, $number, $floor and $toMillis
+functions.
+
+Retry back-off is not slept through by default: the waits are added up in
+``Execution.simulated_wait_seconds`` so a run takes milliseconds.
+"""
+import dataclasses
+import datetime
+import importlib
+import json
+import math
+import re
+import time
+import uuid
+
+from step_function_workflow.definition import render_workflow, retention_seconds
+
+# Task functions bound by local_workflow, by the workflow's substitution name.
+LOCAL_FUNCTIONS = {
+    "InitializeOrderArn": "initialize_order",
+    "ProcessPaymentArn": "process_payment",
+    "CompleteOrderArn": "complete_order",
+    "CancelFailedOrderArn": "cancel_failed_order",
+}
+
+LAMBDA_INVOKE = "arn:aws:states:::lambda:invoke"
+_SERVICE_INTEGRATION = re.compile(r"^arn:aws:states:::(?:aws-sdk:)?([a-z0-9]+):([A-Za-z0-9]+)$")
+_PATH_TOKEN = re.compile(r"\.([^.\[]+)|\[(\d+)\]")
+
+
+class StatesError(Exception):
+    """A named Step Functions error, matched by Retry and Catch ErrorEquals."""
+
+    def __init__(self, error, cause=""):
+        super().__init__(f'{error}: {cause}')
+        self.error = error
+        self.cause = cause
+
+
+@dataclasses.dataclass
+class StateRun:
+    name: str
+    type: str
+    duration_ms: float = 0.0
+    input_bytes: int = 0
+    output_bytes: int = 0
+    attempts: int = 1
+
+
+@dataclasses.dataclass
+class Execution:
+    status: str
+    output: object = None
+    error: str = None
+    cause: str = None
+    states: list = dataclasses.field(default_factory=list)
+    simulated_wait_seconds: float = 0.0
+
+    @property
+    def duration_ms(self):
+        return sum(state.duration_ms for state in self.states)
+
+
+def _encode(data):
+    # Every transition is a JSON document, so states never share objects.
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+
+def get_path(data, path):
+    if path == "$":
+        return data
+    if not path.startswith("$"):
+        raise StatesError("States.Runtime", f'invalid path {path}')
+    value = data
+    for key, index in _PATH_TOKEN.findall(path[1:]):
+        try:
+            value = value[key] if key else value[int(index)]
+        except (KeyError, IndexError, TypeError):
+            raise StatesError("States.Runtime", f'path {path} not found in input')
+    return value
+
+
+def set_path(data, path, value):
+    """Return `data` with `value` written at `path`, as ResultPath does."""
+    if path is None:
+        return data
+    if path == "$":
+        return value
+    keys = [key for key, _ in _PATH_TOKEN.findall(path[1:])]
+    if not path.startswith("$.") or not all(keys):
+        raise StatesError("States.Runtime", f'unsupported ResultPath {path}')
+    result = dict(data) if isinstance(data, dict) else {}
+    target = result
+    for key in keys[:-1]:
+        target[key] = dict(target[key]) if isinstance(target.get(key), dict) else {}
+        target = target[key]
+    target[keys[-1]] = value
+    return result
+
+
+def _split_arguments(text):
+    arguments, depth, quoted, current = [], 0, False, ""
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if quoted:
+            if char == "\\" and index + 1 < len(text):
+                current += text[index + 1]
+                index += 2
+                continue
+            if char == "'":
+                quoted = False
+            current += char
+        elif char == "'":
+            quoted = True
+            current += char
+        elif char == "(":
+            depth += 1
+            current += char
+        elif char == ")":
+            depth -= 1
+            current += char
+        elif char == "," and depth == 0:
+            arguments.append(current.strip())
+            current = ""
+        else:
+            current += char
+        index += 1
+    if current.strip():
+        arguments.append(current.strip())
+    return arguments
+
+
+def _format(value):
+    return value if isinstance(value, str) else _encode(value)
+
+
+INTRINSICS = {
+    "States.Format": lambda template, *values: _fill(template, values),
+    "States.JsonToString": lambda value: _encode(value),
+    "States.StringToJson": lambda value: json.loads(value),
+    "States.Array": lambda *values: list(values),
+}
+
+
+def _fill(template, values):
+    parts = template.split("{}")
+    if len(parts) != len(values) + 1:
+        raise StatesError("States.IntrinsicFailure", f'{template!r} expects {len(parts) - 1} arguments')
+    return "".join(part + (_format(values[index]) if index < len(values) else "")
+        for index, part in enumerate(parts))
+
+
+def evaluate(expression, data, context):
+    """Value of a ``.$`` field: a path, a context path or an intrinsic call."""
+    expression = expression.strip()
+    if expression.startswith("$$"):
+        return get_path(context, expression[1:])
+    if expression.startswith("$"):
+        return get_path(data, expression)
+    if expression.startswith("'") and expression.endswith("'"):
+        return expression[1:-1]
+    name, _, rest = expression.partition("(")
+    if name in INTRINSICS and rest.endswith(")"):
+        arguments = [evaluate(argument, data, context) if not _is_literal(argument) else json.loads(argument)
+            for argument in _split_arguments(rest[:-1])]
+        return INTRINSICS[name](*arguments)
+    raise StatesError("States.Runtime", f'unsupported expression {expression}')
+
+
+def _is_literal(argument):
+    return re.fullmatch(r"-?\d+(\.\d+)?|true|false|null", argument) is not None
+
+
+def apply_template(template, data, context):
+    """Resolve a Parameters or ResultSelector template against `data`."""
+    if isinstance(template, dict):
+        return {key[:-2] if key.endswith(".$") else key:
+                evaluate(value, data, context) if key.endswith(".$") else apply_template(value, data, context)
+            for key, value in template.items()}
+    if isinstance(template, list):
+        return [apply_template(value, data, context) for value in template]
+    return template
+
+
+# Numbers, quoted strings, names (functions and variables start with $) and symbols.
+_JSONATA_TOKEN = re.compile(r"\s*(?:(?P<number>\d+(?:\.\d+)?)|'(?P<single>[^']*)'|\"(?P<double>[^\"]*)\""
+    r"|(?P<name>\$?[A-Za-z_][A-Za-z0-9_]*)|(?P<symbol>\S))")
+
+
+def _jsonata_string(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return value if isinstance(value, str) else _encode(value)
+
+
+def _to_millis(timestamp):
+    parsed = datetime.datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    return int(parsed.timestamp() * 1000)
+
+
+JSONATA_FUNCTIONS = {
+    "$string": _jsonata_string,
+    "$number": float,
+    "$floor": math.floor,
+    "$toMillis": _to_millis,
+}
+
+_JSONATA_OPERATORS = {
+    "&": lambda left, right: _jsonata_string(left) + _jsonata_string(right),
+    "+": lambda left, right: left + right,
+    "-": lambda left, right: left - right,
+    "*": lambda left, right: left * right,
+    "/": lambda left, right: left / right,
+}
+
+
+class _Jsonata:
+    """Recursive descent over the JSONata subset in the module docstring."""
+
+    LEVELS = (("&",), ("+", "-"), ("*", "/"))
+
+    def __init__(self, expression, variables):
+        self.tokens = [(match.lastgroup, match.group(match.lastgroup))
+            for match in _JSONATA_TOKEN.finditer(expression.strip())]
+        self.position = 0
+        self.variables = variables
+
+    def _peek(self):
+        kind, text = self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+        return text if kind == "symbol" else None
+
+    def _next(self):
+        if self.position == len(self.tokens):
+            raise StatesError("States.QueryEvaluationError", "incomplete JSONata expression")
+        self.position += 1
+        return self.tokens[self.position - 1]
+
+    def _expect(self, symbol):
+        if self._next() != ("symbol", symbol):
+            raise StatesError("States.QueryEvaluationError", f'expected {symbol!r} in JSONata expression')
+
+    def evaluate(self):
+        value = self._binary(self.LEVELS)
+        if self.position != len(self.tokens):
+            raise StatesError("States.QueryEvaluationError", "unsupported JSONata expression")
+        return value
+
+    def _binary(self, levels):
+        if not levels:
+            return self._primary()
+        value = self._binary(levels[1:])
+        while self._peek() in levels[0]:
+            operator = self._next()[1]
+            value = _JSONATA_OPERATORS[operator](value, self._binary(levels[1:]))
+        return value
+
+    def _primary(self):
+        kind, text = self._next()
+        if kind == "number":
+            return float(text) if "." in text else int(text)
+        if kind in ("single", "double"):
+            return text
+        if (kind, text) == ("symbol", "("):
+            value = self._binary(self.LEVELS)
+            self._expect(")")
+            return value
+        if text in JSONATA_FUNCTIONS and self._peek() == "(":
+            self._next()
+            arguments = []
+            while self._peek() != ")":
+                arguments.append(self._binary(self.LEVELS))
+                if self._peek() == ",":
+                    self._next()
+            self._expect(")")
+            return JSONATA_FUNCTIONS[text](*arguments)
+        if kind == "name" and text.startswith("$") and text[1:] in self.variables:
+            value = self.variables[text[1:]]
+            while self._peek() == ".":
+                self._next()
+                field = self._next()[1]
+                try:
+                    value = value[field]
+                except (KeyError, TypeError):
+                    raise StatesError("States.QueryEvaluationError", f'{text} has no field {field}')
+            return value
+        raise StatesError("States.QueryEvaluationError", f'unsupported JSONata token {text}')
+
+
+def evaluate_jsonata(expression, variables):
+    """Value of a JSONata expression, given its ``$`` variables without the ``$``."""
+    return _Jsonata(expression, variables).evaluate()
+
+
+def apply_jsonata(template, variables):
+    """Resolve an Arguments or Output template: ``{% %}`` strings are evaluated."""
+    if isinstance(template, dict):
+        return {key: apply_jsonata(value, variables) for key, value in template.items()}
+    if isinstance(template, list):
+        return [apply_jsonata(value, variables) for value in template]
+    if isinstance(template, str) and template.startswith("{%") and template.endswith("%}"):
+        return evaluate_jsonata(template[2:-2], variables)
+    return template
+
+
+def _string_matches(value, pattern):
+    return re.fullmatch(".*".join(re.escape(part) for part in pattern.split("*")), value) is not None
+
+
+COMPARISONS = {
+    "StringEquals": lambda value, expected: value == expected,
+    "StringMatches": _string_matches,
+    "NumericEquals": lambda value, expected: value == expected,
+    "NumericLessThan": lambda value, expected: value < expected,
+    "NumericLessThanEquals": lambda value, expected: value <= expected,
+    "NumericGreaterThan": lambda value, expected: value > expected,
+    "NumericGreaterThanEquals": lambda value, expected: value >= expected,
+    "BooleanEquals": lambda value, expected: value is expected,
+    "IsNull": lambda value, expected: (value is None) is expected,
+}
+
+
+def choice_matches(rule, data):
+    if "And" in rule:
+        return all(choice_matches(child, data) for child in rule["And"])
+    if "Or" in rule:
+        return any(choice_matches(child, data) for child in rule["Or"])
+    if "Not" in rule:
+        return not choice_matches(rule["Not"], data)
+    if "IsPresent" in rule:
+        try:
+            get_path(data, rule["Variable"])
+        except StatesError:
+            return not rule["IsPresent"]
+        return rule["IsPresent"]
+    value = get_path(data, rule["Variable"])
+    for operator, compare in COMPARISONS.items():
+        if operator in rule:
+            return compare(value, rule[operator])
+        if operator + "Path" in rule:
+            return compare(value, get_path(data, rule[operator + "Path"]))
+    raise StatesError("States.Runtime", f'unsupported choice rule {sorted(rule)}')
+
+
+def _error_matches(error, error_equals):
+    return error in error_equals or "States.ALL" in error_equals or \
+        ("States.TaskFailed" in error_equals and error != "States.Timeout")
+
+
+class LocalStateMachine:
+    """Executes an ASL definition, dispatching Task resources to callables.
+
+    `functions` maps a Task Resource ARN, or a lambda:invoke FunctionName,
+    to a callable taking the task input. `sdk_client`, a callable returning
+    a boto3 client for a service name, serves ``arn:aws:states:::<service>:<action>``
+    integrations. `sleep` receives every Retry and Wait delay; by default
+    the delays are only added up.
+    """
+
+    def __init__(self, definition, functions=None, sdk_client=None, sleep=None):
+        self.definition = json.loads(definition) if isinstance(definition, str) else definition
+        self.functions = dict(functions or {})
+        self.sdk_client = sdk_client
+        self.sleep = sleep
+
+    def _wait(self, execution, seconds):
+        execution.simulated_wait_seconds += seconds
+        if self.sleep:
+            self.sleep(seconds)
+
+    def _call_function(self, name, payload):
+        try:
+            function = self.functions[name]
+        except KeyError:
+            raise StatesError("States.Runtime", f'no local function bound to {name}')
+        try:
+            return function(payload)
+        except StatesError:
+            raise
+        except Exception as error:
+            # Like Lambda, the error name is the exception's type.
+            raise StatesError(type(error).__name__, str(error))
+
+    def _call_service(self, service, action, parameters):
+        if self.sdk_client is None:
+            raise StatesError("States.Runtime", f'no sdk_client for {service}:{action}')
+        client = self.sdk_client(service)
+        operation = re.sub(r"(?<!^)(?=[A-Z])", "_", action).lower()
+        try:
+            response = getattr(client, operation)(**parameters)
+        except client.exceptions.ClientError as error:
+            raise StatesError(f'{client.meta.service_model.service_id}.{error.response["Error"]["Code"]}', str(error))
+        response.pop("ResponseMetadata", None)
+        return response
+
+    def _invoke(self, resource, task_input):
+        if resource == LAMBDA_INVOKE:
+            payload = task_input.get("Payload", {}) if isinstance(task_input, dict) else {}
+            return {"ExecutedVersion": "$LATEST", "StatusCode": 200,
+                    "Payload": self._call_function(task_input["FunctionName"], payload)}
+        if resource in self.functions:
+            return self._call_function(resource, task_input)
+        integration = _SERVICE_INTEGRATION.match(resource)
+        if integration:
+            return self._call_service(integration.group(1), integration.group(2), task_input)
+        raise StatesError("States.Runtime", f'unsupported resource {resource}')
+
+    def _run_task(self, state, effective_input, context, execution, run):
+        retriers = state.get("Retry", [])
+        attempts = [0] * len(retriers)
+        while True:
+            try:
+                return self._invoke(state["Resource"], effective_input)
+            except StatesError as error:
+                # Only the first retrier matching the error applies.
+                index = next((index for index, retrier in enumerate(retriers)
+                    if _error_matches(error.error, retrier["ErrorEquals"])), None)
+                if index is None or attempts[index] >= retriers[index].get("MaxAttempts", 3):
+                    raise
+                retrier = retriers[index]
+                self._wait(execution, retrier.get("IntervalSeconds", 1) * retrier.get("BackoffRate", 2.0) ** attempts[index])
+                attempts[index] += 1
+                context["State"]["RetryCount"] += 1
+                run.attempts += 1
+
+    def _step(self, state, data, context, execution, run):
+        """Run one state; return its output and the next state name, or None."""
+        kind = state["Type"]
+        if kind == "Choice":
+            for rule in state.get("Choices", []):
+                if choice_matches(rule, data):
+                    return data, rule["Next"]
+            if "Default" not in state:
+                raise StatesError("States.NoChoiceMatched", f'no choice matched in {context["State"]["Name"]}')
+            return data, state["Default"]
+        if kind == "Fail":
+            raise StatesError(state.get("Error", "States.Fail"), state.get("Cause", ""))
+        if kind == "Succeed":
+            return data, None
+        if kind == "Wait":
+            if "Seconds" in state:
+                self._wait(execution, state["Seconds"])
+            elif "SecondsPath" in state:
+                self._wait(execution, get_path(data, state["SecondsPath"]))
+            else:
+                raise StatesError("States.Runtime", "only Seconds and SecondsPath waits are supported")
+            return data, None if state.get("End") else state["Next"]
+
+        if state.get("QueryLanguage", self.definition.get("QueryLanguage")) == "JSONata":
+            return self._step_jsonata(state, data, context, execution, run)
+        effective_input = get_path(data, state.get("InputPath", "$")) if state.get("InputPath", "$") is not None else {}
+        if "Parameters" in state:
+            effective_input = apply_template(state["Parameters"], effective_input, context)
+
+        if kind == "Task":
+            try:
+                result = self._run_task(state, effective_input, context, execution, run)
+            except StatesError as error:
+                for catcher in state.get("Catch", []):
+                    if _error_matches(error.error, catcher["ErrorEquals"]):
+                        return set_path(data, catcher.get("ResultPath", "$"),
+                            {"Error": error.error, "Cause": error.cause}), catcher["Next"]
+                raise
+        elif kind == "Pass":
+            result = state.get("Result", effective_input)
+        else:
+            raise StatesError("States.Runtime", f'unsupported state type {kind}')
+
+        if "ResultSelector" in state:
+            result = apply_template(state["ResultSelector"], result, context)
+        output = set_path(data, state.get("ResultPath", "$"), result)
+        if state.get("OutputPath", "$") != "$":
+            output = get_path(output, state["OutputPath"]) if state["OutputPath"] is not None else {}
+        return output, None if state.get("End") else state["Next"]
+
+    def _step_jsonata(self, state, data, context, execution, run):
+        if state["Type"] != "Task":
+            raise StatesError("States.Runtime", f'unsupported JSONata state type {state["Type"]}')
+        variables = {"states": {"input": data, "context": context}}
+        task_input = apply_jsonata(state.get("Arguments", data), variables)
+        try:
+            variables["states"]["result"] = self._run_task(state, task_input, context, execution, run)
+        except StatesError as error:
+            for catcher in state.get("Catch", []):
+                if _error_matches(error.error, catcher["ErrorEquals"]):
+                    variables["states"]["errorOutput"] = {"Error": error.error, "Cause": error.cause}
+                    return apply_jsonata(catcher.get("Output", "{% $states.errorOutput %}"), variables), catcher["Next"]
+            raise
+        output = apply_jsonata(state.get("Output", "{% $states.result %}"), variables)
+        return output, None if state.get("End") else state["Next"]
+
+    def execute(self, execution_input, name=None):
+        name = name or str(uuid.uuid4())
+        text = _encode(execution_input)
+        data = json.loads(text)
+        execution = Execution(status="RUNNING")
+        context = {"Execution": {"Id": f'local:{name}', "Name": name, "Input": data, "StartTime": _timestamp()}}
+        state_name = self.definition["StartAt"]
+        while state_name is not None:
+            state = self.definition["States"][state_name]
+            context["State"] = {"Name": state_name, "EnteredTime": _timestamp(), "RetryCount": 0}
+            run = StateRun(name=state_name, type=state["Type"], input_bytes=len(text.encode()))
+            execution.states.append(run)
+            started = time.perf_counter()
+            try:
+                data, state_name = self._step(state, data, context, execution, run)
+            except StatesError as error:
+                run.duration_ms = (time.perf_counter() - started) * 1000
+                execution.status, execution.error, execution.cause = "FAILED", error.error, error.cause
+                return execution
+            run.duration_ms = (time.perf_counter() - started) * 1000
+            text = _encode(data)
+            run.output_bytes = len(text.encode())
+            data = json.loads(text)
+        execution.status, execution.output = "SUCCEEDED", data
+        return execution
+
+
+def _timestamp():
+    # The context object's format: UTC, milliseconds, a Z suffix.
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def local_arn(module):
+    return f'arn:aws:lambda:local:000000000000:function:{module}'
+
+
+class _LocalHandler:
+    """Imports a handler module on first call; ``lambdas/`` must be importable."""
+
+    def __init__(self, module):
+        self.module = module
+        self._handler = None
+
+    def __call__(self, event):
+        if self._handler is None:
+            self._handler = importlib.import_module(self.module).handler
+        return self._handler(event, None)
+
+
+def local_workflow(integration="lambda", state_machine_type="STANDARD", table_name="ORDER",
+        sdk_client=None, sleep=None, retention_days=30):
+    """The deployed workflow, with every Lambda task bound to its local handler."""
+    arns = {key: local_arn(module) for key, module in LOCAL_FUNCTIONS.items()}
+    definition = render_workflow(integration, state_machine_type, TableName=table_name,
+        RetentionSeconds=retention_seconds(retention_days), **arns)
+    functions = {local_arn(module): _LocalHandler(module) for module in LOCAL_FUNCTIONS.values()}
+    return LocalStateMachine(definition, functions, sdk_client=sdk_client, sleep=sleep)
@@ -0,0 +1,13 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Handlers are deployed as standalone modules, so import them the same way.
+sys.path.insert(0, os.path.join(ROOT, "lambdas"))
+sys.path.insert(0, os.path.join(ROOT, "layer", "python"))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("ORDER_TABLE", "ORDER")
@@ -0,0 +1,44 @@
+import gzip
+import json
+
+from botocore.stub import ANY, Stubber
+
+from orders_common import clients
+
+import archive_orders
+
+TTL_IDENTITY = {"type": "Service", "principalId": "dynamodb.amazonaws.com"}
+
+
+def record(sequence, order_id, event_name="REMOVE", identity=TTL_IDENTITY):
+    return {
+        "eventName": event_name,
+        "userIdentity": identity,
+        "dynamodb": {
+            "ApproximateCreationDateTime": 1667304000,
+            "SequenceNumber": sequence,
+            "OldImage": {"user_id": {"S": "demo_user"}, "id": {"S": order_id}, "quantity": {"N": "2"},
+                         "orderStatus": {"S": "SUCCESS"}, "expiresAt": {"N": "1667304000"}},
+        },
+    }
+
+
+def test_expired_orders_are_archived_as_gzipped_json_lines(monkeypatch):
+    monkeypatch.setattr(archive_orders, "ARCHIVE_BUCKET", "archive")
+    records = [record("100", "order-1"), record("101", "order-2", identity=None), record("102", "order-3")]
+    with Stubber(clients.client("s3")) as stubber:
+        stubber.add_response("put_object", {}, {"Bucket": "archive", "Key": "expired-orders/2022/11/01/100-102.ndjson.gz",
+            "Body": ANY, "ContentType": "application/gzip"})
+        result = archive_orders.handler({"Records": records}, None)
+
+    assert result == {"archived": 2}
+    orders = archive_orders.to_archive([archive_orders.deserialize_item(r["dynamodb"]["OldImage"]) for r in records[::2]])
+    lines = gzip.decompress(orders).decode().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["order-1", "order-3"]
+    assert archive_orders.to_archive([{"id": "a"}]) == archive_orders.to_archive([{"id": "a"}])
+
+
+def test_batches_without_expiries_write_nothing():
+    result = archive_orders.handler({"Records": [record("100", "order-1", event_name="MODIFY")]}, None)
+
+    assert result == {"archived": 0}
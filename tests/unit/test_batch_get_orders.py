@@ -0,0 +1,71 @@
+from botocore.stub import Stubber
+
+from orders_common import clients
+
+import batch_get_orders
+
+
+def key(order_id, user_id="demo_user"):
+    return {"user_id": {"S": user_id}, "id": {"S": order_id}}
+
+
+def item(order_id, quantity):
+    return {"id": {"S": order_id}, "name": {"S": "pizza"}, "quantity": {"N": str(quantity)}}
+
+
+def request(keys):
+    return {"RequestItems": {"ORDER": {
+        "Keys": keys,
+        "ProjectionExpression": batch_get_orders.PROJECTION_EXPRESSION,
+        "ExpressionAttributeNames": batch_get_orders.PROJECTION_NAMES
+    }}}
+
+
+def test_batch_invoke_retries_unprocessed_keys_and_keeps_request_order(monkeypatch):
+    monkeypatch.setattr(batch_get_orders, "backoff", lambda attempt: None)
+    events = [
+        {"arguments": {"ids": ["b", "missing", "a"]}},
+        {"arguments": {"ids": ["a"]}},
+    ]
+    with Stubber(clients.client("dynamodb")) as stubber:
+        stubber.add_response("batch_get_item", {
+            "Responses": {"ORDER": [item("a", 1)]},
+            "UnprocessedKeys": {"ORDER": {"Keys": [key("b")]}}
+        }, request([key("b"), key("missing"), key("a")]))
+        stubber.add_response("batch_get_item", {
+            "Responses": {"ORDER": [item("b", 2)]}
+        }, {"RequestItems": {"ORDER": {"Keys": [key("b")]}}})
+        results = batch_get_orders.handler(events, None)
+
+    assert results == [
+        [{"id": "b", "name": "pizza", "quantity": 2}, None, {"id": "a", "name": "pizza", "quantity": 1}],
+        [{"id": "a", "name": "pizza", "quantity": 1}],
+    ]
+
+
+def test_keys_are_chunked_by_one_hundred():
+    ids = [f'order-{n}' for n in range(150)]
+    with Stubber(clients.client("dynamodb")) as stubber:
+        stubber.add_response("batch_get_item", {"Responses": {"ORDER": []}},
+            request([key(order_id) for order_id in ids[:100]]))
+        stubber.add_response("batch_get_item", {"Responses": {"ORDER": []}},
+            request([key(order_id) for order_id in ids[100:]]))
+        result = batch_get_orders.handler({"arguments": {"ids": ids}}, None)
+
+    assert result == [None] * 150
+
+
+def test_contexts_of_different_callers_read_their_own_partitions():
+    events = [
+        {"arguments": {"ids": ["a"]}, "identity": {"sub": "user-1"}},
+        {"arguments": {"ids": ["a"]}, "identity": None},
+        {"arguments": {"ids": ["b"]}, "identity": {"sub": "user-1"}},
+    ]
+    with Stubber(clients.client("dynamodb")) as stubber:
+        stubber.add_response("batch_get_item", {"Responses": {"ORDER": [item("a", 1)]}},
+            request([key("a", "user-1"), key("b", "user-1")]))
+        stubber.add_response("batch_get_item", {"Responses": {"ORDER": [item("a", 2)]}},
+            request([key("a")]))
+        results = batch_get_orders.handler(events, None)
+
+    assert [[order and order["quantity"] for order in orders] for orders in results] == [[1], [2], [None]]
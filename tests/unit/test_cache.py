@@ -0,0 +1,92 @@
+from botocore.stub import Stubber
+
+from lambdas_data_source import functions
+from orders_common import clients
+
+import delete_orders
+import get_single_order
+import update_order
+
+IDENTITY = {"sub": "user-1", "username": "alice"}
+KEY = {"id": {"S": "order-1"}, "user_id": {"S": "user-1"}}
+ITEM = {"id": {"S": "order-1"}, "user_id": {"S": "user-1"}, "quantity": {"N": "1"}}
+
+
+def context_value(expression, context, item=None):
+    """Value of a `$context.<path>` or `$item` expression of a mapping template."""
+    if expression == "$item":
+        return item
+    value = context
+    for name in expression[len("$context."):].split("."):
+        value = (value or {}).get(name)
+    return value
+
+
+class ApiCache:
+    """AppSync's per-resolver caching, as the registry configures it."""
+
+    def __init__(self):
+        self.entries = {}
+
+    def key(self, field_name, values):
+        cached = next(spec.resolver for spec in functions.FUNCTIONS.values()
+            if spec.resolver and spec.resolver.field_name == field_name)
+        return (field_name,) + tuple(values[caching_key[1:]] for caching_key in cached.caching_keys)
+
+    def resolve(self, construct_id, handler, context):
+        resolver = functions.FUNCTIONS[construct_id].resolver
+        if resolver.caching_keys:
+            key = self.key(resolver.field_name,
+                {caching_key[1:]: context_value(caching_key, context) for caching_key in resolver.caching_keys})
+            if key not in self.entries:
+                self.entries[key] = handler(context, None)
+            return self.entries[key]
+        result = handler(context, None)
+        for eviction in resolver.evicts:
+            for item in context_value(eviction.each, context) if eviction.each else [None]:
+                self.entries.pop(self.key(eviction.field_name,
+                    {name: context_value(value, context, item) for name, value in eviction.keys.items()}), None)
+        return result
+
+
+def test_reads_are_cached_until_an_update_evicts_them():
+    api = ApiCache()
+    get_order = {"arguments": {"id": "order-1"}, "identity": IDENTITY}
+
+    with Stubber(clients.client("dynamodb")) as stubber:
+        stubber.add_response("get_item", {"Item": ITEM}, {"TableName": "ORDER", "Key": KEY})
+        assert api.resolve("get", get_single_order.handler, get_order)["quantity"] == 1
+        # Served from the cache: no further calls are stubbed.
+        assert api.resolve("get", get_single_order.handler, get_order)["quantity"] == 1
+
+        stubber.add_response("update_item", {"Attributes": {"quantity": {"N": "4"}}})
+        api.resolve("update", update_order.handler,
+            {"arguments": {"input": {"id": "order-1", "quantity": 4}}, "identity": IDENTITY})
+
+        stubber.add_response("get_item", {"Item": dict(ITEM, quantity={"N": "4"})}, {"TableName": "ORDER", "Key": KEY})
+        assert api.resolve("get", get_single_order.handler, get_order)["quantity"] == 4
+        stubber.assert_no_pending_responses()
+
+
+def test_a_read_after_a_batch_delete_sees_the_order_gone():
+    api = ApiCache()
+    get_order = {"arguments": {"id": "order-1"}, "identity": IDENTITY}
+
+    with Stubber(clients.client("dynamodb")) as stubber:
+        stubber.add_response("get_item", {"Item": ITEM}, {"TableName": "ORDER", "Key": KEY})
+        assert api.resolve("get", get_single_order.handler, get_order)["quantity"] == 1
+
+        stubber.add_response("batch_write_item", {})
+        api.resolve("delete-batch", delete_orders.handler,
+            {"arguments": {"ids": ["order-0", "order-1"]}, "identity": IDENTITY})
+
+        stubber.add_response("get_item", {}, {"TableName": "ORDER", "Key": KEY})
+        assert api.resolve("get", get_single_order.handler, get_order) is None
+        stubber.assert_no_pending_responses()
+
+
+def test_every_order_mutation_evicts_the_cached_order():
+    evicting = {spec.resolver.field_name for spec in functions.FUNCTIONS.values()
+        if spec.resolver and any(eviction.field_name == "order" for eviction in spec.resolver.evicts)}
+
+    assert evicting == {"updateOrder", "deleteOrder", "deleteOrders"}
@@ -1,21 +1,310 @@
+import dataclasses
+import json
+
 import aws_cdk as core
 import aws_cdk.assertions as assertions
+import pytest
 from cdk_accelerate.cdk_accelerate_stack import CdkAccelerateStack
 
 
-def test_sqs_queue_created():
-    app = core.App()
-    stack = CdkAccelerateStack(app, "cdk-accelerate")
-    template = assertions.Template.from_stack(stack)
+@pytest.fixture(scope="module")
+def synth():
+    """Template of the stack for a given context, synthesized once per module."""
+    templates = {}
+
+    def synth(**context):
+        key = json.dumps(context, sort_keys=True)
+        if key not in templates:
+            app = core.App(context=context)
+            stack = CdkAccelerateStack(app, "cdk-accelerate")
+            templates[key] = assertions.Template.from_stack(stack)
+        return templates[key]
+
+    return synth
+
+
+@pytest.fixture(scope="module")
+def template(synth):
+    return synth()
 
+
+def test_sqs_queue_created(template):
     template.has_resource_properties("AWS::SQS::Queue", {
         "VisibilityTimeout": 300
     })
 
 
-def test_sns_topic_created():
-    app = core.App()
-    stack = CdkAccelerateStack(app, "cdk-accelerate")
+def test_sns_topic_created(template):
+    template.resource_count_is("AWS::SNS::Topic", 1)
+
+
+def test_express_state_machine_runs_orders_synchronously(synth):
+    template = synth(stateMachineType="EXPRESS")
+
+    template.has_resource_properties("AWS::StepFunctions::StateMachine", {
+        "StateMachineType": "EXPRESS"
+    })
+    template.has_resource_properties("AWS::Lambda::Function", {
+        "FunctionName": "post-order-function",
+        "Environment": {"Variables": assertions.Match.object_like({"SYNC_EXECUTION": "true"})}
+    })
+
+
+def test_sdk_workflow_replaces_order_lambdas(synth):
+    template = synth(workflowIntegration="sdk")
+
+    definition = json.dumps(template.find_resources("AWS::StepFunctions::StateMachine"))
+    for resource in ("dynamodb:putItem", "dynamodb:updateItem"):
+        assert f'arn:aws:states:::{resource}' in definition
+    assert "sns:publish" not in definition
+    functions = template.find_resources("AWS::Lambda::Function")
+    names = {function["Properties"]["FunctionName"] for function in functions.values()}
+    assert "process-payment-function" in names
+    assert not names & {"initialize-order-function", "complete-order-function", "cancel-failed-order-function"}
+
+
+def test_http_resolver_sends_post_order_straight_to_sqs(synth):
+    template = synth(postOrderResolver="http")
+
+    template.has_resource_properties("AWS::AppSync::DataSource", {
+        "Type": "HTTP",
+        "HttpConfig": assertions.Match.object_like({
+            "AuthorizationConfig": assertions.Match.object_like({"AuthorizationType": "AWS_IAM"})
+        })
+    })
+    resolvers = template.find_resources("AWS::AppSync::Resolver", {"Properties": {"FieldName": "postOrder"}})
+    (resolver,) = resolvers.values()
+    request_template = json.dumps(resolver["Properties"]["RequestMappingTemplate"])
+    assert "Fn::Sub" in request_template
+    assert "922952267456" not in request_template
+    functions = template.find_resources("AWS::Lambda::Function", {"Properties": {"FunctionName": "send-sqs-function"}})
+    assert functions == {}
+
+
+def test_function_profile_sets_memory_architecture_and_provisioned_alias(monkeypatch, tmp_path):
+    from cdk_accelerate import packaging
+    from lambdas_data_source import functions
+
+    # Bundles of the patched registry are built outside the repo's build/.
+    monkeypatch.setattr(packaging, "BUILD_DIR", str(tmp_path))
+
+    spec = functions.FUNCTIONS["get"]
+    monkeypatch.setitem(functions.FUNCTIONS, "get", dataclasses.replace(spec,
+        profile=functions.Profile(memory_size=512, architecture="arm64", provisioned_concurrency=2,
+            runtime="python3.12")))
+    stack = CdkAccelerateStack(core.App(), "cdk-accelerate")
     template = assertions.Template.from_stack(stack)
 
-    template.resource_count_is("AWS::SNS::Topic", 1)
+    template.has_resource_properties("AWS::Lambda::Function", {
+        "FunctionName": "get-order-function", "MemorySize": 512, "Architectures": ["arm64"], "Runtime": "python3.12"
+    })
+    (alias_id,) = template.find_resources("AWS::Lambda::Alias", {
+        "Properties": {"ProvisionedConcurrencyConfig": {"ProvisionedConcurrentExecutions": 2}}
+    })
+    template.has_resource_properties("AWS::AppSync::DataSource", {
+        "Name": "lambda_get_order_ds", "LambdaConfig": {"LambdaFunctionArn": {"Ref": alias_id}}
+    })
+    template.has_resource_properties("AWS::Lambda::LayerVersion", {
+        "LayerName": "orders-common-arm64", "CompatibleRuntimes": ["python3.12", "python3.9"]
+    })
+
+
+def test_a_registry_entry_is_all_a_new_resolver_needs(monkeypatch, tmp_path):
+    from cdk_accelerate import packaging
+    from lambdas_data_source import functions
+
+    # Bundles of the patched registry are built outside the repo's build/.
+    monkeypatch.setattr(packaging, "BUILD_DIR", str(tmp_path))
+
+    spec = functions.FunctionSpec("count", "count-orders-function", "lambdas/get_orders.py",
+        environment=("table", "retention"), variables={"PAGE_SIZE": "10"},
+        resolver=functions.Resolver("Query", "orderCount", "count-orders", "lambda-count-orders-ds", "lambda_count_orders_ds"))
+    monkeypatch.setitem(functions.FUNCTIONS, "count", spec)
+    template = assertions.Template.from_stack(CdkAccelerateStack(core.App(), "cdk-accelerate"))
+
+    template.has_resource_properties("AWS::Lambda::Function", {
+        "FunctionName": "count-orders-function",
+        "Environment": {"Variables": assertions.Match.object_like({
+            "ORDER_TABLE": "ORDER", "ORDER_RETENTION_DAYS": "30", "PAGE_SIZE": "10"
+        })}
+    })
+    template.has_resource_properties("AWS::AppSync::Resolver", {"FieldName": "orderCount", "DataSourceName": "lambda_count_orders_ds"})
+    with pytest.raises(ValueError):
+        functions.FunctionSpec("bad", "bad-function", "lambdas/get_orders.py", environment=("tables",))
+
+
+def test_snap_start_needs_a_supported_runtime():
+    from lambdas_data_source import functions
+
+    with pytest.raises(ValueError):
+        functions.Profile(snap_start=True)
+    assert functions.Profile(runtime="python3.12", snap_start=True).publishes_version
+
+
+def test_power_tuning_deploys_every_function_per_architecture_and_memory_size(synth, template):
+    tuned = synth(powerTuning="true", tuningMemorySizes="128,1024")
+
+    functions = template.find_resources("AWS::Lambda::Function")
+    variants = tuned.find_resources("AWS::Lambda::Function", {"Properties": {"Description": "power-tuning variant"}})
+    assert len(variants) == len(functions) * 2 * 2
+    tuned.has_resource_properties("AWS::Lambda::Function", {
+        "FunctionName": "get-order-function-arm64-1024", "MemorySize": 1024, "Architectures": ["arm64"]
+    })
+    tuned.resource_count_is("AWS::AppSync::Resolver", len(template.find_resources("AWS::AppSync::Resolver")))
+
+
+def test_recommended_profiles_override_the_registry(tmp_path):
+    from lambdas_data_source import functions
+
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({
+        "_inputs": {"architectures": ["x86_64"], "repeat": 20},
+        "get": {"memory_size": 256, "architecture": "arm64"},
+    }))
+    tuned = functions.apply_profiles(functions.FUNCTIONS, functions.load_profiles(str(path)))
+
+    assert tuned["get"].profile.memory_size == 256
+    assert tuned["get"].profile.architecture == "arm64"
+    assert tuned["gets"] == functions.FUNCTIONS["gets"]
+    with pytest.raises(ValueError):
+        functions.apply_profiles(functions.FUNCTIONS, {"missing": {"memory_size": 256}})
+
+
+def test_order_reads_are_cached_and_evicted_by_the_mutations(synth, template):
+    template.has_resource_properties("AWS::AppSync::ApiCache", {
+        "ApiCachingBehavior": "PER_RESOLVER_CACHING", "Ttl": 5, "Type": "SMALL"
+    })
+    template.has_resource_properties("AWS::AppSync::Resolver", {
+        "FieldName": "order",
+        "CachingConfig": {"Ttl": 5, "CachingKeys": [
+            "$context.identity.sub", "$context.identity.cognitoIdentityId", "$context.identity.userArn",
+            "$context.arguments.id"]}
+    })
+    evictions = {
+        "updateOrder": '"context.arguments.id": $context.arguments.input.id})',
+        "deleteOrder": '"context.arguments.id": $context.arguments.id})',
+        "deleteOrders": '"context.arguments.id": $item})',
+    }
+    for field_name, arguments in evictions.items():
+        resolver, = template.find_resources("AWS::AppSync::Resolver", {
+            "Properties": {"FieldName": field_name}}).values()
+        response = resolver["Properties"]["ResponseMappingTemplate"]
+        assert '$extensions.evictFromApiCache("Query", "order", {"context.identity.sub": $context.identity.sub, ' \
+            '"context.identity.cognitoIdentityId": $context.identity.cognitoIdentityId, ' \
+            '"context.identity.userArn": $context.identity.userArn, ' + arguments in response
+        assert response.index("$util.error") < response.index("evictFromApiCache")
+
+    uncached = synth(orderCacheTtl=0)
+    uncached.resource_count_is("AWS::AppSync::ApiCache", 0)
+    assert not uncached.find_resources("AWS::AppSync::Resolver", {"Properties": {"CachingConfig": assertions.Match.any_value()}})
+
+
+def test_order_table_indexes_status_and_restaurant(template):
+    from orders_common import indexes
+
+    template.has_resource_properties("AWS::DynamoDB::Table", {
+        "GlobalSecondaryIndexes": [
+            assertions.Match.object_like({"IndexName": indexes.STATUS_INDEX, "KeySchema": [
+                {"AttributeName": "user_id", "KeyType": "HASH"},
+                {"AttributeName": "statusCreatedAt", "KeyType": "RANGE"}]}),
+            assertions.Match.object_like({"IndexName": indexes.RESTAURANT_INDEX, "KeySchema": [
+                {"AttributeName": "restaurantId", "KeyType": "HASH"},
+                {"AttributeName": "statusCreatedAt", "KeyType": "RANGE"}]}),
+        ]
+    })
+    for field_name in ("ordersByStatus", "ordersByRestaurant"):
+        template.has_resource_properties("AWS::AppSync::Resolver", {"FieldName": field_name, "TypeName": "Query"})
+
+
+def test_only_restaurant_staff_can_list_a_restaurants_orders(template):
+    from cdk_accelerate.cdk_accelerate_stack import RESTAURANT_STAFF_GROUP
+
+    template.has_resource_properties("AWS::Cognito::UserPoolGroup", {"GroupName": RESTAURANT_STAFF_GROUP})
+    template.has_resource_properties("AWS::AppSync::GraphQLApi", {
+        "AuthenticationType": "API_KEY",
+        "AdditionalAuthenticationProviders": [assertions.Match.object_like(
+            {"AuthenticationType": "AMAZON_COGNITO_USER_POOLS"})]
+    })
+    schema, = template.find_resources("AWS::AppSync::GraphQLSchema").values()
+    definition = schema["Properties"]["Definition"]
+    field = definition[definition.index("ordersByRestaurant("):]
+    assert field[:field.index(")", field.index(": OrderConnection")) + 1].endswith(
+        f'@aws_cognito_user_pools(cognito_groups: ["{RESTAURANT_STAFF_GROUP}"])')
+
+
+def test_finished_orders_expire_and_can_be_archived(synth, template):
+    template.has_resource_properties("AWS::DynamoDB::Table", {
+        "TimeToLiveSpecification": {"AttributeName": "expiresAt", "Enabled": True}
+    })
+    template.resource_count_is("AWS::S3::Bucket", 0)
+
+    archived = synth(orderArchive="true")
+    archived.resource_count_is("AWS::S3::Bucket", 1)
+    archived.has_resource_properties("AWS::Lambda::EventSourceMapping", {
+        "EventSourceArn": {"Fn::GetAtt": [assertions.Match.any_value(), "StreamArn"]},
+        "FilterCriteria": {"Filters": [{"Pattern": assertions.Match.string_like_regexp('"REMOVE"')}]},
+        "MaximumRetryAttempts": 5,
+        "DestinationConfig": {"OnFailure": {"Destination": {"Fn::GetAtt": [assertions.Match.any_value(), "Arn"]}}}
+    })
+
+    # The SDK workflow counts the TTL from when its final state is entered.
+    sdk = synth(workflowIntegration="sdk", orderRetentionDays="90")
+    definition = json.dumps(sdk.find_resources("AWS::StepFunctions::StateMachine"))
+    assert definition.count("$states.context.State.EnteredTime) / 1000) + 7776000") == 2
+    assert "expiresAt)" not in definition
+
+
+def test_notifications_are_published_from_the_table_stream(template):
+    template.has_resource_properties("AWS::DynamoDB::Table", {
+        "StreamSpecification": {"StreamViewType": "NEW_AND_OLD_IMAGES"}
+    })
+    template.has_resource_properties("AWS::Lambda::Function", {
+        "FunctionName": "notify-orders-function",
+        "Environment": {"Variables": assertions.Match.object_like({"TOPIC_ARN": assertions.Match.any_value()})}
+    })
+    template.has_resource_properties("AWS::Lambda::EventSourceMapping", {
+        "EventSourceArn": {"Fn::GetAtt": [assertions.Match.any_value(), "StreamArn"]},
+        "FunctionResponseTypes": ["ReportBatchItemFailures"],
+        "FilterCriteria": {"Filters": [{"Pattern": assertions.Match.string_like_regexp('"MODIFY"')}]},
+        "MaximumRetryAttempts": 5,
+        "DestinationConfig": {"OnFailure": {"Destination": {"Fn::GetAtt": [assertions.Match.any_value(), "Arn"]}}}
+    })
+    functions = template.find_resources("AWS::Lambda::Function", {"Properties": {"FunctionName": assertions.Match.string_like_regexp("order-function$")}})
+    for function in functions.values():
+        assert "TOPIC_ARN" not in function["Properties"]["Environment"]["Variables"]
+
+
+def test_queue_redrives_to_a_dead_letter_queue(template):
+    template.has_resource_properties("AWS::SQS::Queue", {
+        "QueueName": "sqs-queue",
+        "RedrivePolicy": {"deadLetterTargetArn": {"Fn::GetAtt": [assertions.Match.any_value(), "Arn"]}, "maxReceiveCount": 3}
+    })
+
+
+def test_fifo_queue_groups_orders_by_user(synth):
+    template = synth(queueType="fifo")
+
+    template.has_resource_properties("AWS::SQS::Queue", {
+        "QueueName": "sqs-queue.fifo",
+        "FifoQueue": True,
+        "DeduplicationScope": "messageGroup",
+        "FifoThroughputLimit": "perMessageGroupId",
+        "RedrivePolicy": assertions.Match.object_like({"maxReceiveCount": 3})
+    })
+    template.has_resource_properties("AWS::SQS::Queue", {"QueueName": "dead-letter-queue.fifo", "FifoQueue": True})
+    template.has_resource_properties("AWS::Lambda::EventSourceMapping", {
+        "EventSourceArn": {"Fn::GetAtt": [assertions.Match.any_value(), "Arn"]},
+        "MaximumBatchingWindowInSeconds": assertions.Match.absent()
+    })
+    with pytest.raises(ValueError):
+        synth(queueType="fifo", sqsBatchSize=20)
+
+
+def test_batches_over_ten_messages_need_a_batching_window(synth):
+    template = synth(sqsBatchSize=50, sqsMaxBatchingWindow=1)
+
+    template.has_resource_properties("AWS::Lambda::EventSourceMapping", {
+        "BatchSize": 50, "MaximumBatchingWindowInSeconds": 1
+    })
+    with pytest.raises(ValueError):
+        synth(sqsBatchSize=50)
@@ -0,0 +1,17 @@
+import decimal
+import json
+
+from orders_common import codec
+
+
+def test_decimals_are_written_as_compact_numbers():
+    encoded = codec.dumps({"quantity": decimal.Decimal("2"), "price": decimal.Decimal("9.5"), "name": "pizza"})
+
+    assert encoded == '{"quantity":2,"price":9.5,"name":"pizza"}'
+    assert codec.loads(encoded) == json.loads(encoded)
+
+
+def test_stdlib_fallback_matches(monkeypatch):
+    monkeypatch.setattr(codec, "orjson", None)
+
+    assert codec.dumps({"quantity": decimal.Decimal("2"), "tags": {"b", "a"}}) == '{"quantity":2,"tags":["a","b"]}'
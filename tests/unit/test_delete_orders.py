@@ -0,0 +1,37 @@
+import pytest
+from botocore.stub import Stubber
+
+from orders_common import clients
+
+import delete_orders
+
+
+def delete_request(order_id):
+    return {"DeleteRequest": {"Key": {"user_id": {"S": "demo_user"}, "id": {"S": order_id}}}}
+
+
+def test_deletes_are_chunked_by_twenty_five_and_unprocessed_items_retried(monkeypatch):
+    monkeypatch.setattr(delete_orders, "backoff", lambda attempt: None)
+    ids = [f'order-{n}' for n in range(30)]
+    with Stubber(clients.client("dynamodb")) as stubber:
+        stubber.add_response("batch_write_item", {
+            "UnprocessedItems": {"ORDER": [delete_request("order-3")]}
+        }, {"RequestItems": {"ORDER": [delete_request(order_id) for order_id in ids[:25]]}})
+        stubber.add_response("batch_write_item", {"UnprocessedItems": {}},
+            {"RequestItems": {"ORDER": [delete_request("order-3")]}})
+        stubber.add_response("batch_write_item", {},
+            {"RequestItems": {"ORDER": [delete_request(order_id) for order_id in ids[25:]]}})
+        deleted = delete_orders.handler({"arguments": {"ids": ids + ["order-0"]}}, None)
+        stubber.assert_no_pending_responses()
+
+    assert deleted == ids
+
+
+def test_gives_up_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(delete_orders, "backoff", lambda attempt: None)
+    with Stubber(clients.client("dynamodb")) as stubber:
+        for _ in range(delete_orders.MAX_ATTEMPTS):
+            stubber.add_response("batch_write_item", {"UnprocessedItems": {"ORDER": [delete_request("a")]}})
+        with pytest.raises(RuntimeError, match="1 unprocessed items"):
+            delete_orders.batch_delete(clients.client("dynamodb"), "ORDER",
+                [delete_request("a")["DeleteRequest"]["Key"]])
@@ -0,0 +1,41 @@
+from boto3.dynamodb.types import TypeDeserializer
+
+from orders_common.deserialize import deserialize_columns, deserialize_items
+
+ITEMS = [
+    {
+        "user_id": {"S": "demo_user"},
+        "id": {"S": "order-1"},
+        "name": {"S": "pizza"},
+        "quantity": {"N": "2"},
+        "restaurantId": {"S": "r1"},
+        "orderStatus": {"S": "FAILED"},
+        "createdAt": {"S": "2022-10-01T12:00:00"},
+        "updatedAt": {"S": "2022-10-01T12:00:05"},
+        "errorMessage": {"S": "payment method declined"},
+    },
+    {
+        "user_id": {"S": "demo_user"},
+        "id": {"S": "order-2"},
+        "quantity": {"N": "1.5"},
+        "errorMessage": {"NULL": True},
+        "extra": {"M": {"tags": {"L": [{"S": "a"}, {"N": "3"}]}}},
+    },
+]
+
+
+def test_items_match_type_deserializer():
+    deserializer = TypeDeserializer()
+    expected = [{key: deserializer.deserialize(value) for key, value in item.items()} for item in ITEMS]
+
+    assert deserialize_items(ITEMS) == expected
+    assert isinstance(deserialize_items(ITEMS)[0]["quantity"], int)
+
+
+def test_columns_fill_missing_attributes():
+    columns = deserialize_columns(ITEMS)
+
+    assert columns["id"] == ["order-1", "order-2"]
+    assert columns["quantity"] == [2, 1.5]
+    assert columns["orderStatus"] == ["FAILED", None]
+    assert columns["errorMessage"] == ["payment method declined", None]
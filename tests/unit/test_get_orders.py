@@ -0,0 +1,94 @@
+from botocore.stub import Stubber
+
+from orders_common import clients
+from orders_common import indexes
+from orders_common import pagination
+
+import get_orders
+import get_orders_by_restaurant
+import get_orders_by_status
+
+
+def test_orders_query_returns_single_page_with_token():
+    last_key = {"user_id": {"S": "demo_user"}, "id": {"S": "order-2"}}
+    with Stubber(clients.client("dynamodb")) as stubber:
+        stubber.add_response("query", {
+            "Items": [{"name": {"S": "pizza"}, "quantity": {"N": "2"}, "restaurantId": {"S": "r1"}}],
+            "LastEvaluatedKey": last_key
+        }, {
+            "TableName": "ORDER",
+            "KeyConditionExpression": "user_id = :u",
+            "ExpressionAttributeValues": {":u": {"S": "demo_user"}},
+            "ExpressionAttributeNames": get_orders.PROJECTION_NAMES,
+            "ProjectionExpression": get_orders.PROJECTION_EXPRESSION,
+            "Limit": 1
+        })
+        page = get_orders.handler({"arguments": {"limit": 1}}, None)
+
+    assert page["items"] == [{"name": "pizza", "quantity": 2, "restaurantId": "r1"}]
+    assert pagination.decode_token(page["nextToken"]) == last_key
+
+
+def test_orders_query_resumes_from_token():
+    start_key = {"user_id": {"S": "demo_user"}, "id": {"S": "order-2"}}
+    with Stubber(clients.client("dynamodb")) as stubber:
+        stubber.add_response("query", {"Items": []}, {
+            "TableName": "ORDER",
+            "KeyConditionExpression": "user_id = :u",
+            "ExpressionAttributeValues": {":u": {"S": "demo_user"}},
+            "ExpressionAttributeNames": get_orders.PROJECTION_NAMES,
+            "ProjectionExpression": get_orders.PROJECTION_EXPRESSION,
+            "Limit": get_orders.DEFAULT_PAGE_SIZE,
+            "ExclusiveStartKey": start_key
+        })
+        page = get_orders.handler({"arguments": {"nextToken": pagination.encode_token(start_key)}}, None)
+
+    assert page == {"items": [], "nextToken": None}
+
+
+def test_orders_are_read_from_the_callers_partition():
+    with Stubber(clients.client("dynamodb")) as stubber:
+        stubber.add_response("query", {"Items": []}, {
+            "TableName": "ORDER",
+            "KeyConditionExpression": "user_id = :u",
+            "ExpressionAttributeValues": {":u": {"S": "user-1"}},
+            "ExpressionAttributeNames": get_orders.PROJECTION_NAMES,
+            "ProjectionExpression": get_orders.PROJECTION_EXPRESSION,
+            "Limit": get_orders.DEFAULT_PAGE_SIZE
+        })
+        get_orders.handler({"arguments": {}, "identity": {"sub": "user-1", "username": "alice"}}, None)
+
+
+def test_orders_by_status_are_the_callers_only():
+    with Stubber(clients.client("dynamodb")) as stubber:
+        stubber.add_response("query", {"Items": [{"id": {"S": "order-1"}, "orderStatus": {"S": "PENDING"}}]}, {
+            "TableName": "ORDER",
+            "IndexName": indexes.STATUS_INDEX,
+            "KeyConditionExpression": "user_id = :u AND begins_with(#statusCreatedAt, :p)",
+            "ExpressionAttributeValues": {":u": {"S": "user-1"}, ":p": {"S": "PENDING#"}},
+            "ExpressionAttributeNames": dict(get_orders_by_status.PROJECTION_NAMES,
+                **{"#statusCreatedAt": "statusCreatedAt"}),
+            "ProjectionExpression": get_orders_by_status.PROJECTION_EXPRESSION,
+            "Limit": 5
+        })
+        page = get_orders_by_status.handler({"arguments": {"orderStatus": "PENDING", "limit": 5},
+            "identity": {"sub": "user-1", "username": "alice"}}, None)
+
+    assert page == {"items": [{"id": "order-1", "orderStatus": "PENDING"}], "nextToken": None}
+
+
+def test_restaurant_orders_in_a_status_are_a_key_range_not_a_filter():
+    with Stubber(clients.client("dynamodb")) as stubber:
+        stubber.add_response("query", {"Items": []}, {
+            "TableName": "ORDER",
+            "IndexName": indexes.RESTAURANT_INDEX,
+            "KeyConditionExpression": "#restaurantId = :r AND begins_with(#statusCreatedAt, :p)",
+            "ExpressionAttributeValues": {":r": {"S": "r1"}, ":p": {"S": "PENDING#"}},
+            "ExpressionAttributeNames": dict(get_orders_by_restaurant.PROJECTION_NAMES,
+                **{"#statusCreatedAt": "statusCreatedAt"}),
+            "ProjectionExpression": get_orders_by_restaurant.PROJECTION_EXPRESSION,
+            "Limit": get_orders.DEFAULT_PAGE_SIZE
+        })
+        # Every user's orders: the caller is restaurant staff, not the customer.
+        get_orders_by_restaurant.handler({"arguments": {"restaurantId": "r1", "orderStatus": "PENDING"},
+            "identity": {"sub": "staff-1", "username": "bob", "groups": ["restaurant-staff"]}}, None)
@@ -0,0 +1,17 @@
+import pytest
+
+from orders_common import identity
+
+
+def test_user_id_is_taken_from_the_callers_identity():
+    assert identity.user_id({"identity": {"sub": "user-1", "cognitoIdentityId": "us-east-1:1"}}) == "user-1"
+    assert identity.user_id({"identity": {"cognitoIdentityId": "us-east-1:1"}}) == "us-east-1:1"
+    iam_caller = {"accountId": "123456789012", "userArn": "arn:aws:iam::123456789012:user/alice"}
+    assert identity.user_id({"identity": iam_caller}) == "arn:aws:iam::123456789012:user/alice"
+    # API-key requests carry no identity.
+    assert identity.user_id({"identity": None}) == identity.DEFAULT_USER_ID
+
+
+def test_an_identity_without_a_user_id_is_rejected():
+    with pytest.raises(ValueError, match="no user id"):
+        identity.user_id({"identity": {"accountId": "123456789012", "sourceIp": ["10.0.0.1"]}})
@@ -0,0 +1,77 @@
+import time
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from step_function_workflow.local_interpreter import LocalStateMachine, StatesError, evaluate_jsonata, local_arn, \
+    local_workflow
+from step_function_workflow.definition import render_workflow
+
+ORDER = {"user_id": "demo_user", "id": "order-1", "name": "pizza", "quantity": 2, "restaurantId": "r1",
+         "orderStatus": "PENDING", "createdAt": "2022-10-01T12:00:00",
+         "statusCreatedAt": "PENDING#2022-10-01T12:00:00"}
+
+
+def test_lambda_workflow_retries_and_routes_failed_payments():
+    calls = {"initialize": 0, "cancel": []}
+
+    def initialize(event):
+        calls["initialize"] += 1
+        if calls["initialize"] < 3:
+            raise StatesError("Lambda.ServiceException", "throttled")
+        return {"statusCode": 200, "body": event}
+
+    arns = {name: local_arn(name) for name in ("initialize", "payment", "complete", "cancel")}
+    definition = render_workflow("lambda", "STANDARD", InitializeOrderArn=arns["initialize"],
+        ProcessPaymentArn=arns["payment"], CompleteOrderArn=arns["complete"], CancelFailedOrderArn=arns["cancel"])
+    machine = LocalStateMachine(definition, {
+        arns["initialize"]: initialize,
+        arns["payment"]: lambda event: {"status": "error", "error_message": "payment method declined"},
+        arns["cancel"]: lambda event: calls["cancel"].append(event) or {"statusCode": 200},
+    })
+
+    execution = machine.execute(ORDER)
+
+    assert execution.status == "SUCCEEDED"
+    assert [state.name for state in execution.states] == ["InitializeOrder", "ProcessPayment", "PaymentChoice", "PaymentFailure"]
+    assert execution.states[0].attempts == 3 and execution.simulated_wait_seconds == 2 + 4
+    cancel_input = calls["cancel"][0]
+    assert cancel_input["saveResults"] == ORDER
+    assert cancel_input["paymentResult"]["error_message"] == "payment method declined"
+    assert execution.states[1].output_bytes > execution.states[1].input_bytes > 0
+
+
+@mock_aws
+def test_sdk_workflow_writes_the_order_through_dynamodb():
+    dynamodb = boto3.client("dynamodb")
+    dynamodb.create_table(TableName="ORDER",
+        KeySchema=[{"AttributeName": "user_id", "KeyType": "HASH"}, {"AttributeName": "id", "KeyType": "RANGE"}],
+        AttributeDefinitions=[{"AttributeName": "user_id", "AttributeType": "S"}, {"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST")
+    machine = local_workflow("sdk", "EXPRESS", sdk_client=boto3.client, retention_days=30)
+    machine.functions[local_arn("process_payment")] = lambda event: {"status": "ok"}
+
+    started = int(time.time())
+    execution = machine.execute(ORDER)
+
+    assert execution.status == "SUCCEEDED", execution.cause
+    assert [state.name for state in execution.states][-1] == "CompleteOrder"
+    item = dynamodb.get_item(TableName="ORDER", Key={"user_id": {"S": "demo_user"}, "id": {"S": "order-1"}})["Item"]
+    assert item["orderStatus"] == {"S": "SUCCESS"} and item["quantity"] == {"N": "2"}
+    assert item["statusCreatedAt"] == {"S": "SUCCESS#2022-10-01T12:00:00"}
+    # Counted from when the order finished; the pending order carried no TTL.
+    assert started + 30 * 86400 <= int(item["expiresAt"]["N"]) <= int(time.time()) + 30 * 86400
+    assert execution.output == dict(ORDER, paymentResult={"status": "ok"})
+
+
+def test_jsonata_subset():
+    states = {"input": {"createdAt": "2022-10-01T12:00:00", "quantity": 2},
+              "context": {"State": {"EnteredTime": "2022-10-01T12:00:00.500Z"}}}
+
+    assert evaluate_jsonata("'SUCCESS#' & $states.input.createdAt", {"states": states}) == "SUCCESS#2022-10-01T12:00:00"
+    assert evaluate_jsonata("$string($floor($toMillis($states.context.State.EnteredTime) / 1000) + 60)",
+        {"states": states}) == "1664625660"
+    assert evaluate_jsonata("($states.input.quantity + 1) * 2", {"states": states}) == 6
+    with pytest.raises(StatesError):
+        evaluate_jsonata("$states.input.missing", {"states": states})
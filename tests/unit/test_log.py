@@ -0,0 +1,30 @@
+import json
+
+from orders_common import log
+
+
+def test_records_are_json_lines_and_debug_is_sampled(capsys, monkeypatch):
+    logger = log.get_logger("test")
+
+    @log.log_invocation
+    def handler(event, context):
+        logger.info("order persisted", order_id="1")
+        return event
+
+    monkeypatch.setattr(log, "LOG_SAMPLE_RATE", 0)
+    handler({"id": "1"}, None)
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [line["message"] for line in lines] == ["order persisted"]
+    assert lines[0]["level"] == "INFO" and lines[0]["order_id"] == "1"
+
+    monkeypatch.setattr(log, "LOG_SAMPLE_RATE", 1)
+    handler({"id": "1"}, None)
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [line["message"] for line in lines] == ["invocation started", "order persisted", "invocation finished"]
+    assert lines[0]["event_bytes"] == log.payload_size({"id": "1"})
+
+
+def test_payload_size_approximates_json_length():
+    payload = {"name": "pizza", "quantity": 2, "tags": ["a", "b"], "paid": True}
+
+    assert abs(log.payload_size(payload) - len(json.dumps(payload, separators=(",", ":")))) <= 4
@@ -0,0 +1,45 @@
+import json
+
+from botocore.stub import Stubber
+
+from orders_common import clients
+
+import get_orders
+
+
+def emf_records(output):
+    records = [json.loads(line) for line in output.splitlines() if line.startswith('{"_aws"')]
+    for record in records:
+        # The parts of the EMF specification CloudWatch rejects records for.
+        assert isinstance(record["_aws"]["Timestamp"], int)
+        for directive in record["_aws"]["CloudWatchMetrics"]:
+            assert directive["Namespace"]
+            for dimension_set in directive["Dimensions"]:
+                assert all(isinstance(record[dimension], str) for dimension in dimension_set)
+            for metric in directive["Metrics"]:
+                values = record[metric["Name"]]
+                values = values if isinstance(values, list) else [values]
+                assert 0 < len(values) <= 100 and all(isinstance(value, (int, float)) for value in values)
+    return records
+
+
+def test_handler_emits_duration_and_aws_call_metrics(capsys):
+    dynamodb = clients.client("dynamodb")
+    sent = []
+    capture = lambda params, **kwargs: sent.append(params)
+    dynamodb.meta.events.register_last("before-parameter-build", capture)
+    try:
+        with Stubber(dynamodb) as stubber:
+            stubber.add_response("query", {"Items": [], "ConsumedCapacity": {"TableName": "ORDER", "CapacityUnits": 0.5}})
+            get_orders.handler({"arguments": {}}, None)
+    finally:
+        dynamodb.meta.events.unregister("before-parameter-build", capture)
+
+    assert sent[0]["ReturnConsumedCapacity"] == "TOTAL"
+    handler_record, call_record = emf_records(capsys.readouterr().out)
+    assert handler_record["Function"] == "get_orders"
+    assert handler_record["Errors"] == 0 and handler_record["ColdStart"] in (0, 1)
+    assert handler_record["Duration"] >= call_record["AwsCallLatency"]
+    assert (call_record["Service"], call_record["Operation"]) == ("DynamoDB", "Query")
+    assert call_record["_aws"]["CloudWatchMetrics"][0]["Dimensions"] == [["Function", "Service", "Operation"]]
+    assert call_record["ConsumedCapacity"] == 0.5
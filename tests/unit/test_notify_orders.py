@@ -0,0 +1,59 @@
+import json
+
+from botocore.stub import Stubber
+
+from orders_common import clients
+
+import notify_orders
+
+
+def record(sequence, order_id, new_status, old_status="PENDING", error_message=None):
+    new_image = {"user_id": {"S": "demo_user"}, "id": {"S": order_id}, "orderStatus": {"S": new_status}}
+    if error_message:
+        new_image["errorMessage"] = {"S": error_message}
+    return {
+        "eventName": "MODIFY",
+        "dynamodb": {
+            "SequenceNumber": sequence,
+            "OldImage": {"user_id": {"S": "demo_user"}, "id": {"S": order_id}, "orderStatus": {"S": old_status}},
+            "NewImage": new_image,
+        },
+    }
+
+
+def test_finished_orders_are_published_in_batches_of_ten(monkeypatch):
+    monkeypatch.setattr(notify_orders, "TOPIC_ARN", "topic")
+    records = [record(str(100 + n), f"order-{n}", "SUCCESS") for n in range(11)]
+    records.append(record("111", "order-11", "FAILED", error_message="payment method declined"))
+    records.append(record("112", "order-12", "SUCCESS", old_status="SUCCESS"))
+    published = []
+
+    def publish_batch(TopicArn, PublishBatchRequestEntries):
+        published.append(PublishBatchRequestEntries)
+        return {"Successful": [{"Id": entry["Id"], "MessageId": entry["Id"]} for entry in PublishBatchRequestEntries],
+                "Failed": []}
+
+    monkeypatch.setattr(clients.client("sns"), "publish_batch", publish_batch)
+    result = notify_orders.handler({"Records": records}, None)
+
+    assert result == {"batchItemFailures": []}
+    assert sorted(len(entries) for entries in published) == [2, 10]
+    entries = {json.loads(entry["Message"])["order_id"]: entry for batch in published for entry in batch}
+    assert set(entries) == {f"order-{n}" for n in range(12)}
+    assert entries["order-0"]["Subject"] == "Orders-App: Update for order order-0"
+    assert json.loads(entries["order-11"]["Message"]) == {"order_status": "FAILED", "order_id": "order-11",
+        "cancel_reason": "payment method declined"}
+
+
+def test_the_stream_resumes_from_the_earliest_failed_notification(monkeypatch):
+    monkeypatch.setattr(notify_orders, "TOPIC_ARN", "arn:aws:sns:us-east-1:123456789012:orders")
+    records = [record("100", "order-1", "SUCCESS"), record("101", "order-2", "SUCCESS"),
+               record("102", "order-3", "FAILED", error_message="declined")]
+    with Stubber(clients.client("sns")) as stubber:
+        stubber.add_response("publish_batch", {
+            "Successful": [{"Id": "0", "MessageId": "m0"}],
+            "Failed": [{"Id": "2", "Code": "InternalError", "SenderFault": False},
+                       {"Id": "1", "Code": "InternalError", "SenderFault": False}]})
+        result = notify_orders.handler({"Records": records}, None)
+
+    assert result == {"batchItemFailures": [{"itemIdentifier": "101"}]}
@@ -0,0 +1,71 @@
+import glob
+import os
+
+from cdk_accelerate import packaging
+
+
+def test_strip_source_drops_docstrings_and_comments():
+    source = '''"""module doc"""
+# a comment
+def handler(event, context):
+    """handler doc"""
+    return event  # trailing
+
+
+class Empty:
+    """only a docstring"""
+'''
+    stripped = packaging.strip_source(source)
+
+    assert "doc" not in stripped and "comment" not in stripped and "trailing" not in stripped
+    namespace = {}
+    exec(stripped, namespace)
+    assert namespace["handler"]({"a": 1}, None) == {"a": 1}
+
+
+def test_every_handler_is_packaged_as_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(packaging, "BUILD_DIR", str(tmp_path))
+    for handler_path in glob.glob("lambdas/*.py"):
+        name = os.path.basename(handler_path)[:-3]
+        target = packaging.build_function(name, handler_path)
+
+        with open(os.path.join(target, "index.py")) as file:
+            compile(file.read(), handler_path, "exec")
+        assert os.listdir(target) in (["index.py"], ["index.py", "__pycache__"], ["__pycache__", "index.py"])
+
+
+def test_unchanged_handler_is_not_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setattr(packaging, "BUILD_DIR", str(tmp_path / "build"))
+    handler_path = tmp_path / "handler.py"
+    handler_path.write_text("def handler(event, context):\n    return 1\n")
+
+    target = packaging.build_function("handler", str(handler_path))
+    index = os.path.join(target, "index.py")
+    built_at = os.stat(index).st_mtime_ns
+    assert packaging.build_function("handler", str(handler_path)) == target
+    assert os.stat(index).st_mtime_ns == built_at
+
+    handler_path.write_text("def handler(event, context):\n    return 2\n")
+    os.utime(handler_path, ns=(built_at + 10**9, built_at + 10**9))
+    packaging.build_function("handler", str(handler_path))
+    with open(index) as file:
+        assert "return 2" in file.read()
+
+
+def test_layer_dependencies_are_installed_for_each_architecture(tmp_path, monkeypatch):
+    source = tmp_path / "layer"
+    (source / "python" / "orders_common").mkdir(parents=True)
+    (source / "python" / "orders_common" / "__init__.py").write_text("")
+    (source / "requirements.txt").write_text("orjson\n")
+    monkeypatch.setattr(packaging, "BUILD_DIR", str(tmp_path / "build"))
+    monkeypatch.setattr(packaging, "LAYER_SOURCE", str(source))
+    platforms = {}
+    monkeypatch.setattr(packaging.subprocess, "run",
+        lambda command, check: platforms.setdefault(command[command.index("--target") + 1],
+            command[command.index("--platform") + 1]))
+
+    targets = {architecture: packaging.build_layer(architecture=architecture) for architecture in ("x86_64", "arm64")}
+
+    assert targets["x86_64"] != targets["arm64"]
+    assert platforms[os.path.join(targets["arm64"], "python")] == "manylinux2014_aarch64"
+    assert platforms[os.path.join(targets["x86_64"], "python")] == "manylinux2014_x86_64"
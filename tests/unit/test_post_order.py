@@ -0,0 +1,65 @@
+from datetime import datetime
+import json
+
+from orders_common import clients
+
+import post_order
+
+
+def record(message_id, quantity, group=None):
+    record = {"messageId": message_id, "body": json.dumps({"input": {"name": "pizza", "quantity": quantity, "restaurantId": "r1"}})}
+    if group:
+        record["attributes"] = {"MessageGroupId": group}
+    return record
+
+
+def test_failed_records_are_reported_individually(monkeypatch):
+    started = []
+
+    def start_execution(stateMachineArn, name, input):
+        if name == "bad":
+            raise RuntimeError("throttled")
+        if name == "dup":
+            raise clients.client("stepfunctions").exceptions.ExecutionAlreadyExists(
+                {"Error": {"Code": "ExecutionAlreadyExists", "Message": ""}}, "StartExecution")
+        started.append(name)
+        assert json.loads(input)["quantity"] in (1, 4)
+        return {"executionArn": f'arn:execution:{name}'}
+
+    monkeypatch.setattr(clients.client("stepfunctions"), "start_execution", start_execution)
+    response = post_order.handler({"Records": [record("ok-1", 1), record("bad", 2), record("dup", 3), record("ok-2", 4)]}, None)
+
+    assert response == {"batchItemFailures": [{"itemIdentifier": "bad"}]}
+    assert sorted(started) == ["ok-1", "ok-2"]
+
+
+def test_sync_execution_failures_are_reported(monkeypatch):
+    def start_sync_execution(stateMachineArn, name, input):
+        now = datetime.now()
+        status = "FAILED" if name == "bad" else "SUCCEEDED"
+        return {"executionArn": f'arn:execution:{name}', "status": status, "startDate": now, "stopDate": now}
+
+    monkeypatch.setattr(post_order, "SYNC_EXECUTION", True)
+    monkeypatch.setattr(clients.client("stepfunctions"), "start_sync_execution", start_sync_execution)
+    response = post_order.handler({"Records": [record("ok", 1), record("bad", 2)]}, None)
+
+    assert response == {"batchItemFailures": [{"itemIdentifier": "bad"}]}
+
+
+def test_fifo_groups_start_in_order_and_stop_at_their_first_failure(monkeypatch):
+    started = []
+
+    def start_execution(stateMachineArn, name, input):
+        if name == "a-2":
+            raise RuntimeError("throttled")
+        started.append(name)
+        return {"executionArn": f'arn:execution:{name}'}
+
+    monkeypatch.setattr(clients.client("stepfunctions"), "start_execution", start_execution)
+    records = [record("a-1", 1, "user-a"), record("b-1", 1, "user-b"), record("a-2", 2, "user-a"),
+               record("b-2", 2, "user-b"), record("a-3", 3, "user-a")]
+    response = post_order.handler({"Records": records}, None)
+
+    assert response == {"batchItemFailures": [{"itemIdentifier": "a-2"}, {"itemIdentifier": "a-3"}]}
+    assert [name for name in started if name.startswith("b")] == ["b-1", "b-2"]
+    assert "a-3" not in started
@@ -0,0 +1,46 @@
+import json
+
+from orders_common import clients
+
+import send_sqs_message_batch
+
+
+def test_inputs_are_sent_in_chunks_of_ten_with_per_input_results(monkeypatch):
+    calls = []
+
+    def send_message_batch(QueueUrl, Entries):
+        calls.append(Entries)
+        failed = [entry for entry in Entries if entry["Id"] == "3"]
+        return {
+            "Successful": [{"Id": entry["Id"], "MessageId": f'msg-{entry["Id"]}'} for entry in Entries if entry not in failed],
+            "Failed": [{"Id": entry["Id"], "Code": "InvalidMessageContents", "Message": "bad", "SenderFault": True} for entry in failed],
+        }
+
+    monkeypatch.setattr(clients.client("sqs"), "send_message_batch", send_message_batch)
+    inputs = [{"name": "pizza", "quantity": n, "restaurantId": "r1"} for n in range(23)]
+    results = send_sqs_message_batch.handler({"arguments": {"inputs": inputs}, "identity": {"sub": "user-1"}}, None)
+
+    assert sorted(len(entries) for entries in calls) == [3, 10, 10]
+    assert [result["index"] for result in results] == list(range(23))
+    assert results[3] == {"index": 3, "messageId": None, "errorCode": "InvalidMessageContents", "errorMessage": "bad"}
+    assert results[22]["messageId"] == "msg-22"
+    first_body = json.loads(next(entries for entries in calls if entries[0]["Id"] == "0")[0]["MessageBody"])
+    assert first_body == {"input": inputs[0], "userId": "user-1"}
+
+
+def test_fifo_inputs_are_grouped_by_user_and_deduplicated_per_request(monkeypatch):
+    calls = []
+
+    def send_message_batch(QueueUrl, Entries):
+        calls.append(Entries)
+        return {"Successful": [{"Id": entry["Id"], "MessageId": entry["Id"]} for entry in Entries], "Failed": []}
+
+    monkeypatch.setattr(send_sqs_message_batch, "QueueUrl", "https://sqs.us-east-1.amazonaws.com/123456789012/sqs-queue.fifo")
+    monkeypatch.setattr(clients.client("sqs"), "send_message_batch", send_message_batch)
+    inputs = [{"name": "pizza", "quantity": n, "restaurantId": "r1"} for n in range(12)]
+    send_sqs_message_batch.send_messages(inputs, "user-1", "request-1")
+
+    entries = [entry for batch in calls for entry in batch]
+    assert [entry["Id"] for entry in entries] == [str(n) for n in range(12)]
+    assert {entry["MessageGroupId"] for entry in entries} == {"user-1"}
+    assert entries[11]["MessageDeduplicationId"] == "request-1-11"
@@ -0,0 +1,30 @@
+from botocore.stub import ANY, Stubber
+
+from orders_common import clients
+
+import update_order
+
+
+def test_partial_update_is_one_conditional_write():
+    with Stubber(clients.client("dynamodb")) as stubber:
+        stubber.add_response("update_item", {"Attributes": {"quantity": {"N": "3"}}}, {
+            "TableName": "ORDER",
+            "Key": {"id": {"S": "order-1"}, "user_id": {"S": "demo_user"}},
+            "ConditionExpression": "attribute_exists(id)",
+            "ExpressionAttributeNames": {"#updatedAt": "updatedAt", "#quantity": "quantity"},
+            "ExpressionAttributeValues": ANY,
+            "UpdateExpression": "set #updatedAt = :updatedAt, #quantity = :quantity",
+            "ReturnValues": "UPDATED_NEW"
+        })
+        response = update_order.update_order("order-1", {"id": "order-1", "quantity": 3, "name": None})
+
+    assert response["message"] == "update success"
+    assert response["updated_values"] == {"quantity": 3}
+
+
+def test_missing_order_maps_condition_failure_to_not_found():
+    with Stubber(clients.client("dynamodb")) as stubber:
+        stubber.add_client_error("update_item", service_error_code="ConditionalCheckFailedException")
+        response = update_order.update_order("order-1", {"id": "order-1", "name": "pizza"})
+
+    assert response == {"message": "order order-1 not found"}